@@ -0,0 +1,204 @@
+"""
+Asyncio Luno API client built on aiohttp.
+
+Mirrors `LunoClient` (ticker, balances, post/stop order, get order) including the
+`dry_run` behaviour and the user-friendly order error mapping, and adds
+`snapshot()` to fetch tickers for many pairs plus balances in one concurrent
+round-trip instead of one blocking call per pair.
+
+Usage:
+    async with AsyncLunoClient(key, secret) as client:
+        snap = await client.snapshot()
+"""
+import asyncio
+import base64
+import logging
+from typing import Dict, Iterable, List, Optional
+
+import aiohttp
+
+from luno_client import (
+    BASE_URL,
+    LunoAPIError,
+    DEFAULT_TIMEOUT,
+    DEFAULT_TIMEOUTS,
+    POOL_SIZE,
+    Timeout,
+    build_order_payload,
+    dry_run_order,
+    order_error_message,
+    retry_after_seconds,
+)
+from rate_limiter import RateLimiter, get_rate_limiter
+
+LOGGER = logging.getLogger(__name__)
+
+
+def _client_timeout(timeout: Timeout) -> aiohttp.ClientTimeout:
+    """Convert a requests-style timeout (seconds or (connect, read)) to aiohttp's form."""
+    if isinstance(timeout, (tuple, list)):
+        connect, read = timeout
+        return aiohttp.ClientTimeout(sock_connect=connect, sock_read=read)
+    return aiohttp.ClientTimeout(total=timeout)
+
+
+class AsyncLunoClient:
+    """Async counterpart of `LunoClient` sharing its payloads, timeouts and error messages."""
+
+    def __init__(self, api_key: str, api_secret: str, dry_run: bool = True,
+                 session: Optional[aiohttp.ClientSession] = None,
+                 timeouts: Optional[Dict[str, Timeout]] = None,
+                 base_url: str = BASE_URL, pool_size: int = POOL_SIZE,
+                 limiter: Optional[RateLimiter] = None):
+        """Create a client.
+
+        Args:
+            api_key: Luno API key id
+            api_secret: Luno API secret
+            dry_run: if True, placing/cancelling orders is simulated
+            session: optional aiohttp session; one is created lazily (and closed by `close()`) otherwise
+            timeouts: optional per-endpoint overrides of `DEFAULT_TIMEOUTS`
+            base_url: API root, overridable for tests
+            pool_size: connection limit for the lazily created session
+            limiter: optional `RateLimiter`; defaults to the process-wide limiter shared with `LunoClient`
+        """
+        token = base64.b64encode(f"{api_key or ''}:{api_secret or ''}".encode()).decode()
+        self._auth_headers = {'Authorization': f'Basic {token}'}
+        self.dry_run = bool(dry_run)
+        self.timeouts = dict(DEFAULT_TIMEOUTS)
+        if timeouts:
+            self.timeouts.update(timeouts)
+        self.base_url = base_url.rstrip('/')
+        self.pool_size = pool_size
+        self.limiter = limiter or get_rate_limiter()
+        self._session = session
+        self._owns_session = session is None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.pool_size, keepalive_timeout=30)
+            self._session = aiohttp.ClientSession(connector=connector)
+            self._owns_session = True
+        return self._session
+
+    async def close(self):
+        """Close the underlying session if this client created it."""
+        if self._owns_session and self._session is not None and not self._session.closed:
+            await self._session.close()
+
+    async def _request(self, method: str, endpoint: str, params: Optional[dict] = None,
+                       data: Optional[dict] = None, auth: bool = True):
+        """Send a request and return (status, parsed_json_or_text)."""
+        session = self._get_session()
+        # The limiter blocks on a threading.Condition, so wait for it off the event loop
+        await asyncio.to_thread(self.limiter.acquire_for, endpoint)
+        timeout = _client_timeout(self.timeouts.get(endpoint, DEFAULT_TIMEOUT))
+        async with session.request(method, f"{self.base_url}/{endpoint}", params=params, data=data,
+                                   headers=self._auth_headers if auth else None, timeout=timeout) as resp:
+            if resp.status == 429:
+                self.limiter.penalize(endpoint, retry_after_seconds(resp.headers.get('Retry-After')))
+            text = await resp.text()
+            try:
+                body = await resp.json(content_type=None) if text else {}
+            except ValueError:
+                body = text
+            return resp.status, body
+
+    @staticmethod
+    def _raise_for_status(status: int, body, endpoint: str):
+        if status >= 400:
+            raise LunoAPIError(f"Luno API: HTTP {status} on {endpoint}: {body}", status_code=status)
+
+    async def get_ticker(self, pair: str = "XBTUSD") -> dict:
+        """Get ticker for a trading pair. Returns parsed JSON."""
+        status, body = await self._request('GET', 'ticker', params={'pair': pair}, auth=False)
+        self._raise_for_status(status, body, 'ticker')
+        return body
+
+    async def get_order(self, order_id: str) -> dict:
+        """Get information about an order."""
+        status, body = await self._request('GET', 'getorder', params={'order_id': order_id})
+        self._raise_for_status(status, body, 'getorder')
+        return body
+
+    async def get_balances(self) -> dict:
+        """Return account balances (requires auth). 403/404 map to the same errors as `LunoClient`."""
+        status, body = await self._request('GET', 'balances')
+        if status == 404:
+            raise LunoAPIError("Luno API: 404 Not Found. Verify API credentials and permissions.", status_code=404)
+        if status == 403:
+            raise LunoAPIError("Luno API: 403 Forbidden. Check API key permissions.", status_code=403)
+        self._raise_for_status(status, body, 'balances')
+        return body
+
+    async def place_order(self, pair: str, side: str, volume: float, price: float, order_type: str = "limit") -> dict:
+        """Place an order (limit by default). Respects `dry_run` exactly like `LunoClient.place_order`."""
+        payload = build_order_payload(pair, side, volume, price, order_type)
+
+        if self.dry_run:
+            return dry_run_order(payload)
+
+        try:
+            status, body = await self._request('POST', 'postorder', data=payload)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            LOGGER.exception('Network error posting order, payload=%s', payload)
+            raise LunoAPIError(f"Network error placing order: {e}") from e
+
+        if status < 400:
+            return body if isinstance(body, dict) else {'status': 'ok', 'raw': body}
+
+        error_msg = body.get('error', body) if isinstance(body, dict) else body
+        error_code = body.get('error_code') if isinstance(body, dict) else None
+        LOGGER.error('Postorder failed status=%s error=%s payload=%s', status, error_msg, payload)
+        raise LunoAPIError(order_error_message(error_msg), status_code=status, error_code=error_code)
+
+    async def cancel_order(self, order_id: str) -> dict:
+        """Attempt to cancel an order via /stoporder. Respects dry_run."""
+        if self.dry_run:
+            LOGGER.info("DRY_RUN enabled: not cancelling order: %s", order_id)
+            return {"status": "dry_run", "order_id": order_id}
+
+        status, body = await self._request('POST', 'stoporder', data={'order_id': order_id})
+        self._raise_for_status(status, body, 'stoporder')
+        return body
+
+    async def get_tickers_for(self, pairs: Iterable[str]) -> Dict[str, dict]:
+        """Fetch tickers for `pairs` concurrently. Failed pairs map to their exception."""
+        pairs = list(pairs)
+        results = await asyncio.gather(*(self.get_ticker(p) for p in pairs), return_exceptions=True)
+        return dict(zip(pairs, results))
+
+    async def snapshot(self, pairs: Optional[List[str]] = None, include_balances: bool = True) -> Dict:
+        """Fetch tickers for `pairs` (default: `SmartStrategy.SUPPORTED_COINS`) and balances in one fan-out.
+
+        Returns: {tickers: {pair: ticker}, balances: dict or None, errors: {name: message}}
+        """
+        if pairs is None:
+            from smart_strategy import SmartStrategy
+            pairs = SmartStrategy.SUPPORTED_COINS
+
+        pairs = list(pairs)
+        calls = [self.get_ticker(p) for p in pairs]
+        if include_balances:
+            calls.append(self.get_balances())
+        results = await asyncio.gather(*calls, return_exceptions=True)
+
+        snap = {'tickers': {}, 'balances': None, 'errors': {}}
+        for pair, res in zip(pairs, results):
+            if isinstance(res, BaseException):
+                snap['errors'][pair] = str(res)
+            else:
+                snap['tickers'][pair] = res
+        if include_balances:
+            res = results[-1]
+            if isinstance(res, BaseException):
+                snap['errors']['balances'] = str(res)
+            else:
+                snap['balances'] = res
+        return snap
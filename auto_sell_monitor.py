@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 """Monitor the last buy and automatically sell when a profit target is reached.
 
-Reads `trade_log.csv` to find the most recent BUY, polls the ticker for `PAIR`,
+Reads the trade journal to find the most recent BUY, polls the ticker for `PAIR`,
 and places a SELL order via `LunoClient` when profit_before_fees >= target_pct.
 
 Configuration (via .env):
@@ -10,49 +10,31 @@ Configuration (via .env):
 - POLL_INTERVAL (seconds, default 30)
 - DRY_RUN (true/false)
 """
-import csv
-import json
 import os
 import time
 from dotenv import load_dotenv
 
 from luno_client import LunoClient
+from state_store import get_state_store
+from trade_journal import get_trade_journal
+from ticker_cache import get_cached_ticker
 
 
-def read_last_buy(csv_path="trade_log.csv"):
-    if not os.path.exists(csv_path):
+def read_last_buy():
+    """Most recent BUY in the trade journal (indexed lookup), or None."""
+    trade = get_trade_journal().last_buy()
+    if trade is None:
         return None
-    with open(csv_path, newline="", encoding="utf-8") as f:
-        rows = list(csv.DictReader(f))
-    if not rows:
-        return None
-    # find last row that looks like a buy
-    for row in reversed(rows):
-        side = (row.get('side') or row.get('action') or '').lower()
-        if side in ('buy', 'b', 'bid'):
-            vol = float(row.get('volume') or row.get('amount') or row.get('quantity') or 0)
-            price = float(row.get('price') or row.get('execution_price') or 0)
-            return {'volume': vol, 'price': price, 'order_id': row.get('order_id'), 'raw': row}
-    # fallback to last row
-    row = rows[-1]
-    vol = float(row.get('volume') or row.get('amount') or row.get('quantity') or 0)
-    price = float(row.get('price') or row.get('execution_price') or 0)
-    return {'volume': vol, 'price': price, 'order_id': row.get('order_id'), 'raw': row}
-
-
-def append_trade_log(row, csv_path="trade_log.csv"):
-    header = ['timestamp', 'side', 'order_id', 'price', 'volume', 'note']
-    exists = os.path.exists(csv_path)
-    with open(csv_path, 'a', newline='', encoding='utf-8') as f:
-        writer = csv.DictWriter(f, fieldnames=header)
-        if not exists:
-            writer.writeheader()
-        writer.writerow(row)
-
-
-def write_state(state, state_path='bot_state.json'):
-    with open(state_path, 'w', encoding='utf-8') as f:
-        json.dump(state, f, indent=2)
+    return {'volume': trade['volume'], 'price': trade['price'], 'order_id': trade['order_id'],
+            'pair': trade['pair'], 'raw': trade}
+
+
+def write_state(state, flush=False):
+    """Publish the monitor's view as the `autosell` section of bot_state.json."""
+    store = get_state_store()
+    store.update('autosell', state)
+    if flush:
+        store.flush()
 
 
 def main():
@@ -66,16 +48,16 @@ def main():
 
     last_buy = read_last_buy()
     if not last_buy or last_buy['volume'] <= 0:
-        print('No previous BUY found in trade_log.csv — nothing to auto-sell.')
+        print('No previous BUY found in the trade journal — nothing to auto-sell.')
         return
 
     # If the trade log contains the pair for the buy, prefer that pair so we don't try to
     # sell the asset on a different market (this avoids huge/mismatched computations).
-    csv_pair = last_buy.get('raw', {}).get('pair')
-    if csv_pair:
-        if csv_pair != PAIR:
-            print(f"Overriding PAIR from env ({PAIR}) with pair from trade log ({csv_pair})")
-        PAIR = csv_pair
+    buy_pair = last_buy.get('pair')
+    if buy_pair:
+        if buy_pair != PAIR:
+            print(f"Overriding PAIR from env ({PAIR}) with pair from trade log ({buy_pair})")
+        PAIR = buy_pair
 
     volume = last_buy['volume']
     buy_price = last_buy['price']
@@ -83,7 +65,7 @@ def main():
     print(f"Monitoring {PAIR} for auto-sell: volume={volume} bought@{buy_price} (spent {spent} NGN) target={TARGET_PCT}%")
 
     while True:
-        ticker = cli.get_ticker(PAIR)
+        ticker = get_cached_ticker(PAIR, cli)
         bid = float(ticker.get('bid') or ticker.get('last') or ticker.get('ask'))
         current_value = bid * volume
         profit_ngn = current_value - spent
@@ -110,15 +92,12 @@ def main():
             resp = cli.place_order(PAIR, 'sell', volume, bid, order_type='limit')
             print('Sell order response:', resp)
             # log
-            append_trade_log({'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
-                              'side': 'SELL',
-                              'order_id': resp.get('order_id') or resp.get('id') or '',
-                              'price': bid,
-                              'volume': volume,
-                              'note': f'auto_sell_target_{TARGET_PCT}pct'},)
+            get_trade_journal().record(PAIR, 'sell', bid, volume, action='SELL',
+                                       order_id=resp.get('order_id') or resp.get('id') or None,
+                                       source='autosell', note=f'auto_sell_target_{TARGET_PCT}pct', details=resp)
             # update state
             state['last_sell'] = resp
-            write_state(state)
+            write_state(state, flush=True)
             print('Auto-sell complete — exiting monitor.')
             return
 
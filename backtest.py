@@ -0,0 +1,261 @@
+"""
+Backtester: replay a price series through the live strategy objects.
+
+Each tick is an event; the policy (a `SmartStrategy` or the EMA signal from
+`strategy.py`) decides whether to buy or sell, and a simulated broker fills the
+order at the tick price adjusted for slippage and charges the taker fee. The
+report uses the same keys as `ProfitTracker.compute_pair_stats`, plus drawdown,
+win rate and fees.
+
+Usage:
+    python backtest.py prices.csv --pair XBTNGN --strategy smart --buy-drop 3 --sell-profit 10 --stop-loss 5
+    python backtest.py prices.csv --strategy ema --period 10 --fee 0.001 --slippage 0.0005
+
+The CSV needs a price column (`price`, `close` or `last_trade`) and optionally `timestamp`.
+"""
+import csv
+import logging
+from typing import Dict, Iterable, List, Optional, Union
+
+from smart_strategy import SmartStrategy
+from strategy import EMASignal
+
+LOGGER = logging.getLogger(__name__)
+
+BUY = 'buy'
+SELL = 'sell'
+
+DEFAULT_FEE = 0.001       # 0.1% taker fee per fill
+DEFAULT_SLIPPAGE = 0.0005  # 0.05% adverse price move per fill
+
+
+class SmartPolicy:
+    """Drive `SmartStrategy.should_buy/should_sell` from a price feed.
+
+    While flat, the baseline is the highest price since the last exit, so `buy_drop_pct`
+    means "buy after a drop of X% from the recent high". While long, `should_sell` is
+    checked against the entry price.
+    """
+
+    def __init__(self, strategy: SmartStrategy, coin: str):
+        self.strategy = strategy
+        self.coin = coin
+        self.baseline = None
+
+    def split_profit(self, profit: float) -> tuple:
+        """(reinvest, savings) per the coin's compound_reinvest_pct."""
+        return self.strategy.get_reinvest_amounts(profit, self.coin)
+
+    def on_price(self, price: float, entry_price: Optional[float]) -> Optional[str]:
+        if entry_price is not None:
+            sell, _reason = self.strategy.should_sell(price, entry_price, self.coin)
+            if sell:
+                self.baseline = price
+                return SELL
+            return None
+        if self.baseline is None or price > self.baseline:
+            self.baseline = price
+            return None
+        if self.strategy.should_buy(price, self.baseline, self.coin):
+            return BUY
+        return None
+
+
+class EMAPolicy:
+    """Long-only version of `strategy.signal_from_prices`: enter on 'buy', exit on 'sell'."""
+
+    def __init__(self, period: int = 10):
+        self.signal = EMASignal(period)
+
+    def on_price(self, price: float, entry_price: Optional[float]) -> Optional[str]:
+        sig = self.signal.update(price)
+        if sig == BUY and entry_price is None:
+            return BUY
+        if sig == SELL and entry_price is not None:
+            return SELL
+        return None
+
+
+def smart_policy(pair: str, buy_drop_pct: float = None, sell_profit_pct: float = None,
+                 stop_loss_pct: float = None, compound_reinvest_pct: float = None) -> SmartPolicy:
+    """SmartPolicy over an in-memory SmartStrategy (strategy_config.json is never touched)."""
+    coin_cfg = dict(SmartStrategy.DEFAULTS)
+    overrides = {'buy_drop_pct': buy_drop_pct, 'sell_profit_pct': sell_profit_pct,
+                 'stop_loss_pct': stop_loss_pct, 'compound_reinvest_pct': compound_reinvest_pct}
+    coin_cfg.update({k: v for k, v in overrides.items() if v is not None})
+    strategy = SmartStrategy(config={'active_coin': pair, 'coins': {pair: coin_cfg}})
+    return SmartPolicy(strategy, pair)
+
+
+def run_backtest(prices: Iterable[Union[float, tuple]], policy, pair: str = 'XBTNGN',
+                 capital: float = 100000.0, fee: float = DEFAULT_FEE, slippage: float = DEFAULT_SLIPPAGE,
+                 close_at_end: bool = True, keep_trades: bool = True) -> Dict:
+    """Replay `prices` through `policy` and return the performance report.
+
+    Args:
+        prices: floats, or (timestamp, price) tuples
+        policy: object with on_price(price, entry_price) -> 'buy' | 'sell' | None
+        pair: pair name used in the report
+        capital: starting quote balance (NGN); each buy spends the whole trading balance.
+            If the policy has split_profit(profit) -> (reinvest, savings) (SmartPolicy uses
+            compound_reinvest_pct), the savings part of each profit is set aside, not traded.
+        fee: fee rate charged on every fill's notional
+        slippage: fraction the fill price moves against us (buys higher, sells lower)
+        close_at_end: sell any open position at the last price so P&L is fully realized
+        keep_trades: include the list of fills in the report
+    """
+    cash = capital
+    volume = 0.0
+    entry_price = None   # policy-visible entry (tick price, before slippage)
+    entry_cost = 0.0     # quote spent on the open position including fees
+    total_bought = total_sold = fees = savings = 0.0
+    wins = losses = 0
+    buy_count = sell_count = 0
+    peak = capital
+    max_drawdown = 0.0
+    trades: List[Dict] = []
+    ticks = 0
+    price = ts = None
+    on_price = policy.on_price
+    split_profit = getattr(policy, 'split_profit', None)
+
+    def _close_position(note: str = None):
+        """Sell the whole open position at the current tick and book fees, P&L and savings."""
+        nonlocal cash, volume, entry_price, entry_cost, total_sold, fees, savings, wins, losses, sell_count
+        cash, fee_paid = _sell(volume, price, slippage, fee)
+        total_sold += cash
+        fees += fee_paid
+        sell_count += 1
+        if cash > entry_cost:
+            wins += 1
+            if split_profit is not None:
+                saved = split_profit(cash - entry_cost)[1]
+                cash -= saved
+                savings += saved
+        else:
+            losses += 1
+        if keep_trades:
+            trade = {'timestamp': ts, 'pair': pair, 'action': SELL, 'price': price * (1 - slippage), 'volume': volume, 'fee': fee_paid}
+            if note:
+                trade['note'] = note
+            trades.append(trade)
+        volume, entry_price, entry_cost = 0.0, None, 0.0
+
+    for tick in prices:
+        if isinstance(tick, tuple):
+            ts, price = tick
+        else:
+            price = tick
+        price = float(price)
+        ticks += 1
+
+        action = on_price(price, entry_price)
+        if action == BUY and entry_price is None and cash > 0:
+            fill = price * (1 + slippage)
+            cost = cash
+            fee_paid = cost * fee
+            volume = (cost - fee_paid) / fill
+            cash = 0.0
+            entry_price, entry_cost = price, cost
+            total_bought += cost
+            fees += fee_paid
+            buy_count += 1
+            if keep_trades:
+                trades.append({'timestamp': ts, 'pair': pair, 'action': BUY, 'price': fill, 'volume': volume, 'fee': fee_paid})
+        elif action == SELL and entry_price is not None:
+            _close_position()
+
+        equity = cash + savings + volume * price
+        if equity > peak:
+            peak = equity
+        elif peak > 0:
+            drawdown = (peak - equity) / peak
+            if drawdown > max_drawdown:
+                max_drawdown = drawdown
+
+    open_value = 0.0
+    if entry_price is not None and price is not None:
+        if close_at_end:
+            _close_position('close_at_end')
+        else:
+            open_value = volume * price
+
+    pnl = total_sold - total_bought
+    closed = wins + losses
+    report = {
+        'pair': pair,
+        'trades': buy_count + sell_count,
+        'total_bought_ngn': round(total_bought, 2),
+        'total_sold_ngn': round(total_sold, 2),
+        'pnl_ngn': round(pnl, 2),
+        'pnl_pct': round(pnl / total_bought * 100, 2) if total_bought > 0 else 0,
+        'buy_count': buy_count,
+        'sell_count': sell_count,
+        'fees_ngn': round(fees, 2),
+        'win_rate_pct': round(wins / closed * 100, 2) if closed else 0,
+        'wins': wins,
+        'losses': losses,
+        'max_drawdown_pct': round(max_drawdown * 100, 2),
+        'savings_ngn': round(savings, 2),
+        'final_equity_ngn': round(cash + savings + open_value, 2),
+        'return_pct': round((cash + savings + open_value - capital) / capital * 100, 2) if capital else 0,
+        'open_position_ngn': round(open_value, 2),
+        'ticks': ticks,
+    }
+    if keep_trades:
+        report['fills'] = trades
+    return report
+
+
+def _sell(volume: float, price: float, slippage: float, fee: float):
+    """Proceeds and fee for selling `volume` at `price` after slippage."""
+    gross = volume * price * (1 - slippage)
+    fee_paid = gross * fee
+    return gross - fee_paid, fee_paid
+
+
+def load_prices(path: str) -> List[tuple]:
+    """Read (timestamp, price) ticks from a CSV with a price/close/last_trade column."""
+    ticks = []
+    with open(path, newline='', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            raw = row.get('price') or row.get('close') or row.get('last_trade')
+            if not raw:
+                continue
+            ticks.append((row.get('timestamp'), float(raw)))
+    return ticks
+
+
+if __name__ == '__main__':
+    import argparse
+    import json
+    import time
+
+    parser = argparse.ArgumentParser(description='Backtest SmartStrategy or the EMA signal on a price CSV')
+    parser.add_argument('prices', help='CSV with a price/close/last_trade column')
+    parser.add_argument('--pair', default='XBTNGN')
+    parser.add_argument('--strategy', choices=('smart', 'ema'), default='smart')
+    parser.add_argument('--buy-drop', type=float)
+    parser.add_argument('--sell-profit', type=float)
+    parser.add_argument('--stop-loss', type=float)
+    parser.add_argument('--period', type=int, default=10, help='EMA period (ema strategy)')
+    parser.add_argument('--capital', type=float, default=100000.0)
+    parser.add_argument('--fee', type=float, default=DEFAULT_FEE)
+    parser.add_argument('--slippage', type=float, default=DEFAULT_SLIPPAGE)
+    parser.add_argument('--fills', action='store_true', help='Include every fill in the output')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s %(levelname)s %(message)s")
+    # SmartStrategy logs every signal (stop-losses as warnings); keep the report readable
+    logging.getLogger('smart_strategy').setLevel(logging.ERROR)
+    ticks = load_prices(args.prices)
+    if args.strategy == 'smart':
+        policy = smart_policy(args.pair, args.buy_drop, args.sell_profit, args.stop_loss)
+    else:
+        policy = EMAPolicy(args.period)
+    start = time.perf_counter()
+    result = run_backtest(ticks, policy, pair=args.pair, capital=args.capital, fee=args.fee,
+                          slippage=args.slippage, keep_trades=args.fills)
+    result['elapsed_sec'] = round(time.perf_counter() - start, 3)
+    print(json.dumps(result, indent=2))
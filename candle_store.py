@@ -0,0 +1,232 @@
+"""
+Local OHLCV candle history per pair, synced incrementally from Luno.
+
+Each (pair, duration) lives in one append-only binary file of fixed-size NumPy
+records (ts, open, high, low, close, volume), sorted by timestamp. Reads are
+`np.memmap` views, so a backtest slices years of candles without copying or parsing.
+`sync` asks Luno's /candles endpoint only for the range after the last stored
+candle and appends closed candles; the in-progress candle is never written.
+
+Candles the bot aggregates itself from live ticks (see candles.py) are kept apart
+from the exchange history, in LIVE_DIR, so backtests keep reading Luno's own candles.
+
+Configuration (.env):
+- CANDLE_STORE_DIR (default market_data)
+- LIVE_CANDLE_DIR (default market_data/live)
+
+Usage:
+    store = get_candle_store()
+    store.sync(client, 'XBTNGN', duration=60)
+    closes = store.read('XBTNGN', 60)['close']   # zero-copy memmap view
+
+    python candle_store.py sync XBTNGN ETHNGN --duration 300 --days 30
+"""
+import logging
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+LOGGER = logging.getLogger(__name__)
+
+CANDLE_DTYPE = np.dtype([
+    ('ts', '<i8'),        # candle open time, unix ms
+    ('open', '<f8'),
+    ('high', '<f8'),
+    ('low', '<f8'),
+    ('close', '<f8'),
+    ('volume', '<f8'),
+])
+
+# Candle lengths (seconds) accepted by Luno's /candles endpoint
+DURATIONS = (60, 300, 900, 1800, 3600, 10800, 14400, 28800, 86400, 259200, 604800)
+MAX_PAGE = 1000  # candles returned per /candles call
+
+DEFAULT_DIR = os.getenv('CANDLE_STORE_DIR', 'market_data')
+LIVE_DIR = os.getenv('LIVE_CANDLE_DIR', os.path.join(DEFAULT_DIR, 'live'))
+
+
+def duration_for_interval(seconds: float) -> int:
+    """Smallest candle duration that is at least `seconds` long."""
+    for duration in DURATIONS:
+        if duration >= seconds:
+            return duration
+    return DURATIONS[-1]
+
+
+def to_records(candles: Iterable[dict]) -> np.ndarray:
+    """Convert Luno candle dicts (string prices) into CANDLE_DTYPE records."""
+    rows = [(int(c['timestamp']), float(c['open']), float(c['high']), float(c['low']),
+             float(c['close']), float(c['volume'])) for c in candles]
+    return np.array(rows, dtype=CANDLE_DTYPE)
+
+
+def to_candles(records: np.ndarray) -> List[dict]:
+    """CANDLE_DTYPE records back to candle dicts (timestamp in unix ms, float prices)."""
+    return [{'timestamp': int(r['ts']), 'open': float(r['open']), 'high': float(r['high']),
+             'low': float(r['low']), 'close': float(r['close']), 'volume': float(r['volume'])}
+            for r in records]
+
+
+class CandleStore:
+    """Append-only candle files under `root`, one per pair and duration."""
+
+    def __init__(self, root: str = DEFAULT_DIR):
+        self.root = root
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def path(self, pair: str, duration: int = 60) -> str:
+        return os.path.join(self.root, f"{pair}_{int(duration)}.candles")
+
+    def count(self, pair: str, duration: int = 60) -> int:
+        try:
+            return os.path.getsize(self.path(pair, duration)) // CANDLE_DTYPE.itemsize
+        except OSError:
+            return 0
+
+    def last_timestamp(self, pair: str, duration: int = 60) -> Optional[int]:
+        """Open time (unix ms) of the newest stored candle, or None if there are none."""
+        n = self.count(pair, duration)
+        if n == 0:
+            return None
+        with open(self.path(pair, duration), 'rb') as f:
+            f.seek((n - 1) * CANDLE_DTYPE.itemsize)
+            return int(np.frombuffer(f.read(CANDLE_DTYPE.itemsize), dtype=CANDLE_DTYPE)['ts'][0])
+
+    def read(self, pair: str, duration: int = 60, since: int = None, until: int = None) -> np.ndarray:
+        """Candles with since <= ts < until (unix ms) as a read-only memmap view (no copy)."""
+        n = self.count(pair, duration)
+        if n == 0:
+            return np.empty(0, dtype=CANDLE_DTYPE)
+        data = np.memmap(self.path(pair, duration), dtype=CANDLE_DTYPE, mode='r', shape=(n,))
+        start = 0 if since is None else int(np.searchsorted(data['ts'], since, side='left'))
+        end = n if until is None else int(np.searchsorted(data['ts'], until, side='left'))
+        return data[start:end]
+
+    def closes(self, pair: str, duration: int = 60, limit: int = None) -> np.ndarray:
+        """Close prices, oldest first (the last `limit` if given)."""
+        data = self.read(pair, duration)
+        if limit is not None:
+            data = data[-limit:] if limit > 0 else data[:0]
+        return data['close']
+
+    def append(self, pair: str, duration: int, records: np.ndarray) -> int:
+        """Append records newer than the last stored candle. Returns how many were written."""
+        if len(records) == 0:
+            return 0
+        with self._lock:
+            records = np.sort(records, order='ts')
+            last = self.last_timestamp(pair, duration)
+            if last is not None:
+                records = records[records['ts'] > last]
+            if len(records) == 0:
+                return 0
+            # Collapse duplicate timestamps within the batch, keeping the last copy
+            keep = np.append(records['ts'][1:] != records['ts'][:-1], True)
+            records = records[keep]
+            with open(self.path(pair, duration), 'ab') as f:
+                f.write(records.tobytes())
+            return len(records)
+
+    def on_candle(self, pair: str, timeframe: str, candle: dict):
+        """`CandleAggregator` subscriber: append one closed candle."""
+        self.append(pair, int(candle['duration']), to_records([candle]))
+
+    def sync(self, client, pair: str, duration: int = 60, start: int = None, now: float = None,
+             max_pages: int = 1000, page_size: int = MAX_PAGE) -> int:
+        """Fetch and append every closed candle after the last stored one.
+
+        Args:
+            client: LunoClient (needs API credentials for /candles)
+            pair: trading pair
+            duration: candle length in seconds (see DURATIONS)
+            start: unix ms to begin from when nothing is stored (default: 7 days ago)
+            now: current unix time in seconds (injectable for tests)
+            max_pages: safety cap on requests per sync
+            page_size: candles the endpoint returns per call; a shorter page means caught up
+        Returns the number of candles appended.
+        """
+        if duration not in DURATIONS:
+            raise ValueError(f"Unsupported candle duration {duration}; use one of {DURATIONS}")
+        now_ms = int((time.time() if now is None else now) * 1000)
+        step = duration * 1000
+        last = self.last_timestamp(pair, duration)
+        since = last + step if last is not None else (start if start is not None else now_ms - 7 * 86400 * 1000)
+        added = 0
+        for _ in range(max_pages):
+            if since + step > now_ms:
+                break  # the next candle has not closed yet
+            candles = client.get_candles(pair, since, duration).get('candles') or []
+            # Only closed candles are stored, so files never need rewriting
+            closed = [c for c in candles if int(c['timestamp']) + step <= now_ms]
+            if not closed:
+                break
+            added += self.append(pair, duration, to_records(closed))
+            newest = max(int(c['timestamp']) for c in closed)
+            since = newest + step
+            if len(candles) < page_size:
+                break
+        if added:
+            LOGGER.info(f"Synced {added} {duration}s candles for {pair}")
+        return added
+
+    def warm_prices(self, pair: str, count: int, client=None, duration: int = 60) -> List[float]:
+        """Last `count` closes for warming indicator buffers, syncing first when a client is given.
+
+        Sync failures (e.g. no API key) are logged and whatever is stored is returned.
+        """
+        if client is not None:
+            try:
+                self.sync(client, pair, duration, start=int((time.time() - count * duration * 2) * 1000))
+            except Exception as e:
+                LOGGER.warning(f"Candle sync for {pair} failed: {e}; warming from stored history only")
+        return self.closes(pair, duration, count).tolist()
+
+
+# Process-wide stores, one per root
+_stores: Dict[str, CandleStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_candle_store(root: str = None) -> CandleStore:
+    """Get the process-wide store for `root` (default CANDLE_STORE_DIR; LIVE_DIR for live candles)."""
+    root = root or DEFAULT_DIR
+    with _stores_lock:
+        store = _stores.get(root)
+        if store is None:
+            store = _stores[root] = CandleStore(root)
+        return store
+
+
+if __name__ == '__main__':
+    import argparse
+    from dotenv import load_dotenv
+    from luno_client import LunoClient
+
+    load_dotenv()
+    parser = argparse.ArgumentParser(description='Sync or inspect the local candle store')
+    sub = parser.add_subparsers(dest='cmd', required=True)
+    sync = sub.add_parser('sync')
+    sync.add_argument('pairs', nargs='+')
+    sync.add_argument('--duration', type=int, default=60)
+    sync.add_argument('--days', type=float, default=7, help='History to fetch for pairs with nothing stored')
+    info = sub.add_parser('info')
+    info.add_argument('pairs', nargs='+')
+    info.add_argument('--duration', type=int, default=60)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    store = get_candle_store()
+    if args.cmd == 'sync':
+        client = LunoClient(os.getenv('LUNO_API_KEY', ''), os.getenv('LUNO_API_SECRET', ''))
+        start = int((time.time() - args.days * 86400) * 1000)
+        for pair in args.pairs:
+            print(pair, store.sync(client, pair, args.duration, start=start), 'new candles')
+    else:
+        for pair in args.pairs:
+            data = store.read(pair, args.duration)
+            span = f"{data['ts'][0]}..{data['ts'][-1]}" if len(data) else 'empty'
+            print(pair, len(data), 'candles', span)
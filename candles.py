@@ -0,0 +1,196 @@
+"""
+Streaming tick-to-candle aggregation.
+
+`CandleAggregator` turns ticks (polled prices or stream trades) into OHLCV candles
+for several timeframes per pair. A candle stays open until the first tick past its
+end plus a grace period, so ticks that arrive a little late still land in the right
+candle; anything older than that is counted and dropped. Closed candles are kept in a
+bounded per-(pair, timeframe) history and published to subscribers, e.g.
+`TrendAnalyzer.on_candle`, the bot's EMA signal or the dashboard chart.
+
+Candles are dicts in the shape of Luno's /candles response (timestamp is the open
+time in unix ms) plus `pair` and `duration`, so they can be appended to the
+`candle_store` unchanged.
+
+The bot owns the live pipeline: it feeds the process-wide aggregator from the shared
+/tickers snapshot every CANDLE_TICK_INTERVAL seconds (`feed_tickers`), whether or not
+a dashboard is open, and records closed candles in the live candle store that the
+dashboard chart reads, so every dashboard worker serves the same candles.
+
+Configuration (.env):
+- CANDLE_PAIRS (comma-separated pairs to aggregate, default XBTNGN plus the strategy coins)
+- CANDLE_TICK_INTERVAL (seconds between snapshot ticks, default 10)
+"""
+import logging
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Iterable, List
+
+LOGGER = logging.getLogger(__name__)
+
+TIMEFRAMES = {'1m': 60, '5m': 300, '15m': 900, '1h': 3600}
+
+Subscriber = Callable[[str, str, dict], None]
+
+
+class CandleAggregator:
+    """Aggregate ticks into candles for `timeframes`, in bounded memory."""
+
+    def __init__(self, timeframes: Iterable[str] = ('1m', '5m', '15m', '1h'), grace: float = 5.0,
+                 history: int = 500, clock: Callable[[], float] = time.time):
+        """
+        Args:
+            timeframes: keys of TIMEFRAMES to build
+            grace: seconds a candle stays open after its end to accept late ticks
+            history: closed candles kept per (pair, timeframe)
+            clock: wall-clock source in seconds (injectable for tests)
+        """
+        unknown = [tf for tf in timeframes if tf not in TIMEFRAMES]
+        if unknown:
+            raise ValueError(f"Unknown timeframes {unknown}; use {list(TIMEFRAMES)}")
+        self.timeframes = list(timeframes)
+        self.grace = grace
+        self.history = history
+        self.clock = clock
+        self._open: Dict[tuple, Dict[int, dict]] = {}   # (pair, tf) -> {bucket start ms: candle}
+        self._closed: Dict[tuple, deque] = {}
+        self._last_closed: Dict[tuple, int] = {}        # (pair, tf) -> newest closed bucket start ms
+        self._subscribers: List[tuple] = []
+        self._lock = threading.RLock()
+        self.stats = {'ticks': 0, 'late_dropped': 0, 'closed': 0}
+
+    def subscribe(self, callback: Subscriber, pair: str = None, timeframe: str = None):
+        """Call callback(pair, timeframe, candle) for every closed candle (optionally filtered)."""
+        self._subscribers.append((callback, pair, timeframe))
+
+    def add_tick(self, pair: str, price: float, volume: float = 0.0, ts: float = None):
+        """Add one tick (ts in unix seconds, default now) and close any candles that are due."""
+        ts = self.clock() if ts is None else ts
+        ts_ms = int(ts * 1000)
+        price = float(price)
+        with self._lock:
+            self.stats['ticks'] += 1
+            for tf in self.timeframes:
+                step = TIMEFRAMES[tf] * 1000
+                bucket = ts_ms - ts_ms % step
+                key = (pair, tf)
+                if bucket <= self._last_closed.get(key, -1):
+                    self.stats['late_dropped'] += 1
+                    continue
+                candles = self._open.setdefault(key, {})
+                candle = candles.get(bucket)
+                if candle is None:
+                    candles[bucket] = {'pair': pair, 'duration': TIMEFRAMES[tf], 'timestamp': bucket,
+                                       'open': price, 'high': price, 'low': price, 'close': price,
+                                       'volume': float(volume), '_last_ts': ts_ms}
+                    continue
+                if price > candle['high']:
+                    candle['high'] = price
+                if price < candle['low']:
+                    candle['low'] = price
+                if ts_ms >= candle['_last_ts']:
+                    # A late tick must not overwrite the close set by a newer one
+                    candle['close'] = price
+                    candle['_last_ts'] = ts_ms
+                candle['volume'] += float(volume)
+        self.close_due(ts, pair)
+
+    def on_price(self, update: dict):
+        """`PriceEventEngine` handler: aggregate a {pair, price, received_at} update."""
+        self.add_tick(update['pair'], update['price'], ts=update.get('received_at'))
+
+    def add_trade(self, pair: str, trade: dict):
+        """Aggregate a Luno trade ({timestamp ms, price, volume} or stream {base, counter})."""
+        if 'price' in trade:
+            price, volume = float(trade['price']), float(trade.get('volume', 0))
+        else:
+            volume = float(trade['base'])
+            price = float(trade['counter']) / volume if volume else 0.0
+        ts = trade.get('timestamp')
+        self.add_tick(pair, price, volume, ts / 1000 if ts is not None else None)
+
+    def close_due(self, now: float = None, pair: str = None) -> List[dict]:
+        """Close every open candle whose end + grace is before `now`. Returns them oldest first."""
+        now_ms = int((self.clock() if now is None else now) * 1000)
+        grace_ms = int(self.grace * 1000)
+        closed = []
+        with self._lock:
+            for key, candles in self._open.items():
+                if pair is not None and key[0] != pair:
+                    continue
+                step = TIMEFRAMES[key[1]] * 1000
+                for bucket in sorted(candles):
+                    if bucket + step + grace_ms > now_ms:
+                        break
+                    candle = candles.pop(bucket)
+                    del candle['_last_ts']
+                    self._closed.setdefault(key, deque(maxlen=self.history)).append(candle)
+                    self._last_closed[key] = bucket
+                    closed.append((key, candle))
+            self.stats['closed'] += len(closed)
+        for (candle_pair, tf), candle in closed:
+            self._publish(candle_pair, tf, candle)
+        return [candle for _, candle in closed]
+
+    def _publish(self, pair: str, tf: str, candle: dict):
+        for callback, want_pair, want_tf in self._subscribers:
+            if (want_pair is None or want_pair == pair) and (want_tf is None or want_tf == tf):
+                try:
+                    callback(pair, tf, candle)
+                except Exception as e:
+                    LOGGER.error(f"Candle subscriber failed for {pair} {tf}: {e}")
+
+    def candles(self, pair: str, timeframe: str = '1m', limit: int = None, include_open: bool = False) -> List[dict]:
+        """Closed candles (oldest first), optionally followed by the in-progress candle(s)."""
+        key = (pair, timeframe)
+        with self._lock:
+            result = list(self._closed.get(key, ()))
+            if limit is not None:
+                result = result[-limit:] if limit > 0 else []
+            if include_open:
+                for bucket in sorted(self._open.get(key, {})):
+                    candle = dict(self._open[key][bucket])
+                    del candle['_last_ts']
+                    result.append(candle)
+        return result
+
+    def pairs(self) -> List[str]:
+        with self._lock:
+            return sorted({pair for pair, _ in self._open} | {pair for pair, _ in self._closed})
+
+
+def feed_tickers(aggregator: CandleAggregator, tickers: Dict[str, dict], pairs: Iterable[str],
+                 ts: float = None) -> int:
+    """Add one tick per pair from a {pair: ticker} snapshot, then close whatever is due.
+
+    Returns how many pairs had a usable price.
+    """
+    ts = aggregator.clock() if ts is None else ts
+    added = 0
+    for pair in pairs:
+        ticker = tickers.get(pair) or {}
+        try:
+            price = float(ticker.get('last_trade') or 0)
+        except (TypeError, ValueError):
+            continue
+        if price > 0:
+            aggregator.add_tick(pair, price, ts=ts)
+            added += 1
+    aggregator.close_due(ts)
+    return added
+
+
+# Global aggregator instance
+_aggregator = None
+_aggregator_lock = threading.Lock()
+
+
+def get_candle_aggregator() -> CandleAggregator:
+    """Get the process-wide aggregator (initialize if needed)."""
+    global _aggregator
+    if _aggregator is None:
+        with _aggregator_lock:
+            if _aggregator is None:
+                _aggregator = CandleAggregator()
+    return _aggregator
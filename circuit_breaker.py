@@ -0,0 +1,214 @@
+"""
+Retry and circuit-breaker helpers for Luno API calls.
+
+- `is_retryable` separates transient failures (network errors, 429, 5xx) from
+  terminal ones (insufficient funds, bad volume, auth errors) that must not be retried.
+- `call_with_retry` retries transient failures with decorrelated jitter and an
+  optional total time budget so a caller never blocks for long.
+- Each endpoint has a `CircuitBreaker` shared by every thread in the process: after
+  repeated transient failures it opens and calls fail fast with `CircuitOpenError`
+  until a cool-down passes and a single trial call succeeds.
+"""
+import logging
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+import requests
+
+from luno_client import LunoAPIError
+from rate_limiter import RateLimitTimeout
+
+LOGGER = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised without calling the API while an endpoint's breaker is open."""
+
+
+def _status_retryable(status: Optional[int]) -> bool:
+    return status == 429 or (status is not None and status >= 500)
+
+
+def is_retryable(exc: BaseException, idempotent: bool = True) -> bool:
+    """Return True if `exc` is a transient failure worth retrying.
+
+    Args:
+        exc: the exception raised by the call
+        idempotent: False for calls like /postorder where a read timeout may mean the
+            request was already applied; those are then not retried.
+    """
+    # A rate-limit timeout means the caller's wait budget is spent; retrying can't help
+    if isinstance(exc, (CircuitOpenError, RateLimitTimeout)):
+        return False
+    if isinstance(exc, LunoAPIError):
+        if exc.status_code is not None:
+            return _status_retryable(exc.status_code)
+        cause = exc.__cause__
+        return cause is not None and is_retryable(cause, idempotent)
+    if isinstance(exc, requests.exceptions.HTTPError):
+        return _status_retryable(getattr(exc.response, 'status_code', None))
+    if isinstance(exc, requests.exceptions.ReadTimeout):
+        return idempotent
+    if isinstance(exc, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)):
+        return True
+    return False
+
+
+def _answered_by_api(exc: BaseException) -> bool:
+    if isinstance(exc, LunoAPIError):
+        return exc.status_code is not None
+    return isinstance(exc, requests.exceptions.HTTPError)
+
+
+def _is_network_error(exc: BaseException) -> bool:
+    if isinstance(exc, LunoAPIError):
+        return exc.status_code is None and _is_network_error(exc.__cause__)
+    return isinstance(exc, requests.exceptions.RequestException) and not isinstance(exc, requests.exceptions.HTTPError)
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker for one endpoint."""
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            name: endpoint name used in logs and errors
+            failure_threshold: consecutive transient failures that open the breaker
+            reset_timeout: seconds to stay open before allowing one trial call
+            clock: monotonic time source (injectable for tests)
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """Raise CircuitOpenError if the call must not be attempted now."""
+        with self._lock:
+            if self.state == CLOSED:
+                return
+            if self.state == OPEN and self.clock() - self.opened_at >= self.reset_timeout:
+                self.state = HALF_OPEN
+                self._trial_in_flight = False
+            if self.state == HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return
+            retry_in = max(self.reset_timeout - (self.clock() - self.opened_at), 0)
+            raise CircuitOpenError(f"Circuit for '{self.name}' is open; retry in {retry_in:.0f}s")
+
+    def record_success(self):
+        with self._lock:
+            if self.state != CLOSED:
+                LOGGER.info(f"Circuit for '{self.name}' closed")
+            self.state = CLOSED
+            self.failures = 0
+            self._trial_in_flight = False
+
+    def release_trial(self):
+        """Let another half-open trial through after a call that proved nothing either way."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    LOGGER.warning(f"Circuit for '{self.name}' opened after {self.failures} failures")
+                self.state = OPEN
+                self.opened_at = self.clock()
+                self._trial_in_flight = False
+
+    def status(self) -> Dict:
+        with self._lock:
+            return {'state': self.state, 'failures': self.failures}
+
+
+# Global breaker registry, one per endpoint
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    """Get the process-wide breaker for `name` (created on first use)."""
+    with _breakers_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker(name)
+        return _breakers[name]
+
+
+def breaker_status() -> Dict[str, Dict]:
+    """State of every breaker created so far."""
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {b.name: b.status() for b in breakers}
+
+
+def decorrelated_jitter(previous: float, base: float, cap: float) -> float:
+    """Next backoff delay: uniform between `base` and 3x the previous delay, capped."""
+    return min(cap, random.uniform(base, max(base, previous * 3)))
+
+
+def call_with_retry(fn: Callable[..., Any], *args, endpoint: str = None, retries: int = 3,
+                    base_delay: float = 0.25, max_delay: float = 5.0, max_elapsed: float = None,
+                    idempotent: bool = True, pass_timeout: bool = False, **kwargs) -> Any:
+    """Call fn through the endpoint's circuit breaker, retrying only transient failures.
+
+    Args:
+        fn: callable to invoke with *args/**kwargs
+        endpoint: breaker name (defaults to fn.__name__)
+        retries: maximum attempts
+        base_delay / max_delay: bounds for the decorrelated-jitter backoff
+        max_elapsed: total seconds the call may take including sleeps; no retry is
+            started if its backoff would exceed the budget
+        idempotent: see `is_retryable`
+        pass_timeout: with `max_elapsed`, also pass fn `timeout=` the seconds left in the
+            budget, so a single slow attempt - rate-limit wait included - can't outlast
+            it (fn must accept `timeout`)
+
+    Terminal errors and CircuitOpenError are raised immediately.
+    """
+    breaker = get_breaker(endpoint or getattr(fn, '__name__', 'call'))
+    start = time.monotonic()
+    delay = base_delay
+    for attempt in range(1, retries + 1):
+        breaker.allow()
+        if pass_timeout and max_elapsed is not None:
+            kwargs['timeout'] = max(max_elapsed - (time.monotonic() - start), 0.1)
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            retryable = is_retryable(e, idempotent)
+            if retryable or _is_network_error(e):
+                breaker.record_failure()
+            elif _answered_by_api(e):
+                # A business rejection (e.g. insufficient funds) says nothing about API health
+                breaker.record_success()
+            else:
+                breaker.release_trial()
+            if not retryable:
+                raise
+            if attempt == retries:
+                LOGGER.error("All %s attempts to %s failed.", retries, breaker.name)
+                raise
+            delay = decorrelated_jitter(delay, base_delay, max_delay)
+            if max_elapsed is not None and time.monotonic() - start + delay > max_elapsed:
+                LOGGER.warning("%s failed (%s); retry budget of %.1fs exhausted", breaker.name, e, max_elapsed)
+                raise
+            LOGGER.warning("Attempt %s to %s failed: %s. Retrying in %.2fs...", attempt, breaker.name, e, delay)
+            time.sleep(delay)
+        else:
+            breaker.record_success()
+            return result
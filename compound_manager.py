@@ -1,53 +1,201 @@
 """
 Auto Compound Profit Mode: reinvest profits and track savings separately.
 After each winning trade, split profit into reinvestment and savings.
+
+Persistence is an append-only journal plus a periodic snapshot:
+
+- compound_state.jsonl: one JSON line per event ({"type": "split", ...},
+  {"type": "reset", ...} or {"type": "mark", ...}); recording a split appends one line, so it costs the same
+  at the 100,000th transaction as at the first.
+- compound_state.json: running totals and the journal offset they cover, rewritten
+  every COMPOUND_SNAPSHOT_EVERY events. Startup loads the snapshot and replays only the
+  journal lines after it.
+
+When the journal grows past COMPOUND_COMPACT_BYTES it is compacted: the current file is
+moved aside as compound_state.jsonl.<unix time> (full history is kept there), and a new
+journal starts with the most recent transactions so `get_recent_transactions` keeps
+working from the tail of the live file. A compound_state.json from before the journal
+(with a `transactions` list) is migrated on first load.
+
+Splits of realized sells from the lot ledger carry the journal row id
+(trade_id "journal:<id>"), and the highest one is kept as `realized_through`, so
+replaying the ledger after a restart splits only the sells not split yet.
+
+Configuration (.env):
+- COMPOUND_SNAPSHOT_EVERY (default 500)
+- COMPOUND_COMPACT_BYTES (default 5000000)
 """
 import json
 import os
+import threading
+import time
 import logging
-from typing import Dict
+from typing import Dict, List
 from datetime import datetime
 
 LOGGER = logging.getLogger(__name__)
 
+
+def _journal_id(trade_id):
+    """Trade journal row id from a "journal:<id>" trade id, else None."""
+    if isinstance(trade_id, str) and trade_id.startswith('journal:'):
+        try:
+            return int(trade_id[len('journal:'):])
+        except ValueError:
+            return None
+    return None
+
+
 class CompoundManager:
     """Manage profit reinvestment and savings tracking."""
-    
+
     STATE_FILE = 'compound_state.json'
-    
-    def __init__(self):
+    SNAPSHOT_EVERY = int(os.getenv('COMPOUND_SNAPSHOT_EVERY', '500'))
+    COMPACT_BYTES = int(os.getenv('COMPOUND_COMPACT_BYTES', '5000000'))
+    # Transactions carried into a fresh journal after compaction (tail reads)
+    KEEP_RECENT = 200
+
+    def __init__(self, state_file: str = None, journal_file: str = None):
+        self.state_file = state_file or self.STATE_FILE
+        self.journal_file = journal_file or os.path.splitext(self.state_file)[0] + '.jsonl'
+        self._lock = threading.RLock()
+        self._since_snapshot = 0
         self.state = self._load_state()
-    
-    def _load_state(self) -> Dict:
-        """Load compound tracking state."""
-        if os.path.exists(self.STATE_FILE):
-            try:
-                with open(self.STATE_FILE, 'r') as f:
-                    return json.load(f)
-            except Exception as e:
-                LOGGER.warning(f"Failed to load compound state: {e}")
-        
+
+    @staticmethod
+    def _empty_state() -> Dict:
         return {
             'total_profit': 0.0,
             'total_reinvested': 0.0,
             'total_savings': 0.0,
-            'transactions': [],
+            'transaction_count': 0,
             'last_update': None,
+            'journal_offset': 0,
+            'realized_through': None,
         }
-    
+
+    def _load_state(self) -> Dict:
+        """Load the snapshot and replay journal events written after it."""
+        state = self._empty_state()
+        if os.path.exists(self.state_file):
+            try:
+                with open(self.state_file, 'r') as f:
+                    state.update(json.load(f))
+            except Exception as e:
+                LOGGER.warning(f"Failed to load compound state: {e}")
+
+        legacy = state.pop('transactions', None)
+        if legacy is not None:
+            self.state = state
+            self._migrate(legacy)
+            return self.state
+
+        offset = state['journal_offset']
+        try:
+            size = os.path.getsize(self.journal_file)
+        except OSError:
+            size = 0
+        if size < offset:
+            LOGGER.warning(f"{self.journal_file} is shorter than the snapshot expects; using the snapshot totals")
+            offset = state['journal_offset'] = size
+        if size > offset:
+            with open(self.journal_file, 'rb') as f:
+                f.seek(offset)
+                for line in f:
+                    if not line.endswith(b'\n'):
+                        # Torn write from a crash: drop it so the next append starts a clean line
+                        LOGGER.warning(f"Discarding incomplete line at the end of {self.journal_file}")
+                        break
+                    offset += len(line)
+                    try:
+                        self._apply(state, json.loads(line))
+                    except ValueError:
+                        LOGGER.warning(f"Skipping unreadable line in {self.journal_file}")
+                    self._since_snapshot += 1
+            if offset < size:
+                with open(self.journal_file, 'r+b') as f:
+                    f.truncate(offset)
+        return state
+
+    def _migrate(self, transactions: List[Dict]):
+        """Move a pre-journal `transactions` list into the journal (totals are kept as they are)."""
+        with open(self.journal_file, 'a') as f:
+            for tx in transactions:
+                f.write(json.dumps(dict(tx, type='split')) + '\n')
+        self.state['transaction_count'] = len(transactions)
+        self.state['journal_offset'] = os.path.getsize(self.journal_file)
+        self._save_state()
+        LOGGER.info(f"Migrated {len(transactions)} compound transactions to {self.journal_file}")
+
+    @staticmethod
+    def _apply(state: Dict, event: Dict):
+        """Fold one journal event into the running totals."""
+        kind = event.get('type')
+        if kind == 'mark':
+            state['realized_through'] = max(state.get('realized_through') or 0, event['journal_id'])
+            return
+        if kind == 'reset':
+            state['total_reinvested'] = 0.0
+        else:
+            state['total_profit'] += event['profit_ngn']
+            state['total_reinvested'] += event['reinvest_ngn']
+            state['total_savings'] += event['savings_ngn']
+            state['transaction_count'] += 1
+            journal_id = _journal_id(event.get('trade_id'))
+            if journal_id is not None:
+                state['realized_through'] = max(state.get('realized_through') or 0, journal_id)
+        state['last_update'] = event.get('timestamp')
+
+    def _append(self, event: Dict):
+        """Append one event to the journal, then snapshot/compact when due."""
+        with open(self.journal_file, 'a') as f:
+            f.write(json.dumps(event) + '\n')
+        self._apply(self.state, event)
+        self._since_snapshot += 1
+        if self._since_snapshot >= self.SNAPSHOT_EVERY:
+            if os.path.getsize(self.journal_file) >= self.COMPACT_BYTES:
+                self.compact()
+            else:
+                self._save_state()
+
     def _save_state(self):
-        """Save compound tracking state."""
+        """Snapshot the running totals and the journal offset they cover."""
         try:
-            with open(self.STATE_FILE, 'w') as f:
+            self.state['journal_offset'] = os.path.getsize(self.journal_file) if os.path.exists(self.journal_file) else 0
+            tmp = f"{self.state_file}.{os.getpid()}.tmp"
+            with open(tmp, 'w') as f:
                 json.dump(self.state, f, indent=2)
-            LOGGER.info("Compound state saved")
+            os.replace(tmp, self.state_file)
+            self._since_snapshot = 0
+            LOGGER.debug("Compound state saved")
         except Exception as e:
             LOGGER.error(f"Failed to save compound state: {e}")
-    
+
+    def compact(self):
+        """Archive the journal and start a new one seeded with the most recent transactions."""
+        with self._lock:
+            # Snapshot first: if we crash mid-swap, the journal is missing or shorter than
+            # the snapshot's offset and loading falls back to these (complete) totals
+            self._save_state()
+            recent = self.get_recent_transactions(self.KEEP_RECENT)
+            stamp = int(time.time())
+            while os.path.exists(f"{self.journal_file}.{stamp}"):
+                stamp += 1
+            archive = f"{self.journal_file}.{stamp}"
+            tmp = f"{self.journal_file}.{os.getpid()}.tmp"
+            with open(tmp, 'w') as f:
+                for tx in recent:
+                    f.write(json.dumps(dict(tx, type='split')) + '\n')
+            os.replace(self.journal_file, archive)
+            os.replace(tmp, self.journal_file)
+            # The seeded lines are already in the totals: the snapshot starts after them
+            self._save_state()
+            LOGGER.info(f"Compacted compound journal (history archived to {archive})")
+
     def record_profit_split(self, profit_ngn: float, reinvest_pct: float = 60.0, trade_id: str = None):
         """
         Record a profit and split it into reinvestment and savings.
-        
+
         Args:
             profit_ngn: profit amount in NGN
             reinvest_pct: percentage to reinvest (0-100)
@@ -56,11 +204,11 @@ class CompoundManager:
         if profit_ngn <= 0:
             LOGGER.warning(f"Skipping non-positive profit: {profit_ngn}")
             return None
-        
+
         reinvest_pct = max(0, min(100, reinvest_pct))
         reinvest_amt = profit_ngn * (reinvest_pct / 100.0)
         savings_amt = profit_ngn - reinvest_amt
-        
+
         transaction = {
             'timestamp': datetime.now().isoformat(),
             'profit_ngn': round(profit_ngn, 2),
@@ -69,52 +217,99 @@ class CompoundManager:
             'reinvest_pct': reinvest_pct,
             'trade_id': trade_id or '',
         }
-        
-        self.state['total_profit'] += profit_ngn
-        self.state['total_reinvested'] += reinvest_amt
-        self.state['total_savings'] += savings_amt
-        self.state['last_update'] = datetime.now().isoformat()
-        self.state['transactions'].append(transaction)
-        
-        self._save_state()
-        
+
+        with self._lock:
+            self._append(dict(transaction, type='split'))
+
         LOGGER.info(f"Profit split: {profit_ngn:.2f} NGN → Reinvest: {reinvest_amt:.2f}, Savings: {savings_amt:.2f}")
         return transaction
-    
+
+    def record_realized(self, realization: Dict, reinvest_pct: float = 60.0):
+        """
+        Split a realized sell from the lot ledger (lot_ledger.py). Losing or
+        unmatched sells have no profit to split and are ignored, and so are sells
+        at or before `realized_through` (already split before a restart).
+        """
+        if realization['pnl'] <= 0:
+            return None
+        journal_id = realization.get('trade_id')
+        with self._lock:
+            if journal_id is not None and journal_id <= (self.state['realized_through'] or 0):
+                LOGGER.debug(f"Journal trade {journal_id} was already split")
+                return None
+            trade_id = f"journal:{journal_id}" if journal_id is not None else None
+            return self.record_profit_split(realization['pnl'], reinvest_pct, trade_id)
+
+    @property
+    def realized_through(self):
+        """Highest trade journal id handled by `record_realized` (None before the first mark)."""
+        return self.state['realized_through']
+
+    def mark_realized_through(self, journal_id: int):
+        """Treat journal sells up to `journal_id` as handled (e.g. history from before compounding)."""
+        with self._lock:
+            if self.state['realized_through'] is None or journal_id > self.state['realized_through']:
+                self._append({'type': 'mark', 'journal_id': journal_id, 'timestamp': datetime.now().isoformat()})
+
     def get_total_reinvestable(self) -> float:
         """Get total amount available for reinvestment."""
         return self.state['total_reinvested']
-    
+
     def get_total_savings(self) -> float:
         """Get total savings accumulated."""
         return self.state['total_savings']
-    
+
     def get_stats(self) -> Dict:
         """Get compound profit statistics."""
         total_profit = self.state['total_profit']
         total_reinvested = self.state['total_reinvested']
         total_savings = self.state['total_savings']
-        
+
         return {
             'total_profit_ngn': round(total_profit, 2),
             'total_reinvested_ngn': round(total_reinvested, 2),
             'total_savings_ngn': round(total_savings, 2),
             'reinvest_ratio_pct': round((total_reinvested / total_profit * 100) if total_profit > 0 else 0, 2),
-            'transaction_count': len(self.state['transactions']),
+            'transaction_count': self.state['transaction_count'],
             'last_update': self.state['last_update'],
         }
-    
+
     def get_recent_transactions(self, limit: int = 10) -> list:
-        """Get recent profit transactions."""
-        return self.state['transactions'][-limit:]
-    
+        """Get recent profit transactions (oldest first), read backwards from the journal's tail."""
+        if limit <= 0 or not os.path.exists(self.journal_file):
+            return []
+        found = []
+        with open(self.journal_file, 'rb') as f:
+            pos = f.seek(0, os.SEEK_END)
+            tail = b''
+            while pos > 0 and len(found) < limit:
+                step = min(8192, pos)
+                pos -= step
+                f.seek(pos)
+                lines = (f.read(step) + tail).split(b'\n')
+                # The first piece may be a partial line: keep it for the next block
+                tail = lines.pop(0) if pos > 0 else b''
+                for line in reversed(lines):
+                    if line and len(found) < limit:
+                        self._collect(found, line)
+        return list(reversed(found))
+
+    @staticmethod
+    def _collect(found: list, line: bytes):
+        try:
+            event = json.loads(line)
+        except ValueError:
+            return
+        if event.pop('type', 'split') == 'split':
+            found.append(event)
+
     def reset_reinvestment_balance(self):
         """
         Reset reinvestment balance after reinvesting (call after using reinvested funds).
         Keeps savings intact.
         """
-        old_reinvested = self.state['total_reinvested']
-        self.state['total_reinvested'] = 0.0
-        self.state['last_update'] = datetime.now().isoformat()
-        self._save_state()
+        with self._lock:
+            old_reinvested = self.state['total_reinvested']
+            self._append({'type': 'reset', 'timestamp': datetime.now().isoformat(),
+                          'previous_reinvested_ngn': round(old_reinvested, 2)})
         LOGGER.info(f"Reinvestment balance reset (was {old_reinvested:.2f} NGN)")
@@ -9,14 +9,25 @@ import json
 import os
 import sys
 from datetime import datetime
-from flask import Flask, render_template, jsonify, request, session, redirect, url_for, flash
+from flask import Flask, Response, render_template, jsonify, request, session, redirect, url_for, flash
 from smart_strategy import SmartStrategy
 from profit_tracker import ProfitTracker
 from notification_manager import NotificationManager
 from dotenv import dotenv_values, load_dotenv
-from luno_client import LunoClient
+from luno_client import LunoClient, get_shared_session
+from ticker_cache import get_cached_ticker, get_ticker_cache
+from trend_analyzer import get_trend_analyzer
+from candles import TIMEFRAMES
+from candle_store import LIVE_DIR, get_candle_store, to_candles
+from event_stream import get_event_hub
+from log_tail import get_log_tail
+from state_store import StateReader, get_state_store
+from trade_journal import get_trade_journal, parse_timestamp
+from rate_limiter import get_rate_limiter
+from circuit_breaker import breaker_status
 import subprocess
 import psutil
+import requests
 import signal
 import threading
 import time
@@ -68,9 +79,9 @@ def get_request_credentials(require_user_keys=True):
 app = Flask(__name__, template_folder="templates")
 app.secret_key = os.getenv('FLASK_SECRET_KEY', 'dev-dashboard-secret')
 STATE_FILE = "bot_state.json"
-TRADES_FILE = "trade_log.csv"
 STATS_FILE = "profit_stats.json"
 AUTO_SELL_STATE_FILE = "auto_sell_state.json"  # Track if monitor is running
+_state_reader = StateReader(STATE_FILE)
 LOG_FILE = os.getenv('BOT_LOG_FILE', 'bot.log')
 
 # Minimum order sizes by pair (base asset volume). These are conservative defaults
@@ -239,13 +250,13 @@ def api_logs_debug():
 
 
 def read_state():
-    """Read shared bot state and monitoring info."""
-    if os.path.exists(STATE_FILE):
-        try:
-            with open(STATE_FILE, "r") as f:
-                return json.load(f)
-        except:
-            pass
+    """Read shared bot state and monitoring info (flat view of every section).
+
+    Served from memory until bot_state.json changes (see state_store.StateReader).
+    """
+    state = _state_reader.read()
+    if state is not None:
+        return state
     # Add monitoring fields for dashboard even if missing
     return {
         "last_price": 0,
@@ -264,58 +275,42 @@ def read_state():
     }
 
 
-def read_trades():
-    """Parse CSV trade log."""
-    import csv
+def _trade_row(t):
+    """A journal row in the shape /api/trades returns."""
+    return {
+        "id": t["id"],
+        "timestamp": t["ts"],
+        "pair": t["pair"],
+        "action": t["action"] or t["side"].upper(),
+        "side": t["side"],
+        "price": t["price"],
+        "volume": t["volume"],
+        "order_id": t["order_id"],
+        "details": t["details"] or "",
+    }
+
+
+def read_trades(limit: int = 50, pair: str = None):
+    """Newest trades first, from the trade journal (indexed query, no file scan)."""
     trades = []
-    if os.path.exists(TRADES_FILE):
-        try:
-            with open(TRADES_FILE, "r") as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    if row and row.get('timestamp'):
-                        trades.append({
-                            "timestamp": row.get("timestamp", ""),
-                            "pair": row.get("pair", ""),
-                            "action": row.get("action", ""),
-                            "price": row.get("price", "0"),
-                            "volume": row.get("volume", "0"),
-                            "details": row.get("details", ""),
-                        })
-        except Exception as e:
-            print(f"Error reading trades: {e}")
-    return trades[::-1]  # Reverse to show newest first
+    try:
+        for t in get_trade_journal().recent(limit, pair=pair):
+            trades.append(_trade_row(t))
+    except Exception as e:
+        print(f"Error reading trades: {e}")
+    return trades
 
 
 def append_trade_log_row(timestamp, pair, action, price, volume, details=None):
-    """Append a trade row to the CSV trade log."""
-    header = ['timestamp', 'pair', 'action', 'price', 'volume', 'details']
-    exists = os.path.exists(TRADES_FILE)
-    line = f"{timestamp},{pair},{action},{price},{volume},{json.dumps(details or {})}\n"
-    # Ensure file exists and has header
-    if not exists:
-        with open(TRADES_FILE, 'w', encoding='utf-8') as f:
-            f.write(','.join(header) + '\n')
-    with open(TRADES_FILE, 'a', encoding='utf-8') as f:
-        f.write(line)
-
-
-def write_state(state: dict):
-    try:
-        with open(STATE_FILE, 'w', encoding='utf-8') as f:
-            json.dump(state, f, indent=2)
-    except Exception:
-        pass
+    """Record a dashboard-placed trade in the trade journal."""
+    get_trade_journal().record(pair, action, float(price), float(volume), ts=timestamp, action=action,
+                               source='dashboard', details=details or {})
 
 
 def update_tradingview_state(info: dict):
-    """Merge tradingview info into the persistent state file."""
+    """Merge tradingview info into the `tradingview` section of the state file."""
     try:
-        st = read_state()
-        st_tv = st.get('tradingview', {})
-        st_tv.update(info)
-        st['tradingview'] = st_tv
-        write_state(st)
+        get_state_store(STATE_FILE).update('tradingview', info, merge=True)
     except Exception:
         pass
 
@@ -481,6 +476,49 @@ def logout():
     return redirect(url_for('index'))
 
 
+def _status_payload(state):
+    """Full /api/status view of the state (owner/global or users with keys)."""
+    return {
+        "status": "running",
+        "pair": state.get("pair", "XBTUSDC"),
+        "last_price": state.get("last_price", 0),
+        "dry_run": state.get("dry_run", False),
+        "last_update": state.get("last_update"),
+        "balance": state.get("balance", {}),
+        # Monitoring info
+        "bid": state.get("bid", 0),
+        "buy_price": state.get("buy_price", 0),
+        "spent_ngn": state.get("spent_ngn", 0),
+        "current_value_ngn": state.get("current_value_ngn", 0),
+        "profit_ngn": state.get("profit_ngn", 0),
+        "profit_pct": state.get("profit_pct", 0),
+        "auto_sell_target_pct": state.get("auto_sell_target_pct", 0),
+        "active_coin": strategy.get_active_coin(),
+    }
+
+
+def _limited_status(state):
+    """/api/status for a logged-in user without Luno keys: no owner bot data."""
+    return {
+        "status": "limited",
+        "message": "enter your luno account api & secret in Credentials to have full access",
+        "needs_keys": True,
+        "pair": state.get("pair", "--"),
+        "last_price": None,
+        "dry_run": state.get("dry_run", False),
+        "last_update": None,
+        "balance": {},
+        "bid": None,
+        "buy_price": None,
+        "spent_ngn": None,
+        "current_value_ngn": None,
+        "profit_ngn": None,
+        "profit_pct": None,
+        "auto_sell_target_pct": state.get("auto_sell_target_pct", 0),
+        "active_coin": strategy.get_active_coin(),
+    }
+
+
 @app.route("/api/status")
 def api_status():
     """Get bot status, latest price, and monitoring info."""
@@ -491,47 +529,89 @@ def api_status():
 
         # If a user is logged in but hasn't added keys, don't expose the global owner bot state.
         if user and (not api_key or not api_secret):
-            return jsonify({
-                "status": "limited",
-                "message": "enter your luno account api & secret in Credentials to have full access",
-                "needs_keys": True,
-                "pair": state.get("pair", "--"),
-                "last_price": None,
-                "dry_run": state.get("dry_run", False),
-                "last_update": None,
-                "balance": {},
-                "bid": None,
-                "buy_price": None,
-                "spent_ngn": None,
-                "current_value_ngn": None,
-                "profit_ngn": None,
-                "profit_pct": None,
-                "auto_sell_target_pct": state.get("auto_sell_target_pct", 0),
-                "active_coin": strategy.get_active_coin(),
-            })
+            return jsonify(_limited_status(state))
 
         # Otherwise return the full state (owner/global or users with keys)
-        return jsonify({
-            "status": "running",
-            "pair": state.get("pair", "XBTUSDC"),
-            "last_price": state.get("last_price", 0),
-            "dry_run": state.get("dry_run", False),
-            "last_update": state.get("last_update"),
-            "balance": state.get("balance", {}),
-            # Monitoring info
-            "bid": state.get("bid", 0),
-            "buy_price": state.get("buy_price", 0),
-            "spent_ngn": state.get("spent_ngn", 0),
-            "current_value_ngn": state.get("current_value_ngn", 0),
-            "profit_ngn": state.get("profit_ngn", 0),
-            "profit_pct": state.get("profit_pct", 0),
-            "auto_sell_target_pct": state.get("auto_sell_target_pct", 0),
-            "active_coin": strategy.get_active_coin(),
-        })
+        return jsonify(_status_payload(state))
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
+_dashboard_hub = None
+_dashboard_hub_lock = threading.Lock()
+
+
+def get_dashboard_hub():
+    """The event hub with the dashboard's sources attached (one producer for all browsers)."""
+    global _dashboard_hub
+    with _dashboard_hub_lock:
+        if _dashboard_hub is not None:
+            return _dashboard_hub
+        hub = get_event_hub()
+        log_tail = get_log_tail(LOG_FILE)
+        seen = {'state': None, 'price': None, 'trade_id': get_trade_journal().max_id(),
+                'log': log_tail.tail(0)['cursor']}
+
+        def state_changes(publish):
+            state = _state_reader.read()   # one os.stat while unchanged
+            if state is None:
+                return
+            key = (state.get('_version'), state.get('last_update'))
+            if key == seen['state']:
+                return
+            seen['state'] = key
+            publish('status', _status_payload(state))
+            price = (state.get('pair'), state.get('last_price'), state.get('last_update'))
+            if state.get('last_price') and price != seen['price']:
+                seen['price'] = price
+                publish('price', {'pair': price[0], 'price': price[1], 'timestamp': price[2]})
+
+        def new_trades(publish):
+            added = False
+            for t in get_trade_journal().iter_trades(after_id=seen['trade_id']):
+                seen['trade_id'] = t['id']
+                publish('trade', _trade_row(t))
+                added = True
+            if added:
+                # Computed once here instead of every browser refetching /api/strategy
+                publish('stats', tracker.get_stats())
+
+        def new_log_lines(publish):
+            new = log_tail.since(seen['log'])
+            seen['log'] = new['cursor']
+            if new['logs']:
+                publish('log', {'lines': new['logs'], 'cursor': new['cursor']})
+
+        for source in (state_changes, new_trades, new_log_lines):
+            hub.add_source(source)
+        _dashboard_hub = hub
+        return hub
+
+
+def _limited_event(event):
+    """Per-client filter for users without keys: the same view /api/status gives them."""
+    if event['type'] == 'status':
+        return dict(event, data=_limited_status(read_state()))
+    if event['type'] == 'price':
+        return None
+    return event
+
+
+@app.route('/api/stream')
+def api_stream():
+    """Server-Sent Events: status, price, trade and log deltas as they happen.
+    Events: status (same body as /api/status), price {pair, price, timestamp},
+    trade (a /api/trades row), stats (the /api/strategy `stats` after new trades),
+    log {lines: [...]}, resync (refetch over REST).
+    Reconnects resume from Last-Event-ID (or ?last_id=).
+    """
+    api_key, api_secret, user = get_request_credentials(require_user_keys=False)
+    limited = bool(user and (not api_key or not api_secret))
+    hub = get_dashboard_hub()
+    sub = hub.subscribe(request.headers.get('Last-Event-ID') or request.args.get('last_id'))
+    return Response(hub.stream(sub, _limited_event if limited else None), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
 
 @app.route("/api/strategy")
 def api_strategy():
@@ -539,24 +619,37 @@ def api_strategy():
     active_coin = strategy.get_active_coin()
     coin_cfg = strategy.get_coin_config(active_coin)
     
-    # Compute profit stats
-    tracker.save_stats(STATS_FILE)
-    stats = {}
-    if os.path.exists(STATS_FILE):
-        try:
-            with open(STATS_FILE, 'r') as f:
-                stats = json.load(f)
-        except:
-            pass
-    
+    # Profit stats fold in only trades added since the last request; the file is
+    # rewritten only when something changed
+    stats = tracker.save_stats(STATS_FILE)
+
     return jsonify({
         'active_coin': active_coin,
         'supported_coins': strategy.list_coins(),
         'config': coin_cfg,
         'stats': stats,
+        'trend_signals': trend_signals(),
     })
 
 
+def trend_signals():
+    """{coin: trend analysis} for the supported coins.
+
+    The bot publishes analyses built from closed candles (the `trends` state section);
+    without it, this worker's analyzer is fed from the shared ticker snapshot.
+    """
+    published = read_state().get('trends')
+    if published:
+        return published
+    coins = strategy.list_coins()
+    try:
+        analyses = get_trend_analyzer().observe(get_ticker_cache().get_all(), coins)
+    except Exception as e:
+        print(f"Trend signals unavailable: {e}")
+        return {}
+    return {a['coin']: a for a in analyses}
+
+
 @app.route("/api/strategy/coin", methods=['POST'])
 def api_set_coin():
     """Switch active trading coin."""
@@ -603,6 +696,25 @@ def api_prices():
     return jsonify({"prices": prices[-100:]})
 
 
+@app.route('/api/candles')
+def api_candles():
+    """Closed candles the bot aggregated from live prices (the live candle store).
+    Query params: pair (default XBTNGN), tf (1m/5m/15m/1h, default 1m), limit (default 100)
+    Returns: { success: True, pair, tf, candles: [{timestamp, open, high, low, close, volume}, ...] }
+    Read from disk, so every worker returns the same candles.
+    """
+    pair = request.args.get('pair', 'XBTNGN')
+    tf = request.args.get('tf', '1m')
+    if tf not in TIMEFRAMES:
+        return jsonify({'success': False, 'error': f"tf must be one of {list(TIMEFRAMES)}"}), 400
+    try:
+        limit = max(1, min(int(request.args.get('limit', 100)), 500))
+    except ValueError:
+        return jsonify({'success': False, 'error': 'limit must be an integer'}), 400
+    candles = to_candles(get_candle_store(LIVE_DIR).read(pair, TIMEFRAMES[tf])[-limit:])
+    return jsonify({'success': True, 'pair': pair, 'tf': tf, 'candles': candles})
+
+
 @app.route('/api/ticker')
 def api_ticker():
     """Fetch current ticker for an arbitrary pair (public Luno API).
@@ -615,7 +727,7 @@ def api_ticker():
         load_dotenv()
         cfg = dotenv_values('.env')
         client = LunoClient(cfg.get('LUNO_API_KEY'), cfg.get('LUNO_API_SECRET'))
-        ticker = client.get_ticker(pair)
+        ticker = get_cached_ticker(pair, client)
         # Determine a sensible price (ask preferred, then last, then bid)
         price_val = float(ticker.get('ask') or ticker.get('last') or ticker.get('bid') or 0)
         return jsonify({'success': True, 'pair': pair, 'price': price_val, **ticker})
@@ -625,38 +737,87 @@ def api_ticker():
 
 @app.route("/api/trades")
 def api_trades():
-    """Get recent trades."""
-    trades = read_trades()
-    return jsonify({"success": True, "trades": trades[:50]})  # Last 50 trades
+    """Trades from the journal, newest first, one page at a time.
+    Query params:
+      limit (default 50, max 500)
+      before / after: cursor from a previous response (or a trade id) - older / newer page
+      pair, action (buy / sell, or an exact label like buy_ema), since / until (epoch or ISO time)
+      aggregate: pair / side / action / day - grouped totals over the filtered range instead of rows
+    Returns: { success, trades, has_more, cursors: {before, after} } (or { success, aggregate, groups })
+    """
+    journal = get_trade_journal()
+    args = request.args
+    try:
+        limit = max(1, min(int(args.get('limit', 50)), 500))
+        action = (args.get('action') or '').strip()
+        side = action.lower() if action.lower() in ('buy', 'sell') else None
+        filters = {
+            'pair': (args.get('pair') or '').strip().upper() or None,
+            'side': side,
+            'action': action if action and side is None else None,
+            'since': parse_timestamp(args.get('since')),
+            'until': parse_timestamp(args.get('until')),
+        }
+        for key in ('since', 'until'):
+            if args.get(key) and filters[key] is None:
+                raise ValueError(f"{key} must be an epoch or ISO timestamp")
+        if args.get('aggregate'):
+            return jsonify({'success': True, 'aggregate': args['aggregate'],
+                            'groups': journal.aggregate(args['aggregate'], **filters)})
+        before = journal.cursor_position(args['before']) if args.get('before') else None
+        after = journal.cursor_position(args['after']) if args.get('after') else None
+        if (args.get('before') and before is None) or (args.get('after') and after is None):
+            return jsonify({'success': False, 'error': 'unknown cursor'}), 400
+        rows = journal.page(limit + 1, before=before, after=after, **filters)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    # One extra row tells whether another page exists in the direction we paged
+    has_more = len(rows) > limit
+    if has_more:
+        rows = rows[1:] if after is not None and before is None else rows[:limit]
+    return jsonify({
+        'success': True,
+        'trades': [_trade_row(t) for t in rows],
+        'has_more': has_more,
+        'cursors': {
+            'before': journal.cursor_for(rows[-1]) if rows else None,
+            'after': journal.cursor_for(rows[0]) if rows else None,
+        },
+    })
 
 
 @app.route('/api/logs')
 def api_logs():
-    """Return the last N lines from the bot log file for the dashboard terminal view.
-    Query params: lines (int, default 200)
+    """Return bot log lines for the dashboard terminal view, from an in-memory tail.
+    Query params: lines (int, default 200), since (cursor from a previous response)
+    With `since`, only lines after the cursor are returned; `reset` is true when the
+    cursor was too old (or its file was rotated away) and the latest lines came back instead.
+    Cursors are file positions, so they work whichever dashboard worker answers.
     """
-    lines = int(request.args.get('lines') or 200)
-    log_file = os.getenv('BOT_LOG_FILE', 'bot.log')
-    output = []
-    if os.path.exists(log_file):
-        try:
-            # Read last N lines efficiently
-            with open(log_file, 'rb') as f:
-                f.seek(0, os.SEEK_END)
-                filesize = f.tell()
-                block_size = 1024
-                blocks = []
-                remaining = filesize
-                while remaining > 0 and len(b''.join(blocks).splitlines()) <= lines:
-                    read_size = min(block_size, remaining)
-                    f.seek(remaining - read_size)
-                    blocks.insert(0, f.read(read_size))
-                    remaining -= read_size
-                data = b''.join(blocks).splitlines()[-lines:]
-                output = [line.decode('utf-8', errors='replace') for line in data]
-        except Exception as e:
-            return jsonify({'success': False, 'error': str(e)}), 500
-    return jsonify({'success': True, 'lines': len(output), 'logs': output})
+    try:
+        lines = max(0, int(request.args.get('lines') or 200))
+        since = request.args.get('since')
+        log_tail = get_log_tail(os.getenv('BOT_LOG_FILE', 'bot.log'))
+        result = log_tail.since(since, limit=lines) if since not in (None, '') else log_tail.tail(lines)
+    except ValueError:
+        return jsonify({'success': False, 'error': 'lines must be an integer'}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+    return jsonify({'success': True, 'lines': len(result['logs']), 'logs': result['logs'],
+                    'cursor': result['cursor'], 'reset': result['reset']})
+
+
+@app.route('/api/metrics/ratelimit')
+def api_metrics_ratelimit():
+    """Return current token levels and wait counters of the Luno API rate limiter."""
+    return jsonify({'success': True, 'buckets': get_rate_limiter().metrics()})
+
+
+@app.route('/api/metrics/breakers')
+def api_metrics_breakers():
+    """Return the state of each per-endpoint circuit breaker."""
+    return jsonify({'success': True, 'breakers': breaker_status()})
 
 
 @app.route('/api/logs/status')
@@ -753,7 +914,7 @@ def api_trade_place():
 
         # If market order requested, use current ticker to set a reasonable price (best bid/ask)
         if order_type == 'market' or not price:
-            ticker = client.get_ticker(pair)
+            ticker = get_cached_ticker(pair, client, allow_stale=False)
             # For buy use ask, for sell use bid; fallback to last
             if side == 'buy':
                 price_val = float(ticker.get('ask') or ticker.get('last') or 0)
@@ -790,13 +951,12 @@ def api_trade_place():
         ts = datetime.now().timestamp()
         append_trade_log_row(ts, pair, side.upper(), price_val, volume, details={'order_resp': resp})
 
-        # Update state summary
-        state = read_state()
-        state.update({
+        # Update state summary (the dashboard's `manual` section)
+        state = {
             'pair': pair,
             'last_price': price_val,
             'last_update': datetime.now().isoformat(),
-        })
+        }
         # If this was a buy, update buy_price/volume; if sell, clear buy_price
         if side == 'buy':
             state['buy_price'] = price_val
@@ -805,7 +965,9 @@ def api_trade_place():
             state['buy_price'] = 0
             state['volume'] = 0
 
-        write_state(state)
+        store = get_state_store(STATE_FILE)
+        store.update('manual', state)
+        store.flush()
 
         # Notify channels about trade
         try:
@@ -956,7 +1118,6 @@ def api_autosell_sell_now():
             base_asset = pair[:3]  # fallback
 
         # Fetch current balance for the base asset
-        import requests
         try:
             with open('autosell_debug.log', 'a', encoding='utf-8') as dbg:
                 dbg.write('[AUTOSELL] fetching balance from Luno API\n')
@@ -964,7 +1125,8 @@ def api_autosell_sell_now():
             pass
 
         try:
-            resp = requests.get('https://api.luno.com/api/1/balance', auth=(api_key, api_secret), timeout=10)
+            get_rate_limiter().acquire_for('balance')
+            resp = get_shared_session().get('https://api.luno.com/api/1/balance', auth=(api_key, api_secret), timeout=10)
             resp.raise_for_status()
             balance_data = resp.json()
             balances = balance_data.get('balance', [])
@@ -995,7 +1157,7 @@ def api_autosell_sell_now():
             pass
 
         try:
-            ticker = client.get_ticker(pair)
+            ticker = get_cached_ticker(pair, client, allow_stale=False)
             bid = float(ticker.get('bid') or ticker.get('last') or 0)
             
             if bid <= 0:
@@ -1344,8 +1506,8 @@ def api_account_balances():
 
         # Fetch balances directly from Luno /balance endpoint
         try:
-            import requests
-            resp = requests.get('https://api.luno.com/api/1/balance', auth=(api_key, api_secret), timeout=10)
+            get_rate_limiter().acquire_for('balance')
+            resp = get_shared_session().get('https://api.luno.com/api/1/balance', auth=(api_key, api_secret), timeout=10)
             resp.raise_for_status()
             balance_data = resp.json()
             
@@ -1461,7 +1623,8 @@ def handle_buy_signal(pair: str, volume: float = None) -> dict:
         
         # Create Luno client and get current ticker for price
         client = LunoClient(api_key, api_secret, dry_run=False)
-        ticker = client.get_ticker(pair)
+        # Orders are priced from a snapshot no older than the cache TTL
+        ticker = get_cached_ticker(pair, client, allow_stale=False)
         last_price = float(ticker.get('last_trade', 0))
         
         if last_price <= 0:
@@ -1536,7 +1699,8 @@ def handle_sell_signal(pair: str, volume: float = None) -> dict:
         
         # Create Luno client and get current ticker for price
         client = LunoClient(api_key, api_secret, dry_run=False)
-        ticker = client.get_ticker(pair)
+        # Orders are priced from a snapshot no older than the cache TTL
+        ticker = get_cached_ticker(pair, client, allow_stale=False)
         last_price = float(ticker.get('last_trade', 0))
         
         if last_price <= 0:
@@ -1909,15 +2073,12 @@ def api_settings_quote_priority():
         if not isinstance(qp, list) or not all(isinstance(x, str) for x in qp):
             return jsonify({'success': False, 'error': 'quote_priority must be an array of strings'}), 400
 
-        # Save into state
-        st = read_state()
-        if not isinstance(st, dict):
-            st = {}
-        settings = st.get('settings', {})
-        settings['quote_priority'] = [s.upper() for s in qp]
-        st['settings'] = settings
-        write_state(st)
-        return jsonify({'success': True, 'quote_priority': settings['quote_priority']}), 200
+        # Save into the `settings` section of the state file
+        quote_priority = [s.upper() for s in qp]
+        store = get_state_store(STATE_FILE)
+        store.update('settings', {'quote_priority': quote_priority}, merge=True)
+        store.flush()
+        return jsonify({'success': True, 'quote_priority': quote_priority}), 200
 
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -0,0 +1,200 @@
+"""
+Server-Sent Events fan-out for the dashboard.
+
+One producer thread per process polls the cheap change signals (state file version,
+trade journal max id, the log tail in log_tail.py) and publishes deltas as events. Every connected
+browser gets its own bounded queue fed from that single producer, so the cost of
+watching the files no longer scales with the number of open dashboards.
+
+Events carry an increasing id and the last HISTORY events are kept in a ring, so a
+reconnecting EventSource (which sends Last-Event-ID) gets what it missed. A client that
+falls further behind than that - or whose queue overflows because it stopped reading -
+gets a `resync` event telling it to refetch over the REST endpoints.
+
+Usage:
+    hub = EventHub(interval=1.0)
+    hub.add_source(lambda publish: publish('price', {...}))   # called every `interval`
+    sub = hub.subscribe(last_event_id=request.headers.get('Last-Event-ID'))
+    return Response(hub.stream(sub), mimetype='text/event-stream')
+
+Configuration (.env):
+- STREAM_INTERVAL (seconds between producer polls, default 1)
+- STREAM_HEARTBEAT (seconds between keep-alive comments, default 15)
+"""
+import json
+import logging
+import os
+import queue
+import threading
+from collections import deque
+from typing import Callable, Dict, Iterator, List, Optional
+
+LOGGER = logging.getLogger(__name__)
+
+STREAM_INTERVAL = float(os.getenv('STREAM_INTERVAL', '1'))
+STREAM_HEARTBEAT = float(os.getenv('STREAM_HEARTBEAT', '15'))
+
+Publish = Callable[[str, object], None]
+
+
+def format_event(event: Dict) -> str:
+    """One SSE frame."""
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event['data'], default=str)}\n\n"
+
+
+class Subscription:
+    """One client's view of the hub: a bounded queue plus an overflow flag."""
+
+    def __init__(self, maxsize: int):
+        self.queue: queue.Queue = queue.Queue(maxsize=maxsize)
+        self.overflowed = False
+
+    def offer(self, event: Dict):
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except queue.Full:
+            # Stop queueing for a client that isn't reading; it resyncs when it catches up
+            self.overflowed = True
+
+
+class EventHub:
+    """Single producer, many subscribers."""
+
+    def __init__(self, interval: float = STREAM_INTERVAL, history: int = 256, queue_size: int = 1000,
+                 heartbeat: float = STREAM_HEARTBEAT):
+        self.interval = interval
+        self.heartbeat = heartbeat
+        self.queue_size = queue_size
+        self._history = deque(maxlen=history)
+        self._sources: List[Callable[[Publish], None]] = []
+        self._subscribers: List[Subscription] = []
+        self._lock = threading.Lock()
+        self._next_id = 1
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.stats = {'published': 0, 'polls': 0, 'source_errors': 0, 'overflows': 0}
+
+    def add_source(self, source: Callable[[Publish], None]):
+        """Register a poller; it is called with `publish` on every producer tick."""
+        self._sources.append(source)
+
+    def publish(self, event_type: str, data) -> Dict:
+        """Assign the next id, remember the event and hand it to every subscriber."""
+        with self._lock:
+            event = {'id': self._next_id, 'type': event_type, 'data': data}
+            self._next_id += 1
+            self._history.append(event)
+            subscribers = list(self._subscribers)
+        for sub in subscribers:
+            was = sub.overflowed
+            sub.offer(event)
+            if sub.overflowed and not was:
+                self.stats['overflows'] += 1
+        self.stats['published'] += 1
+        return event
+
+    def poll(self):
+        """Run every source once (the producer calls this every `interval`)."""
+        self.stats['polls'] += 1
+        for source in self._sources:
+            try:
+                source(self.publish)
+            except Exception as e:
+                self.stats['source_errors'] += 1
+                LOGGER.warning(f"Event source {getattr(source, '__name__', source)} failed: {e}")
+
+    def _run(self):
+        while not self._stop.is_set():
+            if self.subscriber_count():
+                self.poll()
+            self._stop.wait(self.interval)
+
+    def start(self):
+        """Start the producer thread (idempotent). It only polls while someone is subscribed."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='event-hub', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self, last_event_id=None) -> Subscription:
+        """New subscription, pre-filled with history after `last_event_id` when given."""
+        sub = Subscription(self.queue_size)
+        with self._lock:
+            if last_event_id not in (None, ''):
+                try:
+                    last = int(last_event_id)
+                except (TypeError, ValueError):
+                    last = None
+                if last is not None:
+                    oldest = self._history[0]['id'] if self._history else self._next_id
+                    if last + 1 < oldest:
+                        sub.offer({'id': last, 'type': 'resync', 'data': {'reason': 'history'}})
+                    for event in self._history:
+                        if event['id'] > last:
+                            sub.offer(event)
+            self._subscribers.append(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription):
+        with self._lock:
+            if sub in self._subscribers:
+                self._subscribers.remove(sub)
+
+    def stream(self, sub: Subscription, transform: Callable[[Dict], Optional[Dict]] = None) -> Iterator[str]:
+        """SSE frames for `sub` until the client disconnects.
+
+        `transform` may rewrite an event for this client or drop it (return None), e.g.
+        to hide owner data from a user without keys.
+        """
+        try:
+            yield f"retry: {int(self.interval * 3000)}\n\n"
+            while True:
+                if sub.overflowed:
+                    # Drop the backlog and tell the client to refetch; resume live events after
+                    while not sub.queue.empty():
+                        sub.queue.get_nowait()
+                    sub.overflowed = False
+                    with self._lock:
+                        last_id = self._next_id - 1
+                    yield format_event({'id': last_id, 'type': 'resync', 'data': {'reason': 'overflow'}})
+                    continue
+                try:
+                    event = sub.queue.get(timeout=self.heartbeat)
+                except queue.Empty:
+                    yield ": ping\n\n"
+                    continue
+                if transform is not None:
+                    event = transform(event)
+                    if event is None:
+                        continue
+                yield format_event(event)
+        finally:
+            self.unsubscribe(sub)
+
+
+# Global hub instance
+_hub = None
+_hub_lock = threading.Lock()
+
+
+def get_event_hub() -> EventHub:
+    """Get the process-wide hub (initialize if needed; the producer starts with it)."""
+    global _hub
+    if _hub is None:
+        with _hub_lock:
+            if _hub is None:
+                _hub = EventHub()
+                _hub.start()
+    return _hub
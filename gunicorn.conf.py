@@ -0,0 +1,21 @@
+"""
+Gunicorn settings for the dashboard (loaded from the working directory by default).
+
+/api/stream keeps one response open per browser tab. With gunicorn's default sync
+workers each open stream would hold a whole worker (two tabs block every REST route)
+and the worker would be killed by the worker timeout mid-stream. Threaded workers
+serve each request on its own thread and heartbeat from the main loop, so long-lived
+streams neither starve REST requests nor trip the timeout.
+
+Configuration (.env):
+- WEB_CONCURRENCY (worker processes, default 2)
+- WEB_THREADS (threads per worker = concurrent requests incl. open streams, default 16)
+- WEB_TIMEOUT (seconds a worker may be unresponsive, default 30)
+"""
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+workers = int(os.getenv('WEB_CONCURRENCY', '2'))
+worker_class = 'gthread'
+threads = int(os.getenv('WEB_THREADS', '16'))
+timeout = int(os.getenv('WEB_TIMEOUT', '30'))
@@ -0,0 +1,284 @@
+"""
+Incremental technical indicators.
+
+Each indicator consumes one price at a time via `update(price)` in O(1) and keeps
+only the state it needs, so a bot loop never recomputes over its whole price history.
+State can be saved with `snapshot()` (a JSON-serialisable dict) and rebuilt with
+`restore_indicator(snapshot)`, e.g. to survive a restart without re-warming.
+
+Indicators:
+- EMA: seed='first' matches pandas `ewm(span=period, adjust=False)`;
+  seed='sma' seeds with the simple average of the first `period` prices
+- SMA
+- MACD: fast/slow EMA difference plus a signal-line EMA and histogram
+- RSI: Wilder-smoothed relative strength index
+- Bollinger: SMA middle band +/- k population standard deviations
+"""
+import math
+from collections import deque
+from typing import Dict, Iterable, Optional
+
+
+class Indicator:
+    """Base class: subclasses implement update(), value and the snapshot fields."""
+
+    kind = 'indicator'
+    _fields = ()
+
+    def update(self, price: float):
+        raise NotImplementedError
+
+    def update_many(self, prices: Iterable[float]):
+        """Feed several prices in order; returns the value after the last one."""
+        value = self.value
+        for price in prices:
+            value = self.update(price)
+        return value
+
+    @property
+    def value(self):
+        raise NotImplementedError
+
+    @property
+    def ready(self) -> bool:
+        return self.value is not None
+
+    def _params(self) -> Dict:
+        raise NotImplementedError
+
+    def snapshot(self) -> Dict:
+        """JSON-serialisable state; pass to `restore_indicator` to continue from here."""
+        state = {name: getattr(self, name) for name in self._fields}
+        return {'type': self.kind, 'params': self._params(), 'state': state}
+
+    def _load(self, state: Dict):
+        for name in self._fields:
+            setattr(self, name, state[name])
+
+    @classmethod
+    def from_snapshot(cls, snap: Dict) -> 'Indicator':
+        indicator = cls(**snap['params'])
+        indicator._load(snap['state'])
+        return indicator
+
+
+class EMA(Indicator):
+    """Exponential moving average with smoothing 2 / (period + 1)."""
+
+    kind = 'ema'
+    _fields = ('count', 'ema', '_seed_sum')
+
+    def __init__(self, period: int, seed: str = 'first'):
+        if period < 1:
+            raise ValueError("period must be >= 1")
+        if seed not in ('first', 'sma'):
+            raise ValueError("seed must be 'first' or 'sma'")
+        self.period = period
+        self.seed = seed
+        self.alpha = 2.0 / (period + 1)
+        self.count = 0
+        self.ema: Optional[float] = None
+        self._seed_sum = 0.0
+
+    def update(self, price: float) -> Optional[float]:
+        price = float(price)
+        self.count += 1
+        if self.ema is not None:
+            self.ema += self.alpha * (price - self.ema)
+        elif self.seed == 'first':
+            self.ema = price
+        else:
+            self._seed_sum += price
+            if self.count == self.period:
+                self.ema = self._seed_sum / self.period
+        return self.ema
+
+    @property
+    def value(self) -> Optional[float]:
+        return self.ema
+
+    def _params(self) -> Dict:
+        return {'period': self.period, 'seed': self.seed}
+
+
+class SMA(Indicator):
+    """Simple moving average over the last `period` prices (running sum)."""
+
+    kind = 'sma'
+
+    def __init__(self, period: int):
+        if period < 1:
+            raise ValueError("period must be >= 1")
+        self.period = period
+        self.window = deque(maxlen=period)
+        self.total = 0.0
+
+    def update(self, price: float) -> Optional[float]:
+        price = float(price)
+        if len(self.window) == self.period:
+            self.total -= self.window[0]
+        self.window.append(price)
+        self.total += price
+        return self.value
+
+    @property
+    def value(self) -> Optional[float]:
+        if len(self.window) < self.period:
+            return None
+        return self.total / self.period
+
+    def _params(self) -> Dict:
+        return {'period': self.period}
+
+    def snapshot(self) -> Dict:
+        return {'type': self.kind, 'params': self._params(), 'state': {'window': list(self.window)}}
+
+    def _load(self, state: Dict):
+        self.window.clear()
+        self.total = 0.0
+        for price in state['window']:
+            self.update(price)
+
+
+class MACD(Indicator):
+    """MACD line (fast EMA - slow EMA), its signal-line EMA and the histogram."""
+
+    kind = 'macd'
+
+    def __init__(self, fast: int = 12, slow: int = 26, signal: int = 9, seed: str = 'first'):
+        self.fast = EMA(fast, seed)
+        self.slow = EMA(slow, seed)
+        self.signal = EMA(signal, seed)
+        self.macd: Optional[float] = None
+
+    def update(self, price: float) -> Optional[Dict]:
+        fast, slow = self.fast.update(price), self.slow.update(price)
+        if fast is None or slow is None:
+            return None
+        self.macd = fast - slow
+        self.signal.update(self.macd)
+        return self.value
+
+    @property
+    def value(self) -> Optional[Dict]:
+        if self.macd is None or self.signal.value is None:
+            return None
+        return {'macd': self.macd, 'signal': self.signal.value, 'histogram': self.macd - self.signal.value}
+
+    def _params(self) -> Dict:
+        return {'fast': self.fast.period, 'slow': self.slow.period, 'signal': self.signal.period, 'seed': self.fast.seed}
+
+    def snapshot(self) -> Dict:
+        return {'type': self.kind, 'params': self._params(),
+                'state': {'fast': self.fast.snapshot(), 'slow': self.slow.snapshot(),
+                          'signal': self.signal.snapshot(), 'macd': self.macd}}
+
+    def _load(self, state: Dict):
+        self.fast = EMA.from_snapshot(state['fast'])
+        self.slow = EMA.from_snapshot(state['slow'])
+        self.signal = EMA.from_snapshot(state['signal'])
+        self.macd = state['macd']
+
+
+class RSI(Indicator):
+    """Relative strength index with Wilder smoothing (0-100)."""
+
+    kind = 'rsi'
+    _fields = ('count', 'prev', 'avg_gain', 'avg_loss', '_gain_sum', '_loss_sum')
+
+    def __init__(self, period: int = 14):
+        if period < 1:
+            raise ValueError("period must be >= 1")
+        self.period = period
+        self.count = 0  # number of price changes seen
+        self.prev: Optional[float] = None
+        self.avg_gain: Optional[float] = None
+        self.avg_loss: Optional[float] = None
+        self._gain_sum = 0.0
+        self._loss_sum = 0.0
+
+    def update(self, price: float) -> Optional[float]:
+        price = float(price)
+        if self.prev is None:
+            self.prev = price
+            return None
+        change = price - self.prev
+        self.prev = price
+        gain, loss = max(change, 0.0), max(-change, 0.0)
+        self.count += 1
+        if self.avg_gain is None:
+            self._gain_sum += gain
+            self._loss_sum += loss
+            if self.count == self.period:
+                self.avg_gain = self._gain_sum / self.period
+                self.avg_loss = self._loss_sum / self.period
+        else:
+            self.avg_gain = (self.avg_gain * (self.period - 1) + gain) / self.period
+            self.avg_loss = (self.avg_loss * (self.period - 1) + loss) / self.period
+        return self.value
+
+    @property
+    def value(self) -> Optional[float]:
+        if self.avg_gain is None:
+            return None
+        if self.avg_loss == 0:
+            return 100.0 if self.avg_gain > 0 else 50.0
+        rs = self.avg_gain / self.avg_loss
+        return 100.0 - 100.0 / (1.0 + rs)
+
+    def _params(self) -> Dict:
+        return {'period': self.period}
+
+
+class Bollinger(Indicator):
+    """Bollinger bands: SMA(period) +/- k standard deviations of the same window."""
+
+    kind = 'bollinger'
+
+    def __init__(self, period: int = 20, k: float = 2.0):
+        self.k = k
+        self.sma = SMA(period)
+        self.sq_total = 0.0
+
+    def update(self, price: float) -> Optional[Dict]:
+        price = float(price)
+        window = self.sma.window
+        if len(window) == self.sma.period:
+            self.sq_total -= window[0] * window[0]
+        self.sma.update(price)
+        self.sq_total += price * price
+        return self.value
+
+    @property
+    def value(self) -> Optional[Dict]:
+        middle = self.sma.value
+        if middle is None:
+            return None
+        n = self.sma.period
+        # Running sums can drift slightly negative for flat prices
+        std = math.sqrt(max(self.sq_total / n - middle * middle, 0.0))
+        return {'middle': middle, 'upper': middle + self.k * std, 'lower': middle - self.k * std, 'std': std}
+
+    def _params(self) -> Dict:
+        return {'period': self.sma.period, 'k': self.k}
+
+    def snapshot(self) -> Dict:
+        return {'type': self.kind, 'params': self._params(), 'state': {'window': list(self.sma.window)}}
+
+    def _load(self, state: Dict):
+        self.sma = SMA(self.sma.period)
+        self.sq_total = 0.0
+        for price in state['window']:
+            self.update(price)
+
+
+INDICATORS = {cls.kind: cls for cls in (EMA, SMA, MACD, RSI, Bollinger)}
+
+
+def restore_indicator(snap: Dict) -> Indicator:
+    """Rebuild any indicator from its `snapshot()`."""
+    try:
+        cls = INDICATORS[snap['type']]
+    except KeyError:
+        raise ValueError(f"Unknown indicator type: {snap.get('type')}")
+    return cls.from_snapshot(snap)
@@ -0,0 +1,234 @@
+"""
+Incremental tail of the bot log for the dashboard.
+
+`LogTail` keeps the last `max_lines` lines of a log file in a ring. Each read stats the
+file and reads only the bytes appended since the last one (offset tracking), so serving
+/api/logs costs O(new bytes) instead of re-reading the end of the file every poll.
+Rotation is detected by the file's inode changing or its size dropping below the
+offset; the new file is then read from its start.
+
+Cursors are file positions - '<inode>:<byte offset just past a line>' - so every
+process tailing the same file (e.g. each gunicorn worker) reads a cursor the same way,
+whichever one issued it. `since(cursor)` returns only the lines after a cursor a client
+got earlier, so pollers fetch just what is new. A cursor that has fallen out of the
+ring (or points into a file that has since been rotated away) gets the current tail
+back with `reset: True`.
+
+Configuration (.env):
+- BOT_LOG_FILE (default bot.log)
+- LOG_TAIL_LINES (lines kept in memory, default 2000)
+"""
+import logging
+import os
+import threading
+from collections import OrderedDict, deque
+from typing import Dict, List, Optional, Tuple
+
+LOGGER = logging.getLogger(__name__)
+
+LOG_FILE = os.getenv('BOT_LOG_FILE', 'bot.log')
+TAIL_LINES = int(os.getenv('LOG_TAIL_LINES', '2000'))
+
+
+def _last_raw_lines(path: str, count: int, block_size: int = 8192) -> Tuple[List[bytes], int, int]:
+    """Last `count` complete lines of `path` as bytes, the offset the first one starts at
+    and the offset just past the last one."""
+    with open(path, 'rb') as f:
+        size = f.seek(0, os.SEEK_END)
+        pos = size
+        blocks = []
+        newlines = 0
+        while pos > 0 and newlines <= count:
+            step = min(block_size, pos)
+            pos -= step
+            f.seek(pos)
+            block = f.read(step)
+            blocks.append(block)
+            newlines += block.count(b'\n')
+    data = b''.join(reversed(blocks))
+    end = data.rfind(b'\n')
+    if end < 0:
+        return [], pos, pos
+    lines = data[:end].split(b'\n')
+    start = pos
+    if pos > 0:
+        start += len(lines[0]) + 1
+        lines = lines[1:]   # the first piece may start mid-line
+    keep = lines[-count:] if count > 0 else []
+    start += sum(len(line) + 1 for line in lines[:len(lines) - len(keep)])
+    return keep, start, pos + end + 1
+
+
+def read_last_lines(path: str, count: int, block_size: int = 8192) -> Tuple[List[str], int]:
+    """Last `count` complete lines of `path` and the offset just past them.
+
+    Reads backwards in blocks until enough newlines were seen, counting them per block
+    (linear in the bytes read). A trailing partial line is left for the next read.
+    """
+    lines, _, end = _last_raw_lines(path, count, block_size)
+    return [line.decode('utf-8', errors='replace') for line in lines], end
+
+
+def format_cursor(position: Tuple[int, int]) -> str:
+    """Cursor for a file position: '<inode>:<byte offset just past a line>'."""
+    return f"{position[0]}:{position[1]}"
+
+
+def parse_cursor(cursor) -> Optional[Tuple[int, int]]:
+    """(inode, offset) from a cursor, or None if it is not one."""
+    inode, sep, offset = str(cursor).strip().partition(':')
+    try:
+        return (int(inode), int(offset)) if sep else None
+    except ValueError:
+        return None
+
+
+class LogTail:
+    """Bounded in-memory tail of a growing (and possibly rotated) log file."""
+
+    def __init__(self, path: str = LOG_FILE, max_lines: int = TAIL_LINES):
+        self.path = path
+        self.max_lines = max_lines
+        self._ring = deque()   # (seq, (inode, end offset), line)
+        # Line-end positions still in (or just before) the ring -> seq, oldest first
+        self._positions = OrderedDict({(0, 0): 0})   # (0, 0): "no file yet"
+        self._seq = 0
+        self._offset = 0
+        self._inode = None
+        self._partial = b''
+        self._loaded = False
+        self._lock = threading.Lock()
+        self.stats = {'refreshes': 0, 'bytes_read': 0, 'rotations': 0}
+
+    def _append(self, lines: List[bytes], start: int):
+        """Add complete lines that begin at byte `start` of the current file."""
+        offset = start
+        for raw in lines:
+            offset += len(raw) + 1
+            self._seq += 1
+            position = (self._inode, offset)
+            self._ring.append((self._seq, position, raw.decode('utf-8', errors='replace')))
+            self._positions.pop(position, None)
+            self._positions[position] = self._seq
+        while len(self._ring) > self.max_lines:
+            self._ring.popleft()
+        # Keep the position just before the oldest line: a cursor there still resumes
+        oldest = self._ring[0][0] if self._ring else self._seq + 1
+        while self._positions and next(iter(self._positions.values())) < oldest - 1:
+            self._positions.popitem(last=False)
+
+    def _mark(self):
+        """Record the current read position (e.g. the start of a new file) as a cursor."""
+        position = self._position()
+        self._positions.pop(position, None)
+        self._positions[position] = self._seq
+
+    def _position(self) -> Tuple[int, int]:
+        if self._inode is None:
+            return (0, 0)
+        return (self._inode, self._offset - len(self._partial))
+
+    def _seed(self, st: os.stat_result):
+        lines, start, offset = _last_raw_lines(self.path, self.max_lines)
+        self._inode = st.st_ino
+        self._partial = b''
+        self._offset = start
+        self._mark()
+        self._append(lines, start)
+        self._offset = offset
+
+    def refresh(self) -> int:
+        """Pick up lines appended since the last call; returns how many were added."""
+        with self._lock:
+            self.stats['refreshes'] += 1
+            try:
+                st = os.stat(self.path)
+            except OSError:
+                return 0
+            before = self._seq
+            if not self._loaded:
+                self._loaded = True
+                self._seed(st)
+                return self._seq - before
+            if st.st_ino != self._inode or st.st_size < self._offset:
+                # Rotated or truncated: whatever the old file still had unread is gone
+                LOGGER.debug(f"{self.path} was rotated; reading the new file from the start")
+                self.stats['rotations'] += 1
+                if st.st_ino == self._inode:
+                    # Truncated in place: old positions in this file now point at other lines
+                    for position in [p for p in self._positions if p[0] == self._inode]:
+                        del self._positions[position]
+                self._inode = st.st_ino
+                self._offset = 0
+                self._partial = b''
+                self._mark()
+            if st.st_size > self._offset:
+                with open(self.path, 'rb') as f:
+                    f.seek(self._offset)
+                    data = f.read(st.st_size - self._offset)
+                start = self._offset - len(self._partial)
+                self._offset += len(data)
+                self.stats['bytes_read'] += len(data)
+                data = self._partial + data
+                end = data.rfind(b'\n')
+                if end < 0:
+                    self._partial = data
+                else:
+                    self._partial = data[end + 1:]
+                    self._append(data[:end].split(b'\n'), start)
+            return self._seq - before
+
+    @property
+    def cursor(self) -> str:
+        """Cursor for the end of the newest complete line."""
+        with self._lock:
+            return format_cursor(self._position())
+
+    def tail(self, limit: int = 200) -> Dict:
+        """The newest `limit` lines."""
+        self.refresh()
+        with self._lock:
+            entries = list(self._ring)[-limit:] if limit > 0 else []
+            return {'logs': [line for _, _, line in entries], 'cursor': format_cursor(self._position()),
+                    'reset': False}
+
+    def since(self, cursor, limit: int = 1000) -> Dict:
+        """Lines after `cursor` (at most `limit`, oldest first) and the cursor to pass next time.
+
+        Cursors are file positions, so one from another process tailing the same file
+        (another dashboard worker, or this one before a restart) resumes at the same line.
+        """
+        self.refresh()
+        with self._lock:
+            position = parse_cursor(cursor)
+            seq = self._positions.get(position) if position is not None else None
+            if seq is None:
+                entries, reset = (list(self._ring)[-limit:] if limit > 0 else []), True
+            else:
+                # Sequence numbers are contiguous, so the position in the ring is known
+                oldest = self._ring[0][0] if self._ring else self._seq + 1
+                start = seq - oldest + 1
+                entries = [self._ring[i] for i in range(start, min(len(self._ring), start + max(limit, 0)))]
+                reset = False
+            if entries:
+                next_cursor = format_cursor(entries[-1][1])
+            elif reset:
+                next_cursor = format_cursor(self._position())
+            else:
+                next_cursor = format_cursor(position)
+            return {'logs': [line for _, _, line in entries], 'cursor': next_cursor, 'reset': reset}
+
+
+# Process-wide tails, one per path
+_tails: Dict[str, LogTail] = {}
+_tails_lock = threading.Lock()
+
+
+def get_log_tail(path: Optional[str] = None) -> LogTail:
+    """Get the process-wide tail for `path` (default BOT_LOG_FILE)."""
+    path = path or LOG_FILE
+    with _tails_lock:
+        tail = _tails.get(path)
+        if tail is None:
+            tail = _tails[path] = LogTail(path)
+        return tail
@@ -0,0 +1,283 @@
+"""
+Lot ledger: match sells to buys and compute realized / unrealized P&L per pair.
+
+Every buy opens a lot (volume, cost including its fee). A sell consumes open lots
+according to the matching method and realizes
+
+    pnl = proceeds - sell fee - cost basis of the consumed volume
+
+Methods:
+    fifo     oldest lots first (deque: a fill touches only the lots it consumes)
+    lifo     newest lots first (stack)
+    average  one pooled position per pair; every sell is costed at the running average
+
+Each pair keeps running totals of its open volume and cost, so a fill costs O(lots it
+consumes) - amortized O(1) - and unrealized P&L against the cached ticker is O(1) per
+pair no matter how many fills the pair has seen. Volume sold beyond the open lots
+(coins bought before the journal existed) has no cost basis; it is reported as
+`unmatched_volume` and not counted as profit.
+
+The ledger follows the trade journal incrementally (`sync()` folds rows after the last
+id it consumed) and reports each realized sell to subscribers, e.g. the compound
+manager's profit split. Rows recorded from dry-run (simulated) orders are skipped: they
+never moved coins, so they neither open lots nor realize profit.
+
+Configuration (.env):
+- LOT_METHOD (fifo | lifo | average, default fifo)
+"""
+import logging
+import os
+import threading
+from collections import deque
+from typing import Callable, Dict, List, Optional
+
+from trade_journal import TradeJournal, get_trade_journal, is_dry_run
+
+LOGGER = logging.getLogger(__name__)
+
+METHODS = ('fifo', 'lifo', 'average')
+LOT_METHOD = os.getenv('LOT_METHOD', 'fifo').lower()
+
+# Volumes below this are treated as fully consumed (float dust)
+EPSILON = 1e-12
+
+
+class PairBook:
+    """Open lots and realized totals for one pair."""
+
+    def __init__(self, pair: str, method: str = 'fifo'):
+        if method not in METHODS:
+            raise ValueError(f"Unknown lot method {method!r} (use one of {METHODS})")
+        self.pair = pair
+        self.method = method
+        # Each lot is [volume, unit_cost, ts, trade_id]; the unit cost includes the buy fee
+        self.lots = deque()
+        self.open_volume = 0.0
+        self.open_cost = 0.0
+        self.realized_pnl = 0.0
+        self.fees = 0.0
+        self.unmatched_volume = 0.0
+        self.fills = 0
+
+    def buy(self, volume: float, price: float, fee: float = 0.0, ts: float = None, trade_id=None):
+        """Open a lot."""
+        if volume <= 0:
+            return
+        cost = volume * price + fee
+        self.fills += 1
+        self.fees += fee
+        self.open_volume += volume
+        self.open_cost += cost
+        if self.method == 'average':
+            # One pooled lot; its unit cost is the running average
+            self.lots.clear()
+            self.lots.append([self.open_volume, self.open_cost / self.open_volume, ts, trade_id])
+        else:
+            self.lots.append([volume, cost / volume, ts, trade_id])
+
+    def sell(self, volume: float, price: float, fee: float = 0.0, ts: float = None, trade_id=None) -> Dict:
+        """Consume open lots and return the realization for this fill."""
+        self.fills += 1
+        self.fees += fee
+        remaining = volume
+        cost = 0.0
+        take = self.lots.popleft if self.method == 'fifo' else self.lots.pop
+        while remaining > EPSILON and self.lots:
+            lot = self.lots[0] if self.method == 'fifo' else self.lots[-1]
+            used = min(lot[0], remaining)
+            cost += used * lot[1]
+            lot[0] -= used
+            remaining -= used
+            if lot[0] <= EPSILON:
+                take()
+        matched = volume - max(remaining, 0.0)
+        if remaining > EPSILON:
+            self.unmatched_volume += remaining
+            LOGGER.debug(f"{self.pair}: sold {remaining:.8f} more than the open lots hold (no cost basis)")
+
+        if self.lots:
+            self.open_volume -= matched
+            self.open_cost -= cost
+        else:
+            self.open_volume = self.open_cost = 0.0
+        # Only the matched part is profit; the fee is apportioned the same way
+        proceeds = matched * price
+        matched_fee = fee * (matched / volume) if volume > 0 else 0.0
+        pnl = proceeds - matched_fee - cost
+        self.realized_pnl += pnl
+        return {
+            'pair': self.pair,
+            'trade_id': trade_id,
+            'ts': ts,
+            'volume': volume,
+            'matched_volume': matched,
+            'unmatched_volume': volume - matched,
+            'price': price,
+            'proceeds': proceeds,
+            'cost_basis': cost,
+            'fee': fee,
+            'pnl': pnl,
+            'pnl_pct': (pnl / cost * 100) if cost > 0 else 0.0,
+        }
+
+    @property
+    def average_cost(self) -> float:
+        return self.open_cost / self.open_volume if self.open_volume > EPSILON else 0.0
+
+    def unrealized(self, price: float) -> float:
+        """Mark-to-market P&L of the open lots at `price`."""
+        return self.open_volume * price - self.open_cost
+
+    def open_lots(self) -> List[Dict]:
+        """Open lots in matching order (next to be consumed first)."""
+        lots = list(self.lots) if self.method != 'lifo' else list(reversed(self.lots))
+        return [{'volume': v, 'unit_cost': c, 'ts': ts, 'trade_id': tid} for v, c, ts, tid in lots]
+
+    def summary(self, price: float = None) -> Dict:
+        out = {
+            'pair': self.pair,
+            'method': self.method,
+            'fills': self.fills,
+            'open_lots': len(self.lots),
+            'open_volume': round(self.open_volume, 8),
+            'open_cost_ngn': round(self.open_cost, 2),
+            'average_cost': round(self.average_cost, 8),
+            'realized_pnl_ngn': round(self.realized_pnl, 2),
+            'fees_ngn': round(self.fees, 2),
+            'unmatched_volume': round(self.unmatched_volume, 8),
+        }
+        if price is not None:
+            out['price'] = price
+            out['unrealized_pnl_ngn'] = round(self.unrealized(price), 2)
+        return out
+
+
+def mark_price(ticker: Optional[dict]) -> Optional[float]:
+    """Price a long position would sell at: the bid, else the last trade."""
+    if not ticker:
+        return None
+    for key in ('bid', 'last_trade'):
+        try:
+            price = float(ticker.get(key) or 0)
+        except (TypeError, ValueError):
+            continue
+        if price > 0:
+            return price
+    return None
+
+
+class LotLedger:
+    """Per-pair lot books fed from the trade journal."""
+
+    def __init__(self, method: str = LOT_METHOD, journal: TradeJournal = None):
+        if method not in METHODS:
+            raise ValueError(f"Unknown lot method {method!r} (use one of {METHODS})")
+        self.method = method
+        self._journal = journal
+        self.books: Dict[str, PairBook] = {}
+        self.last_id = 0
+        self.skipped_dry_run = 0
+        self._subscribers: List[Callable[[Dict], None]] = []
+        self._lock = threading.Lock()
+
+    @property
+    def journal(self) -> TradeJournal:
+        if self._journal is None:
+            self._journal = get_trade_journal()
+        return self._journal
+
+    def subscribe(self, callback: Callable[[Dict], None]):
+        """Call `callback(realization)` for every sell folded by `sync(notify=True)`."""
+        self._subscribers.append(callback)
+
+    def book(self, pair: str) -> PairBook:
+        book = self.books.get(pair)
+        if book is None:
+            book = self.books[pair] = PairBook(pair, self.method)
+        return book
+
+    def apply(self, trade: Dict) -> Optional[Dict]:
+        """Fold one journal row. Returns the realization for sells, None for buys and dry runs."""
+        if is_dry_run(trade):
+            self.skipped_dry_run += 1
+            return None
+        book = self.book(trade['pair'])
+        args = (float(trade['volume']), float(trade['price']), float(trade.get('fee') or 0.0),
+                trade.get('ts'), trade.get('id'))
+        if trade['side'] == 'buy':
+            book.buy(*args)
+            return None
+        return book.sell(*args)
+
+    def sync(self, notify: bool = True) -> List[Dict]:
+        """Fold journal rows added since the last sync; returns the new realizations.
+
+        Use notify=False to catch up on history at startup without re-reporting old sells.
+        """
+        realized = []
+        with self._lock:
+            for trade in self.journal.iter_trades(after_id=self.last_id):
+                result = self.apply(trade)
+                if result is not None:
+                    realized.append(result)
+                self.last_id = trade['id']
+        if notify:
+            for result in realized:
+                for callback in self._subscribers:
+                    try:
+                        callback(result)
+                    except Exception as e:
+                        LOGGER.error(f"Lot ledger subscriber failed for trade {result['trade_id']}: {e}")
+        return realized
+
+    def unrealized(self, prices: Dict[str, float] = None) -> Dict[str, float]:
+        """{pair: unrealized P&L} for pairs with open lots, priced from `prices` or the ticker cache."""
+        out = {}
+        for pair, book in self.books.items():
+            if book.open_volume <= EPSILON:
+                continue
+            price = (prices or {}).get(pair)
+            if price is None:
+                price = self._cached_price(pair)
+            if price is not None:
+                out[pair] = book.unrealized(price)
+        return out
+
+    @staticmethod
+    def _cached_price(pair: str) -> Optional[float]:
+        from ticker_cache import get_ticker_cache
+        try:
+            return mark_price(get_ticker_cache().get(pair))
+        except Exception as e:
+            LOGGER.warning(f"No cached price for {pair}: {e}")
+            return None
+
+    def summary(self, prices: Dict[str, float] = None) -> Dict:
+        """Per-pair books plus totals; unrealized P&L uses `prices` or the cached ticker."""
+        marks = self.unrealized(prices)
+        pairs = {pair: book.summary() for pair, book in self.books.items()}
+        for pair, pnl in marks.items():
+            pairs[pair]['unrealized_pnl_ngn'] = round(pnl, 2)
+        return {
+            'method': self.method,
+            'last_id': self.last_id,
+            'skipped_dry_run': self.skipped_dry_run,
+            'realized_pnl_ngn': round(sum(b.realized_pnl for b in self.books.values()), 2),
+            'unrealized_pnl_ngn': round(sum(marks.values()), 2),
+            'pairs': pairs,
+        }
+
+
+# Global ledger instance
+_ledger = None
+_ledger_lock = threading.Lock()
+
+
+def get_lot_ledger() -> LotLedger:
+    """Get the process-wide lot ledger (initialize if needed)."""
+    global _ledger
+    if _ledger is None:
+        with _ledger_lock:
+            if _ledger is None:
+                _ledger = LotLedger()
+    return _ledger
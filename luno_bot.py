@@ -2,27 +2,31 @@
 
 - Reads config from environment or .env
 - Uses `LunoClient` (dry-run by default)
-- Logs trades to CSV
+- Records trades in the trade journal (trade_journal.py)
 - Writes state to bot_state.json for dashboard
 
 This is a template. Add risk controls and test on small amounts / sandbox before going live.
 """
 
 import os
-import time
-import json
+import threading
 from collections import deque
 from datetime import datetime
 
 import strategy
-from utils import retry_with_backoff
+from circuit_breaker import CircuitOpenError, call_with_retry
 import logging
 import argparse
-import csv
 from decimal import Decimal
 
 from dotenv import load_dotenv
 from luno_client import LunoClient
+from price_events import PriceEventEngine, make_price_source
+from scheduler import Scheduler
+from state_store import get_state_store
+from trade_journal import get_trade_journal
+from candle_store import duration_for_interval, get_candle_store
+from candles import TIMEFRAMES, CandleAggregator
 from credential_monitor import initialize_monitor, get_monitor, has_valid_credentials
 
 # Load .env if present
@@ -35,6 +39,8 @@ LOGGER = logging.getLogger("luno_bot")
 logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
 # Also write logs to a file so the dashboard can tail them
 LOG_FILE = os.getenv('BOT_LOG_FILE', 'bot.log')
+# Max seconds an order attempt (including retries) may block the loop
+ORDER_RETRY_BUDGET = float(os.getenv('ORDER_RETRY_BUDGET', '2'))
 try:
     fh = logging.FileHandler(LOG_FILE)
     fh.setLevel(logging.INFO)
@@ -58,26 +64,34 @@ def read_config():
         "sell_target": Decimal(os.getenv("SELL_TARGET", "0")),
         "volume": Decimal(os.getenv("VOLUME", "0.0")),
         "interval": int(os.getenv("INTERVAL", "30")),
+        "price_source": os.getenv("PRICE_SOURCE", "poll").lower(),
+        "debounce": float(os.getenv("PRICE_DEBOUNCE", "0.25")),
+        "poll_jitter": float(os.getenv("POLL_JITTER", "0")),
         "dry_run": creds.get("dry_run", os.getenv("DRY_RUN", "true").lower() in ("1", "true", "yes")),
-        "log_csv": os.getenv("LOG_CSV", "trade_log.csv"),
+        "candle_warmup": os.getenv("CANDLE_WARMUP", "true").lower() in ("1", "true", "yes"),
+        "signal_timeframe": os.getenv("SIGNAL_TIMEFRAME", "").strip(),
     }
     return cfg
 
 
-def append_trade_log(csv_path, row):
-    header = ["timestamp", "pair", "action", "price", "volume", "details"]
-    exists = os.path.exists(csv_path)
-    with open(csv_path, "a", newline="", encoding="utf-8") as f:
-        writer = csv.writer(f)
-        if not exists:
-            writer.writerow(header)
-        writer.writerow(row)
+def record_trade(pair, action, price, volume, resp):
+    """Record a placed order in the trade journal."""
+    get_trade_journal().record(pair, action, float(price), float(volume), action=action,
+                               source="bot", details=resp)
 
 
-def write_state(state_file, state):
-    """Write bot state to JSON for dashboard to read."""
-    with open(state_file, "w") as f:
-        json.dump(state, f)
+def place_order(client, pair, side, volume, price):
+    """Place an order with a short retry budget so a degraded API can't stall the loop.
+
+    Each attempt's HTTP timeout is capped at what is left of the budget, so a slow
+    exchange can't hold a single attempt past it either. Only transient errors are
+    retried; rejections (e.g. insufficient funds) and an open circuit breaker raise
+    immediately.
+    """
+    return call_with_retry(client.place_order, endpoint="postorder", idempotent=False,
+                           retries=3, base_delay=0.25, max_delay=1.0, max_elapsed=ORDER_RETRY_BUDGET,
+                           pass_timeout=True,
+                           pair=pair, side=side, volume=volume, price=price)
 
 
 def main():
@@ -97,6 +111,15 @@ def main():
     ema_period = int(os.getenv("EMA_PERIOD", "10"))
     buffer_size = max(ema_period * 2, 20)
     prices = deque(maxlen=buffer_size)
+    ema_signal = strategy.EMASignal(ema_period)
+    # SIGNAL_TIMEFRAME (1m/5m/15m/1h) runs the EMA on closed candles instead of every tick
+    signal_tf = cfg["signal_timeframe"]
+    if signal_tf and signal_tf not in TIMEFRAMES:
+        LOGGER.warning("Unknown SIGNAL_TIMEFRAME %s (use one of %s); using every tick", signal_tf, list(TIMEFRAMES))
+        signal_tf = ""
+    candles = CandleAggregator([signal_tf], history=buffer_size) if signal_tf else None
+    # The bot owns the "bot" section of bot_state.json; writes are coalesced (STATE_WRITE_INTERVAL)
+    state_store = get_state_store()
     state = {
         "last_price": 0,
         "pair": cfg["pair"],
@@ -105,83 +128,173 @@ def main():
         "prices": [],
         "balance": {},
     }
-    
+
+    def warm_up():
+        """Seed the price buffer and EMA from stored candles instead of waiting EMA_PERIOD ticks."""
+        if not cfg["candle_warmup"]:
+            return
+        duration = TIMEFRAMES[signal_tf] if signal_tf else duration_for_interval(cfg["interval"])
+        history = get_candle_store().warm_prices(cfg["pair"], buffer_size, client, duration)
+        for price in history:
+            prices.append(price)
+            ema_signal.update(price)
+        if history:
+            LOGGER.info("Warmed %s price buffer with %s %ss candles", cfg["pair"], len(history), duration)
+
+    warm_up()
+
     # Track last config for change detection
     last_config = cfg.copy()
+    source = None
+    # check_config runs on the poller / scheduler thread and rebinds cfg, client and the
+    # price buffers that on_price uses on the engine thread: both hold this lock
+    bot_lock = threading.RLock()
 
-    try:
-        while True:
+    def check_config():
+        """Reload config if .env changed (runs before every price poll, or every 5s when streaming)."""
+        if not get_monitor().check_for_updates():
+            return
+        with bot_lock:
+            reload_config()
+
+    def reload_config():
+        nonlocal cfg, last_config, client
+        new_cfg = read_config()
+
+        # Reinitialize client if API key/secret changed
+        if (new_cfg["api_key"] != last_config["api_key"] or
+            new_cfg["api_secret"] != last_config["api_secret"]):
+            LOGGER.info("🔄 API credentials changed, reinitializing client...")
+            client = LunoClient(new_cfg["api_key"], new_cfg["api_secret"], dry_run=new_cfg["dry_run"])
+            if source is not None and hasattr(source, "client"):
+                source.client = client
+            LOGGER.info("✅ Client reinitialized with new credentials")
+
+        # If pair changed, clear price history and follow the new pair
+        if new_cfg["pair"] != last_config["pair"]:
+            LOGGER.info("🔄 Trading pair changed from %s to %s, clearing price history", last_config["pair"], new_cfg["pair"])
+            prices.clear()
+            ema_signal.reset()
+            if source is not None:
+                source.set_pairs([new_cfg["pair"]])
+
+        # Update config
+        pair_changed = new_cfg["pair"] != last_config["pair"]
+        cfg = new_cfg
+        last_config = cfg.copy()
+        state["pair"] = cfg["pair"]
+        state["dry_run"] = cfg["dry_run"]
+        if pair_changed:
+            warm_up()
+
+    def act_on_signal(sig, last_price):
+        """Place the EMA strategy's order for a buy/sell signal."""
+        LOGGER.info("Strategy signal: %s (last=%s ema_period=%s)", sig, last_price, ema_period)
+        if sig == "buy":
+            resp = place_order(client, cfg["pair"], "buy", float(cfg["volume"]), last_price)
+            record_trade(cfg["pair"], "buy_ema", last_price, cfg["volume"], resp)
+        elif sig == "sell":
+            resp = place_order(client, cfg["pair"], "sell", float(cfg["volume"]), last_price)
+            record_trade(cfg["pair"], "sell_ema", last_price, cfg["volume"], resp)
+
+    def on_candle(pair, timeframe, candle):
+        """Evaluate the EMA strategy once per closed SIGNAL_TIMEFRAME candle."""
+        if pair != cfg["pair"]:
+            return
+        close = candle["close"]
+        sig = ema_signal.update(close)
+        LOGGER.info("%s %s candle closed: o=%s h=%s l=%s c=%s", pair, timeframe, candle["open"], candle["high"], candle["low"], close)
+        if ema_signal.ema.count >= ema_period:
             try:
-                # Check if credentials changed in .env file
-                if get_monitor().check_for_updates():
-                    new_cfg = read_config()
-                    
-                    # Reinitialize client if API key/secret changed
-                    if (new_cfg["api_key"] != last_config["api_key"] or 
-                        new_cfg["api_secret"] != last_config["api_secret"]):
-                        LOGGER.info("🔄 API credentials changed, reinitializing client...")
-                        client = LunoClient(new_cfg["api_key"], new_cfg["api_secret"], dry_run=new_cfg["dry_run"])
-                        LOGGER.info("✅ Client reinitialized with new credentials")
-                    
-                    # If pair changed, clear price history
-                    if new_cfg["pair"] != last_config["pair"]:
-                        LOGGER.info("🔄 Trading pair changed from %s to %s, clearing price history", last_config["pair"], new_cfg["pair"])
-                        prices.clear()
-                    
-                    # Update config
-                    cfg = new_cfg
-                    last_config = cfg.copy()
-                    state["pair"] = cfg["pair"]
-                    state["dry_run"] = cfg["dry_run"]
-                
-                ticker = client.get_ticker(cfg["pair"])
-                # ticker example fields: 'ask', 'bid', 'last_trade'
-                last_trade = Decimal(ticker.get("last_trade", ticker.get("ask") or ticker.get("bid") or "0"))
-                last_price = float(last_trade)
-                prices.append(last_price)
-                LOGGER.info("%s last_trade=%s (buffer %s)", cfg["pair"], last_trade, len(prices))
-
-                # Update state for dashboard
-                state["last_price"] = last_price
-                state["prices"] = list(prices)
-                state["last_update"] = datetime.now().isoformat()
-                write_state("bot_state.json", state)
-
-                # First try: user-defined static targets (backwards compatible)
-                executed = False
-                if cfg["buy_target"] > 0 and last_trade <= cfg["buy_target"]:
-                    LOGGER.info("Static rule met: BUY %s @ %s", cfg["volume"], last_trade)
-                    resp = retry_with_backoff(client.place_order, retries=3, base_delay=1, pair=cfg["pair"], side="buy", volume=float(cfg["volume"]), price=float(last_trade))
-                    append_trade_log(cfg["log_csv"], [time.time(), cfg["pair"], "buy", str(last_trade), str(cfg["volume"]), str(resp)])
-                    executed = True
-
-                elif cfg["sell_target"] > 0 and last_trade >= cfg["sell_target"]:
-                    LOGGER.info("Static rule met: SELL %s @ %s", cfg["volume"], last_trade)
-                    resp = retry_with_backoff(client.place_order, retries=3, base_delay=1, pair=cfg["pair"], side="sell", volume=float(cfg["volume"]), price=float(last_trade))
-                    append_trade_log(cfg["log_csv"], [time.time(), cfg["pair"], "sell", str(last_trade), str(cfg["volume"]), str(resp)])
-                    executed = True
-
-                # If static rules didn't trigger, evaluate EMA strategy when we have enough samples
-                if not executed and len(prices) >= ema_period:
-                    sig = strategy.signal_from_prices(list(prices), period=ema_period)
-                    LOGGER.info("Strategy signal: %s (last=%s ema_period=%s)", sig, last_price, ema_period)
-                    if sig == "buy":
-                        resp = retry_with_backoff(client.place_order, retries=3, base_delay=1, pair=cfg["pair"], side="buy", volume=float(cfg["volume"]), price=last_price)
-                        append_trade_log(cfg["log_csv"], [time.time(), cfg["pair"], "buy_ema", str(last_price), str(cfg["volume"]), str(resp)])
-                    elif sig == "sell":
-                        resp = retry_with_backoff(client.place_order, retries=3, base_delay=1, pair=cfg["pair"], side="sell", volume=float(cfg["volume"]), price=last_price)
-                        append_trade_log(cfg["log_csv"], [time.time(), cfg["pair"], "sell_ema", str(last_price), str(cfg["volume"]), str(resp)])
-
-            except Exception as e:
-                LOGGER.exception("Error in loop: %s", e)
-
-            if args.once:
-                break
-
-            time.sleep(cfg["interval"])
+                act_on_signal(sig, close)
+            except CircuitOpenError as e:
+                LOGGER.warning("Skipping this candle: %s", e)
 
+    if candles is not None:
+        candles.subscribe(on_candle)
+
+    def on_price(update):
+        """Evaluate the strategy for one changed price (called by the event engine)."""
+        with bot_lock:
+            evaluate_price(update)
+
+    def evaluate_price(update):
+        if update["pair"] != cfg["pair"]:
+            return
+        try:
+            ticker = update["ticker"]
+            # ticker example fields: 'ask', 'bid', 'last_trade'
+            last_trade = Decimal(str(ticker.get("last_trade") or ticker.get("ask") or ticker.get("bid") or "0"))
+            last_price = float(last_trade)
+            prices.append(last_price)
+            sig = ema_signal.update(last_price) if candles is None else None
+            LOGGER.info("%s last_trade=%s (buffer %s)", cfg["pair"], last_trade, len(prices))
+
+            # Update state for dashboard
+            state["last_price"] = last_price
+            state["prices"] = list(prices)
+            state["last_update"] = datetime.now().isoformat()
+            state_store.update("bot", state)
+
+            # First try: user-defined static targets (backwards compatible)
+            executed = False
+            if cfg["buy_target"] > 0 and last_trade <= cfg["buy_target"]:
+                LOGGER.info("Static rule met: BUY %s @ %s", cfg["volume"], last_trade)
+                resp = place_order(client, cfg["pair"], "buy", float(cfg["volume"]), float(last_trade))
+                record_trade(cfg["pair"], "buy", last_trade, cfg["volume"], resp)
+                executed = True
+
+            elif cfg["sell_target"] > 0 and last_trade >= cfg["sell_target"]:
+                LOGGER.info("Static rule met: SELL %s @ %s", cfg["volume"], last_trade)
+                resp = place_order(client, cfg["pair"], "sell", float(cfg["volume"]), float(last_trade))
+                record_trade(cfg["pair"], "sell", last_trade, cfg["volume"], resp)
+                executed = True
+
+            # If static rules didn't trigger, evaluate EMA strategy when we have enough samples
+            if candles is not None:
+                candles.add_tick(cfg["pair"], last_price, ts=update.get("received_at"))
+            elif not executed and len(prices) >= ema_period:
+                act_on_signal(sig, last_price)
+
+        except CircuitOpenError as e:
+            LOGGER.warning("Skipping this tick: %s", e)
+
+    # Strategy runs on price changes only: a quiet market costs one cached ticker read per
+    # poll and no strategy work or state writes. PRICE_SOURCE=stream reacts to every book update.
+    engine = PriceEventEngine(on_price, debounce=cfg["debounce"])
+    price_source = cfg["price_source"]
+    if args.once and price_source == "stream":
+        # A stream has no prices before it has run; one iteration means one REST poll
+        LOGGER.info("--once reads prices over REST (PRICE_SOURCE=stream needs a running stream)")
+        price_source = "poll"
+    source = make_price_source(price_source, engine, [cfg["pair"]], cfg["interval"], client=client,
+                               api_key=cfg["api_key"], api_secret=cfg["api_secret"], before_poll=check_config,
+                               jitter=cfg["poll_jitter"])
+    jobs = Scheduler(name="bot-jobs")
+    if price_source == "stream":
+        # No poll loop to hook into: check .env on its own fixed-rate job
+        jobs.add_job("config_check", check_config, 5)
+
+    if args.once:
+        source.poll_once()
+        engine.flush(force=True)
+        return
+
+    try:
+        jobs.start()
+        source.start()
+        engine.run_forever()
     except KeyboardInterrupt:
         LOGGER.info("Bot stopped by user")
+    finally:
+        source.stop()
+        engine.stop()
+        jobs.stop()
+        timings = jobs.summary()
+        if hasattr(source, "scheduler"):
+            timings += source.scheduler.summary()
+        for line in timings:
+            LOGGER.info("Job timing - %s", line)
 
 
 if __name__ == "__main__":
@@ -5,9 +5,16 @@ See README for usage and safety notes.
 """
 
 import logging
+import os
+import threading
 import requests
 import time
 import socket
+from typing import Dict, List, Optional, Tuple, Union
+
+from requests.adapters import HTTPAdapter
+
+from rate_limiter import RateLimiter, RateLimitTimeout, get_rate_limiter
 
 LOGGER = logging.getLogger(__name__)
 
@@ -33,23 +40,202 @@ socket.getaddrinfo = _patched_getaddrinfo
 
 BASE_URL = "https://api.luno.com/api/1"
 
+# Max keep-alive connections kept per host. The bot loop, dashboard workers and
+# TradingView handlers all share one pool, so size it for the dashboard's threads.
+POOL_SIZE = int(os.getenv("LUNO_HTTP_POOL_SIZE", "10"))
+
+# Per-endpoint (connect, read) timeouts in seconds. Order endpoints get a longer
+# read timeout because the exchange can be slow to acknowledge under load.
+DEFAULT_TIMEOUTS = {
+    "ticker": (3.05, 10),
+    "tickers": (3.05, 10),
+    "balances": (3.05, 10),
+    "getorder": (3.05, 10),
+    "postorder": (3.05, 15),
+    "stoporder": (3.05, 15),
+    "candles": (3.05, 15),
+}
+DEFAULT_TIMEOUT = (3.05, 10)
+
+Timeout = Union[float, Tuple[float, float]]
+
+_shared_session = None
+_shared_session_lock = threading.Lock()
+
+
+def build_session(pool_size: int = POOL_SIZE) -> requests.Session:
+    """Create a keep-alive `requests.Session` backed by a connection pool of `pool_size`."""
+    session = requests.Session()
+    # Retries are handled by the callers; the adapter must not silently re-send orders.
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=0)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({"Connection": "keep-alive"})
+    return session
+
+
+def get_shared_session() -> requests.Session:
+    """Return the process-wide pooled session (created on first use).
+
+    Credentials are passed per request, never stored on the session, so clients
+    for different users can safely share the same warm connections.
+    """
+    global _shared_session
+    if _shared_session is None:
+        with _shared_session_lock:
+            if _shared_session is None:
+                _shared_session = build_session()
+    return _shared_session
+
+
+# Map Luno error messages to user-friendly messages
+ORDER_ERROR_MAP = {
+    'Account has insufficient funds': 'Insufficient balance to place this order',
+    'insufficient funds': 'Insufficient balance to place this order',
+    'InsufficientFunds': 'Insufficient balance to place this order',
+    'Volume is below the minimum': 'Order volume is below the minimum allowed',
+    'Price is below the minimum': 'Order price is below the minimum allowed',
+    'Price is above the maximum': 'Order price is above the maximum allowed',
+}
+
+
+class LunoAPIError(RuntimeError):
+    """Error returned by the Luno API. `status_code` is None for network failures."""
+
+    def __init__(self, message, status_code: Optional[int] = None, error_code: Optional[str] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.error_code = error_code
+
+
+def build_order_payload(pair: str, side: str, volume: float, price: float, order_type: str = "limit") -> dict:
+    """Build the canonical /postorder payload. Raises ValueError for an unknown side."""
+    side = side.lower()
+    if side not in ("buy", "sell"):
+        raise ValueError("side must be 'buy' or 'sell'")
+
+    # Luno /postorder API expects 'type' parameter with 'BID' (buy) or 'ASK' (sell)
+    luno_type = "BID" if side == "buy" else "ASK"
+
+    # Price must be sent as integer (no decimals)
+    price_int = int(float(price))
+
+    # Canonical payload per Luno API spec
+    return {
+        "pair": pair,
+        "type": luno_type,
+        "volume": str(volume),
+        "price": str(price_int),
+        "order_type": order_type,
+    }
+
+
+def order_error_message(error_msg) -> str:
+    """Return the user-friendly message for a Luno order error, or the raw message if unknown."""
+    for luno_err, friendly_msg in ORDER_ERROR_MAP.items():
+        if luno_err.lower() in str(error_msg).lower():
+            return friendly_msg
+    return error_msg
+
+
+def dry_run_order(payload: dict) -> dict:
+    """Simulated /postorder response used when `dry_run` is enabled."""
+    LOGGER.info("DRY_RUN enabled: not placing order: %s", payload)
+    # Simulate an order id for dry run so caller can test order management
+    return {"status": "dry_run", "payload": payload, "order_id": f"dry-{int(time.time())}"}
+
+
+def retry_after_seconds(header, default: float = 1.0) -> float:
+    """Parse a Retry-After header (seconds) with a fallback for missing/HTTP-date values."""
+    try:
+        return max(float(header), 0.0)
+    except (TypeError, ValueError):
+        return default
+
 
 class LunoClient:
-    def __init__(self, api_key: str, api_secret: str, dry_run: bool = True):
+    def __init__(self, api_key: str, api_secret: str, dry_run: bool = True,
+                 session: Optional[requests.Session] = None,
+                 timeouts: Optional[Dict[str, Timeout]] = None,
+                 base_url: str = BASE_URL,
+                 limiter: Optional[RateLimiter] = None):
         """Create a client.
 
         Args:
             api_key: Luno API key id
             api_secret: Luno API secret
             dry_run: if True, actions that affect account (placing/cancelling orders) won't be executed
+            session: optional `requests.Session`; defaults to the shared pooled session so
+                connections stay warm across clients
+            timeouts: optional per-endpoint overrides of `DEFAULT_TIMEOUTS`
+            base_url: API root, overridable for tests
+            limiter: optional `RateLimiter`; defaults to the process-wide limiter
         """
         self.auth = (api_key, api_secret)
         self.dry_run = bool(dry_run)
+        self.session = session or get_shared_session()
+        self.timeouts = dict(DEFAULT_TIMEOUTS)
+        if timeouts:
+            self.timeouts.update(timeouts)
+        self.base_url = base_url.rstrip("/")
+        # Market-data endpoints such as /candles live under /api/exchange/1
+        self.exchange_url = self.base_url[:-len("/1")] + "/exchange/1" if self.base_url.endswith("/1") else self.base_url
+        self.limiter = limiter or get_rate_limiter()
+
+    def _timeout(self, endpoint: str, limit: Optional[float] = None) -> Timeout:
+        """The endpoint's timeout, with each part capped at `limit` seconds when given."""
+        timeout = self.timeouts.get(endpoint, DEFAULT_TIMEOUT)
+        if limit is None:
+            return timeout
+        if isinstance(timeout, tuple):
+            return tuple(min(part, limit) for part in timeout)
+        return min(timeout, limit)
+
+    def _send(self, method: str, endpoint: str, root: Optional[str] = None, timeout: Optional[float] = None,
+              **kwargs) -> requests.Response:
+        """Send a request through the rate limiter on the pooled session.
+
+        `timeout` (seconds) bounds the whole call: the wait for a rate-limit token and
+        then the connect/read timeouts, which get whatever is left of it.
+        """
+        waited = self.limiter.acquire_for(endpoint, max_wait=timeout)
+        if timeout is not None:
+            timeout = max(timeout - waited, 0.1)
+        resp = self.session.request(method, f"{root or self.base_url}/{endpoint}",
+                                    timeout=self._timeout(endpoint, timeout), **kwargs)
+        if resp.status_code == 429:
+            self.limiter.penalize(endpoint, retry_after_seconds(resp.headers.get("Retry-After")))
+        return resp
+
+    def _get(self, endpoint: str, params: Optional[dict] = None, auth: bool = True) -> requests.Response:
+        """GET `endpoint` with its configured timeout."""
+        return self._send("GET", endpoint, params=params, auth=self.auth if auth else None)
+
+    def _post(self, endpoint: str, data: Optional[dict] = None, timeout: Optional[float] = None) -> requests.Response:
+        """Authenticated POST to `endpoint` (`timeout` caps its configured timeout)."""
+        return self._send("POST", endpoint, data=data, auth=self.auth, timeout=timeout)
 
     def get_ticker(self, pair: str = "XBTUSD") -> dict:
         """Get ticker for a trading pair. Returns parsed JSON."""
-        url = f"{BASE_URL}/ticker"
-        resp = requests.get(url, params={"pair": pair})
+        resp = self._get("ticker", params={"pair": pair}, auth=False)
+        resp.raise_for_status()
+        return resp.json()
+
+    def get_tickers(self, pairs: Optional[List[str]] = None) -> dict:
+        """Get tickers for all markets (or only `pairs`) in one call. Returns parsed JSON: {tickers: [...]}."""
+        params = {"pair": list(pairs)} if pairs else None
+        resp = self._get("tickers", params=params, auth=False)
+        resp.raise_for_status()
+        return resp.json()
+
+    def get_candles(self, pair: str, since: int, duration: int = 60) -> dict:
+        """Get up to 1000 OHLCV candles for `pair` starting at `since` (unix ms). Requires auth.
+
+        `duration` is the candle length in seconds (60, 300, 900, 1800, 3600, 10800, 14400,
+        28800, 86400, 259200 or 604800). Returns parsed JSON: {candles: [...], duration, pair}.
+        """
+        resp = self._send("GET", "candles", root=self.exchange_url, auth=self.auth,
+                          params={"pair": pair, "since": int(since), "duration": int(duration)})
         resp.raise_for_status()
         return resp.json()
 
@@ -58,8 +244,7 @@ class LunoClient:
 
         Returns parsed JSON or raises on HTTP error.
         """
-        url = f"{BASE_URL}/getorder"
-        resp = requests.get(url, auth=self.auth, params={"order_id": order_id})
+        resp = self._get("getorder", params={"order_id": order_id})
         resp.raise_for_status()
         return resp.json()
 
@@ -71,26 +256,28 @@ class LunoClient:
         - The account does not have permission to access this endpoint
         - The endpoint URL is wrong (e.g., using /balance instead of /balances)
         """
-        url = f"{BASE_URL}/balances"
         try:
-            resp = requests.get(url, auth=self.auth, timeout=10)
+            resp = self._get("balances")
             resp.raise_for_status()
             return resp.json()
         except requests.exceptions.HTTPError as e:
             if resp.status_code == 404:
-                LOGGER.error(f"404 Not Found on {url}. Check that your API credentials are valid and have balances access. Error: {e}")
-                raise RuntimeError(f"Luno API: 404 Not Found. Verify API credentials and permissions.") from e
+                LOGGER.error(f"404 Not Found on {resp.url}. Check that your API credentials are valid and have balances access. Error: {e}")
+                raise LunoAPIError("Luno API: 404 Not Found. Verify API credentials and permissions.", status_code=404) from e
             elif resp.status_code == 403:
-                LOGGER.error(f"403 Forbidden on {url}. Your API key may not have permission to access balances. Error: {e}")
-                raise RuntimeError(f"Luno API: 403 Forbidden. Check API key permissions.") from e
+                LOGGER.error(f"403 Forbidden on {resp.url}. Your API key may not have permission to access balances. Error: {e}")
+                raise LunoAPIError("Luno API: 403 Forbidden. Check API key permissions.", status_code=403) from e
             else:
                 LOGGER.error(f"HTTP {resp.status_code} error fetching balances: {e}")
                 raise
 
-    def place_order(self, pair: str, side: str, volume: float, price: float, order_type: str = "limit") -> dict:
+    def place_order(self, pair: str, side: str, volume: float, price: float, order_type: str = "limit",
+                    timeout: Optional[float] = None) -> dict:
         """Place an order (limit by default). Side = 'buy' or 'sell'.
 
         Note: This method respects `dry_run` and will return a simulated response when dry.
+        `timeout` (seconds) bounds the rate-limit wait plus the postorder connect/read
+        timeouts, e.g. to a retry budget; RateLimitTimeout is raised if no token comes in time.
         Luno API /postorder endpoint expects:
           - pair: currency pair (string)
           - type: 'BID' (buy) or 'ASK' (sell) — uppercase, required
@@ -98,37 +285,18 @@ class LunoClient:
           - price: limit price (integer or string representing integer)
           - order_type: 'limit' or 'market' (string)
         """
-        side = side.lower()
-        if side not in ("buy", "sell"):
-            raise ValueError("side must be 'buy' or 'sell'")
-
-        # Luno /postorder API expects 'type' parameter with 'BID' (buy) or 'ASK' (sell)
-        luno_type = "BID" if side == "buy" else "ASK"
-        
-        # Price must be sent as integer (no decimals)
-        price_int = int(float(price))
-        
-        # Canonical payload per Luno API spec
-        payload = {
-            "pair": pair,
-            "type": luno_type,
-            "volume": str(volume),
-            "price": str(price_int),
-            "order_type": order_type,
-        }
+        payload = build_order_payload(pair, side, volume, price, order_type)
 
         if self.dry_run:
-            LOGGER.info("DRY_RUN enabled: not placing order: %s", payload)
-            # Simulate an order id for dry run so caller can test order management
-            return {"status": "dry_run", "payload": payload, "order_id": f"dry-{int(time.time())}"}
+            return dry_run_order(payload)
 
-        url = f"{BASE_URL}/postorder"
-        
         try:
-            resp = requests.post(url, auth=self.auth, data=payload, timeout=15)
+            resp = self._post("postorder", data=payload, timeout=timeout)
+        except RateLimitTimeout:
+            raise
         except Exception as e:
             LOGGER.exception('Network error posting order, payload=%s', payload)
-            raise RuntimeError(f"Network error placing order: {e}") from e
+            raise LunoAPIError(f"Network error placing order: {e}") from e
 
         body = None
         try:
@@ -144,31 +312,15 @@ class LunoClient:
                 return {'status': 'ok', 'raw': body}
 
         # Not OK: parse the error and provide user-friendly message
-        error_data = resp.json() if resp.text else {}
+        try:
+            error_data = resp.json() if resp.text else {}
+        except ValueError:
+            error_data = {}
         error_msg = error_data.get('error', resp.text)
-        
-        # Map Luno error messages to user-friendly messages
-        error_map = {
-            'Account has insufficient funds': 'Insufficient balance to place this order',
-            'insufficient funds': 'Insufficient balance to place this order',
-            'InsufficientFunds': 'Insufficient balance to place this order',
-            'Volume is below the minimum': 'Order volume is below the minimum allowed',
-            'Price is below the minimum': 'Order price is below the minimum allowed',
-            'Price is above the maximum': 'Order price is above the maximum allowed',
-        }
-        
-        # Check if error message matches any known Luno error
-        user_friendly_msg = None
-        for luno_err, friendly_msg in error_map.items():
-            if luno_err.lower() in str(error_msg).lower():
-                user_friendly_msg = friendly_msg
-                break
-        
-        # Use friendly message if found, otherwise use raw Luno message
-        final_error = user_friendly_msg or error_msg
-        
+        final_error = order_error_message(error_msg)
+
         LOGGER.error('Postorder failed status=%s error=%s payload=%s', resp.status_code, error_msg, payload)
-        raise RuntimeError(final_error)
+        raise LunoAPIError(final_error, status_code=resp.status_code, error_code=error_data.get('error_code'))
 
     def cancel_order(self, order_id: str) -> dict:
         """Attempt to cancel an order. Luno API variants differ; this is a best-effort example.
@@ -181,8 +333,7 @@ class LunoClient:
 
         # Luno API cancel endpoints vary between account/order types. Here we attempt a generic cancel.
         # If your account/API version uses another endpoint, replace accordingly.
-        url = f"{BASE_URL}/stoporder"
-        resp = requests.post(url, auth=self.auth, data={"order_id": order_id})
+        resp = self._post("stoporder", data={"order_id": order_id})
         # If this endpoint is incorrect for your account, adjust to the correct cancel endpoint.
         resp.raise_for_status()
         return resp.json()
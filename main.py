@@ -7,7 +7,6 @@ Uses environment variables for API credentials.
 
 import os
 import sys
-import time
 import logging
 from dotenv import load_dotenv
 
@@ -29,8 +28,18 @@ logger = logging.getLogger(__name__)
 try:
     from smart_strategy import SmartStrategy
     from luno_client import LunoClient
+    from price_events import PollingPriceSource, PriceEventEngine, make_price_source
+    from multi_pair_engine import MultiPairEngine, parse_pairs
+    from scheduler import Scheduler
     from profit_tracker import ProfitTracker
     from notification_manager import NotificationManager
+    from lot_ledger import get_lot_ledger
+    from compound_manager import CompoundManager
+    from candles import feed_tickers, get_candle_aggregator
+    from candle_store import LIVE_DIR, get_candle_store
+    from state_store import get_state_store
+    from ticker_cache import get_ticker_cache
+    from trend_analyzer import get_trend_analyzer
 except ImportError as e:
     logger.error(f"Failed to import bot modules: {e}")
     sys.exit(1)
@@ -51,7 +60,7 @@ def load_credentials():
 def run_bot():
     """
     Main bot loop that runs continuously.
-    Executes trading strategy every cycle and logs results.
+    Executes the trading strategy whenever the active coin's price changes and logs results.
     """
     # Load credentials
     api_key, api_secret = load_credentials()
@@ -65,57 +74,137 @@ def run_bot():
         strategy = SmartStrategy()
         tracker = ProfitTracker()
         notifier = NotificationManager()
+        ledger = get_lot_ledger()
+        compound = CompoundManager()
         logger.info("✅ Bot components initialized successfully")
     except Exception as e:
         logger.error(f"Failed to initialize bot components: {e}")
         return False
     
-    # Main loop
+    # Strategy evaluation runs when the active coin's price changes, not on a fixed sleep
     cycle = 0
+    cycle_interval = int(os.getenv('BOT_CYCLE_INTERVAL', 60))
+
+    trade_pairs = os.getenv('TRADE_PAIRS', '').strip()
+    if trade_pairs:
+        return run_multi_pair(client, strategy, parse_pairs(trade_pairs), cycle_interval)
+
+    # Periodic work runs on a fixed-rate scheduler instead of inside every price update
+    def refresh_balances():
+        logger.debug(f"Balances: {client.get_balances()}")
+
+    def send_daily_summary():
+        notifier.send_daily_summary(tracker.compute_total_stats())
+        for line in jobs.summary():
+            logger.info(f"Job timing - {line}")
+
+    jobs = Scheduler(name='bot-jobs')
+    jobs.add_job('balance_refresh', refresh_balances, int(os.getenv('BALANCE_REFRESH_INTERVAL', '60')), jitter=2)
+    jobs.add_job('stats_recompute', tracker.save_stats, int(os.getenv('STATS_INTERVAL', '300')), jitter=5)
+    jobs.add_job('daily_summary', send_daily_summary, 86400, run_immediately=False)
+
+    # Candles are built here from the shared /tickers snapshot, not by whoever polls the
+    # dashboard: closed candles go to the live candle store (the dashboard chart) and to
+    # the trend analyzer, whose signals are published for the dashboard's strategy view
+    candles = get_candle_aggregator()
+    candle_pairs = [p.strip().upper() for p in os.getenv(
+        'CANDLE_PAIRS', ','.join(['XBTNGN'] + SmartStrategy.SUPPORTED_COINS)).split(',') if p.strip()]
+    trend = get_trend_analyzer()
+    trend_tf = os.getenv('TREND_TIMEFRAME', '5m')
+
+    def publish_trends(pair, timeframe, candle):
+        trend.on_candle(pair, timeframe, candle)
+        coins = strategy.list_coins()
+        get_state_store().update('trends', {a['coin']: a for a in trend.analyze_all(coins)})
+
+    candles.subscribe(get_candle_store(LIVE_DIR).on_candle)
+    candles.subscribe(publish_trends, timeframe=trend_tf)
+    jobs.add_job('candle_feed', lambda: feed_tickers(candles, get_ticker_cache().get_all(), candle_pairs),
+                 float(os.getenv('CANDLE_TICK_INTERVAL', '10')))
+
+    # Realized profits (matched by the lot ledger) feed the compound split. The compound
+    # state remembers the last journal sell it split, so the startup replay splits sells
+    # recorded while the bot was down (by the dashboard, auto-sell monitor or multi-pair
+    # engine) and skips the rest. On first use, history is treated as already handled.
+    if compound.realized_through is None:
+        compound.mark_realized_through(ledger.journal.max_id())
+    ledger.subscribe(lambda r: compound.record_realized(
+        r, strategy.get_coin_config(r['pair']).get('compound_reinvest_pct', SmartStrategy.DEFAULTS['compound_reinvest_pct'])))
+    ledger.sync()
+    jobs.add_job('lot_ledger_sync', ledger.sync, int(os.getenv('LEDGER_SYNC_INTERVAL', '30')), jitter=2)
+
+    def on_price(update):
+        nonlocal cycle
+        cycle += 1
+        active_coin = update['pair']
+        try:
+            ticker = update['ticker']
+            last_price = update['price']
+            bid = float(ticker.get('bid') or 0)
+
+            logger.info(f"Pair: {active_coin} | Price: {last_price:.2f} | Bid: {bid:.2f}")
+
+            # Execute strategy logic (buy/sell signals)
+            signal = strategy.evaluate_signal(active_coin)
+            logger.info(f"Signal for {active_coin}: {signal}")
+
+            # Log cycle completion
+            logger.info(f"✓ Cycle {cycle} completed successfully")
+
+        except Exception as e:
+            logger.error(f"Error in trading cycle {cycle}: {e}", exc_info=True)
+            # Continue on the next price update even on error
+
+    engine = PriceEventEngine(on_price, debounce=float(os.getenv('PRICE_DEBOUNCE', '0.25')))
+    source = make_price_source(os.getenv('PRICE_SOURCE', 'poll').lower(), engine, [strategy.get_active_coin()],
+                               cycle_interval, client=client, api_key=api_key, api_secret=api_secret,
+                               jitter=float(os.getenv('POLL_JITTER', '0')))
+
+    def follow_active_coin():
+        active_coin = strategy.get_active_coin()
+        if source.pairs != [active_coin]:
+            logger.info(f"Active coin: {active_coin}")
+            source.set_pairs([active_coin])
+
+    if isinstance(source, PollingPriceSource):
+        source.before_poll = follow_active_coin
+    else:
+        jobs.add_job('follow_active_coin', follow_active_coin, 5)
+
     try:
-        logger.info("🚀 Luno Trading Bot started - running continuously...")
-        while True:
-            cycle += 1
-            try:
-                logger.debug(f"Cycle {cycle}: Fetching market data...")
-                
-                # Get active coin from strategy
-                active_coin = strategy.get_active_coin()
-                logger.info(f"Active coin: {active_coin}")
-                
-                # Fetch ticker data
-                ticker = client.get_ticker(active_coin)
-                last_price = float(ticker.get('last', 0))
-                bid = float(ticker.get('bid', 0))
-                
-                logger.info(f"Pair: {active_coin} | Price: {last_price:.2f} | Bid: {bid:.2f}")
-                
-                # Get account balances (LunoClient provides get_balances)
-                balances = client.get_balances()
-                logger.debug(f"Balances: {balances}")
-                
-                # Execute strategy logic (buy/sell signals)
-                signal = strategy.evaluate_signal(active_coin)
-                logger.info(f"Signal for {active_coin}: {signal}")
-                
-                # Log cycle completion
-                logger.info(f"✓ Cycle {cycle} completed successfully")
-                
-            except Exception as e:
-                logger.error(f"Error in trading cycle {cycle}: {e}", exc_info=True)
-                # Continue loop even on error
-            
-            # Sleep before next cycle
-            cycle_interval = int(os.getenv('BOT_CYCLE_INTERVAL', 60))
-            logger.debug(f"Sleeping for {cycle_interval}s before next cycle...")
-            time.sleep(cycle_interval)
-    
+        logger.info("🚀 Luno Trading Bot started - evaluating on price changes...")
+        jobs.start()
+        source.start()
+        engine.run_forever()
     except KeyboardInterrupt:
         logger.info("⏹ Bot interrupted by user")
         return True
     except Exception as e:
         logger.error(f"Fatal error in bot loop: {e}", exc_info=True)
         return False
+    finally:
+        source.stop()
+        engine.stop()
+        jobs.stop()
+
+
+def run_multi_pair(client, strategy, pairs, interval):
+    """Trade every pair in TRADE_PAIRS from this process on one shared price feed."""
+    engine = MultiPairEngine(pairs, client, strategy=strategy,
+                             budget=float(os.getenv('PAIR_BUDGET_NGN', '1000')),
+                             interval=interval, workers=int(os.getenv('PAIR_WORKERS', '4')),
+                             price_source=os.getenv('PRICE_SOURCE', 'poll').lower(),
+                             debounce=float(os.getenv('PRICE_DEBOUNCE', '0.25')))
+    try:
+        logger.info(f"🚀 Trading {len(pairs)} pairs: {', '.join(pairs)}")
+        engine.run_forever()
+    except KeyboardInterrupt:
+        logger.info("⏹ Bot interrupted by user")
+        return True
+    except Exception as e:
+        logger.error(f"Fatal error in multi-pair engine: {e}", exc_info=True)
+        return False
+    return True
 
 
 def main():
@@ -0,0 +1,367 @@
+"""
+Streaming market data from Luno's websocket API with a local order book per pair.
+
+Luno streams one pair per connection (wss://ws.luno.com/api/1/stream/<PAIR>). The
+first message is a full snapshot; every later message carries a sequence number
+and create/delete/trade deltas. `OrderBook` applies them and keeps price levels
+sorted so best bid/ask are O(1); `MarketStream` owns the connection, detects
+sequence gaps and resyncs by reconnecting for a fresh snapshot.
+
+Usage:
+    stream = MarketStream(['XBTNGN'], api_key, api_secret, on_update=print)
+    stream.start_in_thread()
+    stream.books['XBTNGN'].best_bid()
+
+Record messages for offline tests/replay:
+    python market_stream.py record XBTNGN stream_XBTNGN.jsonl --limit 500
+"""
+import asyncio
+import json
+import logging
+import os
+import random
+import threading
+from bisect import bisect_left, insort
+from decimal import Decimal
+from typing import Callable, Dict, List, Optional
+
+import websockets
+
+LOGGER = logging.getLogger(__name__)
+
+STREAM_URL = "wss://ws.luno.com/api/1/stream"
+
+BID = 'BID'
+ASK = 'ASK'
+
+
+class SequenceGap(Exception):
+    """An update arrived out of order; the book must be rebuilt from a new snapshot."""
+
+
+class OrderBook:
+    """Order book for one pair built from Luno's snapshot + sequenced deltas."""
+
+    def __init__(self, pair: str):
+        self.pair = pair
+        self.sequence: Optional[int] = None
+        self.status: Optional[str] = None
+        self.timestamp: Optional[int] = None
+        self.last_trade: Optional[Decimal] = None
+        self._orders: Dict[str, tuple] = {}  # order_id -> (side, price, volume)
+        self._levels = {BID: {}, ASK: {}}   # side -> {price: total volume}
+        self._prices = {BID: [], ASK: []}   # side -> ascending list of prices with volume
+
+    @property
+    def ready(self) -> bool:
+        return self.sequence is not None
+
+    def clear(self):
+        self.sequence = None
+        self._orders.clear()
+        for side in (BID, ASK):
+            self._levels[side].clear()
+            self._prices[side].clear()
+
+    # -- level maintenance ---------------------------------------------
+
+    def _add(self, order_id: str, side: str, price: Decimal, volume: Decimal):
+        self._orders[order_id] = (side, price, volume)
+        levels = self._levels[side]
+        if price in levels:
+            levels[price] += volume
+        else:
+            levels[price] = volume
+            insort(self._prices[side], price)
+
+    def _reduce(self, order_id: str, volume: Optional[Decimal] = None):
+        """Remove `volume` (or all) of an order's remaining volume from the book."""
+        entry = self._orders.get(order_id)
+        if entry is None:
+            return
+        side, price, remaining = entry
+        taken = remaining if volume is None else min(volume, remaining)
+        remaining -= taken
+        if remaining > 0:
+            self._orders[order_id] = (side, price, remaining)
+        else:
+            del self._orders[order_id]
+        levels = self._levels[side]
+        levels[price] -= taken
+        if levels[price] <= 0:
+            del levels[price]
+            prices = self._prices[side]
+            del prices[bisect_left(prices, price)]
+
+    # -- message handling ----------------------------------------------
+
+    def apply_snapshot(self, msg: dict):
+        """Rebuild the book from the initial stream message."""
+        self.clear()
+        for side, key in ((ASK, 'asks'), (BID, 'bids')):
+            for order in msg.get(key) or []:
+                self._add(order['id'], side, Decimal(order['price']), Decimal(order['volume']))
+        self.sequence = int(msg['sequence'])
+        self.status = msg.get('status', self.status)
+        self.timestamp = msg.get('timestamp')
+
+    def apply_update(self, msg: dict):
+        """Apply one sequenced delta. Raises SequenceGap if it doesn't follow the last one."""
+        seq = int(msg['sequence'])
+        if self.sequence is None or seq != self.sequence + 1:
+            raise SequenceGap(f"{self.pair}: expected sequence {None if self.sequence is None else self.sequence + 1}, got {seq}")
+
+        for trade in msg.get('trade_updates') or []:
+            base = Decimal(trade['base'])
+            self._reduce(trade['maker_order_id'], base)
+            if base > 0:
+                self.last_trade = Decimal(trade['counter']) / base
+        create = msg.get('create_update')
+        if create:
+            self._add(create['order_id'], create['type'], Decimal(create['price']), Decimal(create['volume']))
+        delete = msg.get('delete_update')
+        if delete:
+            self._reduce(delete['order_id'])
+        status = msg.get('status_update')
+        if status:
+            self.status = status.get('status', self.status)
+
+        self.sequence = seq
+        self.timestamp = msg.get('timestamp', self.timestamp)
+
+    # -- queries ---------------------------------------------------------
+
+    def best_bid(self) -> Optional[float]:
+        prices = self._prices[BID]
+        return float(prices[-1]) if prices else None
+
+    def best_ask(self) -> Optional[float]:
+        prices = self._prices[ASK]
+        return float(prices[0]) if prices else None
+
+    def spread(self) -> Optional[float]:
+        bid, ask = self.best_bid(), self.best_ask()
+        if bid is None or ask is None:
+            return None
+        return ask - bid
+
+    def depth(self, levels: int = 10) -> Dict[str, List[List[float]]]:
+        """Top `levels` price levels per side as [[price, volume], ...], best first."""
+        bids = self._prices[BID][-levels:][::-1]
+        asks = self._prices[ASK][:levels]
+        return {
+            'bids': [[float(p), float(self._levels[BID][p])] for p in bids],
+            'asks': [[float(p), float(self._levels[ASK][p])] for p in asks],
+        }
+
+    def ticker(self) -> dict:
+        """Ticker-shaped view (same keys as the REST /ticker response)."""
+        return {
+            'pair': self.pair,
+            'timestamp': self.timestamp,
+            'bid': self.best_bid(),
+            'ask': self.best_ask(),
+            'last_trade': float(self.last_trade) if self.last_trade is not None else None,
+            'status': self.status,
+            'sequence': self.sequence,
+        }
+
+
+class MarketStream:
+    """Maintain live order books for `pairs`, one websocket per pair, with automatic resync."""
+
+    def __init__(self, pairs: List[str], api_key: str = None, api_secret: str = None,
+                 url: str = STREAM_URL, on_update: Callable[[str, OrderBook], None] = None,
+                 max_backoff: float = 30.0):
+        """
+        Args:
+            pairs: trading pairs to stream
+            api_key / api_secret: Luno credentials (the stream requires an API key)
+            url: stream root; the pair is appended as the last path segment
+            on_update: optional callback(pair, book) after every applied message
+            max_backoff: cap in seconds for reconnect backoff
+        """
+        self.pairs = list(pairs)
+        self.api_key = api_key if api_key is not None else os.getenv('LUNO_API_KEY', '')
+        self.api_secret = api_secret if api_secret is not None else os.getenv('LUNO_API_SECRET', '')
+        self.url = url.rstrip('/')
+        self.on_update = on_update
+        self.max_backoff = max_backoff
+        self.books = {pair: OrderBook(pair) for pair in self.pairs}
+        self.stats = {pair: {'messages': 0, 'resyncs': 0, 'reconnects': 0} for pair in self.pairs}
+        self._stopping = False
+        self._loop = None
+        self._thread = None
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._main: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+
+    async def _consume(self, pair: str, ws):
+        """Read messages from an open connection until it closes or a gap is detected."""
+        book = self.books[pair]
+        book.clear()
+        async for raw in ws:
+            if self._stopping:
+                return
+            if not raw or raw == '""':
+                continue  # keep-alive
+            msg = json.loads(raw)
+            if not book.ready:
+                book.apply_snapshot(msg)
+            else:
+                book.apply_update(msg)
+            self.stats[pair]['messages'] += 1
+            if self.on_update:
+                try:
+                    self.on_update(pair, book)
+                except Exception as e:
+                    LOGGER.error(f"Stream on_update callback failed for {pair}: {e}")
+
+    async def run_pair(self, pair: str):
+        """Keep `pair`'s book live: connect, consume, and resync on gaps or disconnects."""
+        backoff = 0.5
+        while not self._stopping:
+            try:
+                async with websockets.connect(f"{self.url}/{pair}") as ws:
+                    await ws.send(json.dumps({'api_key_id': self.api_key, 'api_key_secret': self.api_secret}))
+                    backoff = 0.5
+                    await self._consume(pair, ws)
+                if self._stopping:
+                    return
+                self.stats[pair]['reconnects'] += 1
+                LOGGER.info(f"Stream for {pair} closed; reconnecting")
+            except SequenceGap as e:
+                # Reconnecting yields a fresh snapshot, which is the only way to resync
+                self.stats[pair]['resyncs'] += 1
+                LOGGER.warning(f"{e}; resyncing")
+                continue
+            except (OSError, websockets.WebSocketException, ValueError) as e:
+                self.stats[pair]['reconnects'] += 1
+                LOGGER.warning(f"Stream for {pair} failed: {e}; retrying in {backoff:.1f}s")
+            self.books[pair].clear()
+            await asyncio.sleep(backoff * random.uniform(0.8, 1.2))
+            backoff = min(backoff * 2, self.max_backoff)
+
+    def _start_pair(self, pair: str):
+        self._tasks[pair] = self._loop.create_task(self.run_pair(pair))
+
+    def _apply_pairs(self, pairs: List[str]):
+        """Stop streaming pairs that are no longer wanted and start the new ones."""
+        for pair in [p for p in self.pairs if p not in pairs]:
+            task = self._tasks.pop(pair, None)
+            if task is not None:
+                task.cancel()
+            self.books.pop(pair, None)
+            self.stats.pop(pair, None)
+        added = [p for p in pairs if p not in self.books]
+        for pair in added:
+            self.books[pair] = OrderBook(pair)
+            self.stats[pair] = {'messages': 0, 'resyncs': 0, 'reconnects': 0}
+        self.pairs = list(pairs)
+        if self._wake is not None:
+            for pair in added:
+                self._start_pair(pair)
+            self._wake.set()
+
+    def set_pairs(self, pairs: List[str]):
+        """Switch the streamed pairs; safe to call from any thread while the stream runs.
+
+        Connections for dropped pairs are closed and their books discarded; new pairs
+        connect and get a fresh snapshot.
+        """
+        pairs = list(dict.fromkeys(pairs))
+        loop = self._loop
+        if loop is not None and loop.is_running():
+            loop.call_soon_threadsafe(self._apply_pairs, pairs)
+        else:
+            self._apply_pairs(pairs)
+
+    async def run(self):
+        """Run every pair's stream until `stop()` is called (pairs may change meanwhile)."""
+        self._loop = asyncio.get_running_loop()
+        self._main = asyncio.current_task()
+        self._wake = asyncio.Event()
+        for pair in self.pairs:
+            self._start_pair(pair)
+        try:
+            while not self._stopping:
+                self._wake.clear()
+                waiter = self._loop.create_task(self._wake.wait())
+                await asyncio.wait([waiter, *self._tasks.values()], return_when=asyncio.FIRST_COMPLETED)
+                waiter.cancel()
+                for pair, task in list(self._tasks.items()):
+                    if task.done():
+                        del self._tasks[pair]
+                        if not task.cancelled() and task.exception() is not None:
+                            raise task.exception()
+        finally:
+            self._wake = None
+            for task in self._tasks.values():
+                task.cancel()
+            await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+            self._tasks.clear()
+
+    def start_in_thread(self) -> threading.Thread:
+        """Run the streams on a background event loop so threaded code can read `books`."""
+        def run():
+            try:
+                asyncio.run(self.run())
+            except asyncio.CancelledError:
+                pass
+
+        self._thread = threading.Thread(target=run, name='market-stream', daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self):
+        self._stopping = True
+        if self._loop is not None and self._loop.is_running() and self._main is not None:
+            # run() cancels each pair once and waits for its websocket to close cleanly
+            self._loop.call_soon_threadsafe(self._main.cancel)
+        if self._thread is not None:
+            self._thread.join(5)
+
+    def best_prices(self, pair: str) -> Optional[dict]:
+        """Ticker-shaped view of `pair`'s live book, or None until its snapshot has arrived."""
+        book = self.books.get(pair)
+        if book is None or not book.ready:
+            return None
+        return book.ticker()
+
+
+async def record(pair: str, out_path: str, limit: int = 500, url: str = STREAM_URL):
+    """Append the first `limit` raw stream messages for `pair` to `out_path` (one per line)."""
+    async with websockets.connect(f"{url.rstrip('/')}/{pair}") as ws:
+        await ws.send(json.dumps({'api_key_id': os.getenv('LUNO_API_KEY', ''),
+                                  'api_key_secret': os.getenv('LUNO_API_SECRET', '')}))
+        with open(out_path, 'a', encoding='utf-8') as f:
+            for _ in range(limit):
+                raw = await ws.recv()
+                if raw and raw != '""':
+                    f.write(raw.strip() + '\n')
+
+
+if __name__ == '__main__':
+    import argparse
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    parser = argparse.ArgumentParser(description='Record or watch the Luno market stream')
+    sub = parser.add_subparsers(dest='cmd', required=True)
+    rec = sub.add_parser('record')
+    rec.add_argument('pair')
+    rec.add_argument('out')
+    rec.add_argument('--limit', type=int, default=500)
+    watch = sub.add_parser('watch')
+    watch.add_argument('pair')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    if args.cmd == 'record':
+        asyncio.run(record(args.pair, args.out, args.limit))
+    else:
+        stream = MarketStream([args.pair], on_update=lambda pair, book: print(book.ticker()))
+        try:
+            asyncio.run(stream.run())
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,336 @@
+"""
+Trade several pairs from one process.
+
+One `PollingPriceSource` (or the websocket stream) publishes every pair into one
+`PriceEventEngine`, so all pairs share a single /tickers fetch per cache TTL, one
+`LunoClient` session and the process-wide rate limiter and circuit breakers.
+Changed prices are handed to a small worker pool; each pair has its own
+`PairTrader` (position, baseline, state) and never runs twice at once, while a
+slow or failing pair cannot stall the others. A pair that keeps failing is paused
+for a cooldown instead of taking the process down.
+
+State is written per pair to `{PAIR_STATE_DIR}/{pair}.json`, and only when it changed.
+On startup each trader is restored from that file, or from the pair's newest journal
+trade when the journal has a fill the file has not seen (e.g. the state write was lost),
+so an open position survives a restart.
+
+Configuration (.env):
+- TRADE_PAIRS (comma-separated, or "all" for SmartStrategy.SUPPORTED_COINS)
+- PAIR_BUDGET_NGN (quote amount spent per buy, default 1000)
+- PAIR_WORKERS (worker threads, default 4)
+- PAIR_STATE_DIR (default pair_state)
+
+Usage:
+    python multi_pair_engine.py --pairs XBTNGN ETHNGN SOLNGN
+    python multi_pair_engine.py --pairs all --once
+"""
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from circuit_breaker import call_with_retry
+from price_events import PriceEventEngine, make_price_source
+from smart_strategy import SmartStrategy
+from trade_journal import TradeJournal, get_trade_journal
+
+LOGGER = logging.getLogger(__name__)
+
+STATE_DIR = os.getenv('PAIR_STATE_DIR', 'pair_state')
+ORDER_RETRY_BUDGET = float(os.getenv('ORDER_RETRY_BUDGET', '2'))
+
+
+def parse_pairs(value: str) -> List[str]:
+    """TRADE_PAIRS value -> list of pairs ("all" means every supported coin)."""
+    if value.strip().lower() == 'all':
+        return list(SmartStrategy.SUPPORTED_COINS)
+    return [p.strip().upper() for p in value.split(',') if p.strip()]
+
+
+class PairTrader:
+    """SmartStrategy thresholds applied to one pair's price feed.
+
+    While flat the baseline is the high since the last exit (as in `backtest.SmartPolicy`);
+    while long, profit target and stop-loss are checked against the entry price.
+    """
+
+    def __init__(self, pair: str, strategy: SmartStrategy, budget: float,
+                 place: Callable[[str, str, float, float], dict]):
+        self.pair = pair
+        self.strategy = strategy
+        self.budget = budget
+        self.place = place
+        self.baseline = None
+        self.entry_price = None
+        self.volume = 0.0
+        self.last_price = None
+        self.last_action = None
+        self.journal_id = 0
+
+    def restore(self, state: Dict = None, last_trade: Dict = None):
+        """Resume from a saved `state()` and/or the pair's newest journal trade.
+
+        The journal is the record of fills: a trade newer than the state's `journal_id`
+        wins (open after a buy, flat after a sell); otherwise the saved state is used.
+        """
+        if state:
+            self.baseline = state.get('baseline')
+            self.entry_price = state.get('entry_price')
+            self.volume = state.get('volume') or 0.0
+            self.last_price = state.get('last_price')
+            self.last_action = state.get('last_action')
+            self.journal_id = state.get('journal_id') or 0
+        if last_trade and last_trade['id'] > self.journal_id:
+            if last_trade['side'] == 'buy':
+                self.entry_price, self.volume = last_trade['price'], last_trade['volume']
+            else:
+                self.baseline, self.entry_price, self.volume = last_trade['price'], None, 0.0
+            self.journal_id = last_trade['id']
+
+    def on_price(self, price: float) -> Optional[dict]:
+        """Evaluate one price; returns the executed trade, if any."""
+        self.last_price = price
+        if self.entry_price is not None:
+            sell, reason = self.strategy.should_sell(price, self.entry_price, self.pair)
+            if not sell:
+                return None
+            resp = self.place(self.pair, 'sell', self.volume, price)
+            trade = {'action': 'sell', 'price': price, 'volume': self.volume, 'reason': reason, 'response': resp}
+            self.baseline, self.entry_price, self.volume = price, None, 0.0
+            self.last_action = trade
+            return trade
+        if self.baseline is None or price > self.baseline:
+            self.baseline = price
+            return None
+        if not self.strategy.should_buy(price, self.baseline, self.pair):
+            return None
+        volume = self.budget / price
+        resp = self.place(self.pair, 'buy', volume, price)
+        self.entry_price, self.volume = price, volume
+        trade = {'action': 'buy', 'price': price, 'volume': volume, 'reason': 'buy_drop', 'response': resp}
+        self.last_action = trade
+        return trade
+
+    def state(self) -> Dict:
+        return {
+            'pair': self.pair,
+            'last_price': self.last_price,
+            'baseline': self.baseline,
+            'entry_price': self.entry_price,
+            'volume': self.volume,
+            'last_action': self.last_action,
+            'journal_id': self.journal_id,
+        }
+
+
+class MultiPairEngine:
+    """Run one PairTrader per pair on a shared price feed and worker pool."""
+
+    def __init__(self, pairs: List[str], client, strategy: SmartStrategy = None, budget: float = 1000.0,
+                 interval: float = 30.0, workers: int = 4, price_source: str = 'poll', debounce: float = 0.25,
+                 state_dir: str = STATE_DIR, journal: TradeJournal = None, max_errors: int = 5,
+                 cooldown: float = 300.0, clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            pairs: pairs to trade
+            client: LunoClient shared by every pair
+            strategy: SmartStrategy holding per-coin thresholds (default: strategy_config.json)
+            budget: quote amount spent per buy
+            journal: where fills are recorded (default: the process-wide trade journal)
+            interval: seconds between polls (all pairs are read from one cached snapshot)
+            workers: threads evaluating pairs concurrently
+            max_errors / cooldown: a pair failing max_errors times in a row is paused for cooldown seconds
+        """
+        self.client = client
+        self.strategy = strategy or SmartStrategy()
+        self.state_dir = state_dir
+        self.journal = journal or get_trade_journal()
+        self.max_errors = max_errors
+        self.cooldown = cooldown
+        self.clock = clock
+        self.traders: Dict[str, PairTrader] = {p: PairTrader(p, self.strategy, budget, self._place) for p in pairs}
+        self.health: Dict[str, Dict] = {p: {'errors': 0, 'consecutive_errors': 0, 'paused_until': None,
+                                            'evaluations': 0} for p in pairs}
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='pair')
+        self._lock = threading.Lock()
+        self._running: set = set()
+        self._queued: Dict[str, dict] = {}
+        self._written: Dict[str, Dict] = {}
+        self._idle = threading.Condition(self._lock)
+        self.engine = PriceEventEngine(self.submit, debounce=debounce)
+        api_key, api_secret = getattr(client, 'auth', (None, None))
+        self.source = make_price_source(price_source, self.engine, list(pairs), interval, client=client,
+                                        api_key=api_key, api_secret=api_secret)
+        os.makedirs(state_dir, exist_ok=True)
+        for pair in pairs:
+            self.restore(pair)
+
+    def restore(self, pair: str):
+        """Load the pair's state file and the engine's newest journal trade into its trader.
+
+        Only rows the engine recorded itself count: a manual, auto-sell or single-pair bot
+        trade is not a position this engine opened.
+        """
+        path = os.path.join(self.state_dir, f"{pair}.json")
+        state = None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            LOGGER.warning(f"{pair}: ignoring unreadable state file {path}: {e}")
+        try:
+            newest = self.journal.last_trade(pair, source='multi_pair')
+        except Exception as e:
+            LOGGER.warning(f"{pair}: could not read the trade journal: {e}")
+            newest = None
+        trader = self.traders[pair]
+        trader.restore(state, newest)
+        if trader.entry_price is not None:
+            LOGGER.info(f"{pair}: resuming open position {trader.volume:.8f} @ {trader.entry_price}")
+
+    def _place(self, pair: str, side: str, volume: float, price: float) -> dict:
+        resp = call_with_retry(self.client.place_order, endpoint='postorder', idempotent=False,
+                               retries=3, base_delay=0.25, max_delay=1.0, max_elapsed=ORDER_RETRY_BUDGET,
+                               pass_timeout=True,
+                               pair=pair, side=side, volume=volume, price=price)
+        # The order is live from here on: a journal failure must not stop the trader
+        # from recording the position, or the next tick would place it again
+        try:
+            self.traders[pair].journal_id = self.journal.record(pair, side, price, volume, source='multi_pair',
+                                                                details=resp)
+        except Exception as e:
+            LOGGER.error(f"{pair}: {side} placed but not journaled: {e}")
+        return resp
+
+    def submit(self, update: dict):
+        """PriceEventEngine handler: evaluate the pair on the pool, at most one run per pair at a time."""
+        pair = update['pair']
+        if pair not in self.traders:
+            return
+        with self._lock:
+            paused_until = self.health[pair]['paused_until']
+            if paused_until is not None and self.clock() < paused_until:
+                return
+            if pair in self._running:
+                # Coalesce: the running evaluation picks up the newest price when it finishes
+                self._queued[pair] = update
+                return
+            self._running.add(pair)
+        self._pool.submit(self._run_pair, update)
+
+    def _run_pair(self, update: dict):
+        pair = update['pair']
+        while update is not None:
+            self._evaluate(pair, update)
+            with self._lock:
+                update = self._queued.pop(pair, None)
+                if update is None:
+                    self._running.discard(pair)
+                    self._idle.notify_all()
+
+    def _evaluate(self, pair: str, update: dict):
+        health = self.health[pair]
+        try:
+            trade = self.traders[pair].on_price(update['price'])
+            if trade:
+                LOGGER.info(f"{pair}: {trade['action'].upper()} {trade['volume']:.8f} @ {trade['price']} ({trade['reason']})")
+            with self._lock:
+                health['consecutive_errors'] = 0
+                health['paused_until'] = None
+                health['evaluations'] += 1
+        except Exception as e:
+            with self._lock:
+                health['errors'] += 1
+                health['consecutive_errors'] += 1
+                health['evaluations'] += 1
+                failures = health['consecutive_errors']
+                if failures >= self.max_errors:
+                    health['paused_until'] = self.clock() + self.cooldown
+            LOGGER.error(f"{pair}: evaluation failed ({failures} in a row): {e}")
+            if failures >= self.max_errors:
+                LOGGER.warning(f"{pair}: paused for {self.cooldown:.0f}s after repeated failures")
+        self.write_state(pair)
+
+    def write_state(self, pair: str):
+        """Atomically write the pair's state file if anything changed since the last write."""
+        state = self.traders[pair].state()
+        with self._lock:
+            health = dict(self.health[pair])
+        state['health'] = {k: v for k, v in health.items() if k != 'paused_until'}
+        paused_until = health['paused_until']
+        state['paused'] = paused_until is not None and self.clock() < paused_until
+        if self._written.get(pair) == state:
+            return
+        self._written[pair] = state
+        path = os.path.join(self.state_dir, f"{pair}.json")
+        tmp = f"{path}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({**state, 'last_update': datetime.now().isoformat()}, f, default=str)
+        os.replace(tmp, path)
+
+    def wait_idle(self, timeout: float = None) -> bool:
+        """Block until no pair is being evaluated. Returns False on timeout."""
+        with self._idle:
+            return self._idle.wait_for(lambda: not self._running, timeout)
+
+    def status(self) -> Dict[str, Dict]:
+        with self._lock:
+            health = {pair: dict(h) for pair, h in self.health.items()}
+        return {pair: {**trader.state(), **health[pair]} for pair, trader in self.traders.items()}
+
+    def run_once(self):
+        """Poll every pair once, evaluate the changed ones and wait for them to finish."""
+        self.source.poll_once()
+        self.engine.flush(force=True)
+        self.wait_idle()
+
+    def run_forever(self):
+        self.source.start()
+        try:
+            self.engine.run_forever()
+        finally:
+            self.stop()
+
+    def stop(self):
+        self.source.stop()
+        self.engine.stop()
+        self._pool.shutdown(wait=True)
+
+
+if __name__ == '__main__':
+    import argparse
+    from dotenv import load_dotenv
+    from luno_client import LunoClient
+
+    load_dotenv()
+    parser = argparse.ArgumentParser(description='Trade several pairs from one process')
+    parser.add_argument('--pairs', nargs='+', default=parse_pairs(os.getenv('TRADE_PAIRS', 'all')),
+                        help='Pairs to trade, or "all"')
+    parser.add_argument('--budget', type=float, default=float(os.getenv('PAIR_BUDGET_NGN', '1000')))
+    parser.add_argument('--workers', type=int, default=int(os.getenv('PAIR_WORKERS', '4')))
+    parser.add_argument('--interval', type=float, default=float(os.getenv('INTERVAL', '30')))
+    parser.add_argument('--once', action='store_true', help='Evaluate every pair once and exit')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    pairs = parse_pairs(','.join(args.pairs))
+    client = LunoClient(os.getenv('LUNO_API_KEY', ''), os.getenv('LUNO_API_SECRET', ''),
+                        dry_run=os.getenv('DRY_RUN', 'true').lower() in ('1', 'true', 'yes'))
+    engine = MultiPairEngine(pairs, client, budget=args.budget, interval=args.interval, workers=args.workers,
+                             price_source=os.getenv('PRICE_SOURCE', 'poll').lower(),
+                             debounce=float(os.getenv('PRICE_DEBOUNCE', '0.25')))
+    if args.once:
+        engine.run_once()
+        print(json.dumps(engine.status(), indent=2, default=str))
+        engine.stop()
+    else:
+        try:
+            engine.run_forever()
+        except KeyboardInterrupt:
+            LOGGER.info("Multi-pair engine stopped by user")
@@ -0,0 +1,289 @@
+"""
+Parameter sweeps for SmartStrategy thresholds.
+
+Backtests every candidate (buy_drop_pct, sell_profit_pct, stop_loss_pct,
+compound_reinvest_pct) per coin on a process pool using all cores. Price history
+for every coin is copied once into a `multiprocessing.shared_memory` block; workers
+attach to it by name, so a task is just (coin, params) and the series is never
+pickled per task. The best config per coin is written back in the
+strategy_config.json schema.
+
+Search modes:
+- grid: every combination of `steps` evenly spaced values per knob
+- random: `trials` uniform samples
+- bayes: TPE-style search; after a random warm-up, each round samples candidates
+  around the best-scoring quartile and keeps those most likely to be good
+
+Usage:
+    python optimizer.py --prices-dir history/ --coins XBTNGN ETHNGN --mode bayes --trials 2000 --out strategy_config.json
+    python optimizer.py --candles 300 --coins XBTNGN ETHNGN --mode random --trials 5000
+"""
+import json
+import logging
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+from multiprocessing import shared_memory
+from typing import Dict, Iterable, List, Sequence
+
+import numpy as np
+
+from backtest import DEFAULT_FEE, DEFAULT_SLIPPAGE, load_prices, run_backtest, smart_policy
+from smart_strategy import SmartStrategy
+
+LOGGER = logging.getLogger(__name__)
+
+# knob -> (low, high) search bounds
+SEARCH_SPACE = {
+    'buy_drop_pct': (0.5, 10.0),
+    'sell_profit_pct': (1.0, 30.0),
+    'stop_loss_pct': (1.0, 20.0),
+    'compound_reinvest_pct': (0.0, 100.0),
+}
+KNOBS = tuple(SEARCH_SPACE)
+
+
+class SharedPrices:
+    """Price series for several coins in one shared-memory float64 block."""
+
+    def __init__(self, series: Dict[str, Sequence[float]]):
+        self.layout: Dict[str, tuple] = {}
+        total = sum(len(prices) for prices in series.values())
+        self.shm = shared_memory.SharedMemory(create=True, size=max(total, 1) * 8)
+        buf = np.ndarray((total,), dtype=np.float64, buffer=self.shm.buf)
+        offset = 0
+        for coin, prices in series.items():
+            buf[offset:offset + len(prices)] = prices
+            self.layout[coin] = (offset, len(prices))
+            offset += len(prices)
+        del buf
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def close(self):
+        self.shm.close()
+        self.shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# Worker-process state, set by _init_worker
+_worker = {}
+
+
+def _init_worker(shm_name: str, layout: Dict[str, tuple], backtest_kwargs: Dict):
+    logging.getLogger('smart_strategy').setLevel(logging.ERROR)
+    shm = shared_memory.SharedMemory(name=shm_name)
+    _worker.update(shm=shm, layout=layout, kwargs=backtest_kwargs, series={})
+
+
+def _series(coin: str) -> List[float]:
+    # One list per coin per worker: iterating Python floats is much faster than numpy scalars
+    series = _worker['series'].get(coin)
+    if series is None:
+        offset, length = _worker['layout'][coin]
+        view = np.ndarray((length,), dtype=np.float64, buffer=_worker['shm'].buf, offset=offset * 8)
+        series = _worker['series'][coin] = view.tolist()
+        del view
+    return series
+
+
+def evaluate(coin: str, params: Dict, prices: Sequence[float], objective: str = 'return_pct', **backtest_kwargs) -> Dict:
+    """Backtest one parameter set and return {coin, params, score, report}."""
+    report = run_backtest(prices, smart_policy(coin, **params), pair=coin, keep_trades=False, **backtest_kwargs)
+    return {'coin': coin, 'params': params, 'score': report[objective], 'report': report}
+
+
+def _evaluate_task(task):
+    coin, params, objective = task
+    return evaluate(coin, params, _series(coin), objective, **_worker['kwargs'])
+
+
+def grid_candidates(steps: int = 10, space: Dict[str, tuple] = None) -> List[Dict]:
+    space = space or SEARCH_SPACE
+    axes = [np.linspace(low, high, steps).round(2).tolist() for low, high in space.values()]
+    return [dict(zip(space, values)) for values in product(*axes)]
+
+
+def random_candidates(trials: int, space: Dict[str, tuple] = None, rng: random.Random = None) -> List[Dict]:
+    space = space or SEARCH_SPACE
+    rng = rng or random.Random()
+    return [{k: round(rng.uniform(low, high), 2) for k, (low, high) in space.items()} for _ in range(trials)]
+
+
+def tpe_candidates(results: List[Dict], count: int, space: Dict[str, tuple] = None,
+                   rng: np.random.Generator = None, gamma: float = 0.25, pool: int = 20) -> List[Dict]:
+    """Propose `count` params from past results (Tree-structured Parzen Estimator, simplified).
+
+    Past points are split into the best `gamma` fraction and the rest; `pool` candidates
+    per proposal are drawn from Gaussians around good points and the one with the highest
+    good/bad kernel-density ratio is kept.
+    """
+    space = space or SEARCH_SPACE
+    rng = rng or np.random.default_rng()
+    lows = np.array([low for low, _ in space.values()])
+    highs = np.array([high for _, high in space.values()])
+    width = highs - lows
+    ranked = sorted(results, key=lambda r: r['score'], reverse=True)
+    points = np.array([[r['params'][k] for k in space] for r in ranked])
+    points = (points - lows) / width  # normalise to [0, 1]
+    n_good = max(1, int(len(points) * gamma))
+    good, bad = points[:n_good], points[n_good:]
+    # Scott-style shrinkage: narrower kernels as evidence accumulates
+    bandwidth = max(0.05, 0.2 * len(points) ** (-1 / (len(space) + 4)))
+
+    def density(x, centres):
+        if len(centres) == 0:
+            return np.ones(len(x))
+        d = (x[:, None, :] - centres[None, :, :]) / bandwidth
+        return np.exp(-0.5 * (d ** 2).sum(axis=2)).mean(axis=1) + 1e-12
+
+    proposals = []
+    for _ in range(count):
+        centres = good[rng.integers(len(good), size=pool)]
+        x = np.clip(centres + rng.normal(0, bandwidth, size=centres.shape), 0, 1)
+        best = x[np.argmax(density(x, good) / density(x, bad))]
+        values = (lows + best * width).round(2)
+        proposals.append(dict(zip(space, values.tolist())))
+    return proposals
+
+
+class Optimizer:
+    """Run sweeps for several coins on a process pool over shared price history."""
+
+    def __init__(self, series: Dict[str, Sequence[float]], workers: int = None, objective: str = 'return_pct',
+                 capital: float = 100000.0, fee: float = DEFAULT_FEE, slippage: float = DEFAULT_SLIPPAGE):
+        self.series = series
+        self.workers = workers or os.cpu_count() or 1
+        self.objective = objective
+        self.backtest_kwargs = {'capital': capital, 'fee': fee, 'slippage': slippage}
+        self.results: Dict[str, List[Dict]] = {coin: [] for coin in series}
+
+    def _run(self, executor, tasks: List[tuple]) -> List[Dict]:
+        chunksize = max(1, len(tasks) // (self.workers * 4))
+        results = list(executor.map(_evaluate_task, tasks, chunksize=chunksize))
+        for result in results:
+            self.results[result['coin']].append(result)
+        return results
+
+    def sweep(self, mode: str = 'random', trials: int = 1000, steps: int = 6, seed: int = None,
+              rounds: int = 10) -> Dict[str, Dict]:
+        """Run the sweep and return the best result per coin."""
+        py_rng, np_rng = random.Random(seed), np.random.default_rng(seed)
+        coins = list(self.series)
+        with SharedPrices(self.series) as shared, ProcessPoolExecutor(
+                max_workers=self.workers, initializer=_init_worker,
+                initargs=(shared.name, shared.layout, self.backtest_kwargs)) as executor:
+            if mode == 'grid':
+                candidates = grid_candidates(steps)
+                self._run(executor, [(c, p, self.objective) for c in coins for p in candidates])
+            elif mode == 'random':
+                candidates = random_candidates(trials, rng=py_rng)
+                self._run(executor, [(c, p, self.objective) for c in coins for p in candidates])
+            elif mode == 'bayes':
+                warmup = max(self.workers, trials // 4)
+                candidates = random_candidates(warmup, rng=py_rng)
+                self._run(executor, [(c, p, self.objective) for c in coins for p in candidates])
+                per_round = max(1, (trials - warmup) // max(rounds, 1))
+                done = warmup
+                while done < trials:
+                    batch = min(per_round, trials - done)
+                    tasks = [(c, p, self.objective) for c in coins
+                             for p in tpe_candidates(self.results[c], batch, rng=np_rng)]
+                    self._run(executor, tasks)
+                    done += batch
+            else:
+                raise ValueError(f"Unknown sweep mode: {mode}")
+        return self.best()
+
+    def best(self) -> Dict[str, Dict]:
+        return {coin: max(results, key=lambda r: r['score'])
+                for coin, results in self.results.items() if results}
+
+
+def write_best_config(best: Dict[str, Dict], path: str = SmartStrategy.CONFIG_FILE, base: Dict = None) -> Dict:
+    """Merge the best params per coin into a strategy_config.json-shaped file and return it."""
+    if base is None:
+        base = SmartStrategy(config_file=path).config if os.path.exists(path) else None
+    config = json.loads(json.dumps(base)) if base else {'active_coin': 'USDTNGN', 'coins': {}}
+    config.setdefault('coins', {})
+    for coin, result in best.items():
+        coin_cfg = config['coins'].setdefault(coin, dict(SmartStrategy.DEFAULTS))
+        coin_cfg.update({k: round(float(v), 2) for k, v in result['params'].items()})
+    with open(path, 'w') as f:
+        json.dump(config, f, indent=2)
+    LOGGER.info(f"Wrote optimized config for {', '.join(best)} to {path}")
+    return config
+
+
+def load_series(prices_dir: str, coins: Iterable[str]) -> Dict[str, List[float]]:
+    """Read <prices_dir>/<COIN>.csv for each coin (see backtest.load_prices)."""
+    series = {}
+    for coin in coins:
+        path = os.path.join(prices_dir, f"{coin}.csv")
+        if not os.path.exists(path):
+            LOGGER.warning(f"No price history for {coin} at {path}; skipping")
+            continue
+        series[coin] = [price for _, price in load_prices(path)]
+    return series
+
+
+def load_series_from_store(coins: Iterable[str], duration: int = 300, store=None) -> Dict[str, np.ndarray]:
+    """Close prices per coin from the local candle store (memmap views, no parsing)."""
+    from candle_store import get_candle_store
+    store = store or get_candle_store()
+    series = {}
+    for coin in coins:
+        closes = store.closes(coin, duration)
+        if len(closes) == 0:
+            LOGGER.warning(f"No stored {duration}s candles for {coin}; skipping")
+            continue
+        series[coin] = closes
+    return series
+
+
+if __name__ == '__main__':
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description='Sweep SmartStrategy thresholds with parallel backtests')
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--prices-dir', help='Directory with <COIN>.csv price files')
+    source.add_argument('--candles', type=int, metavar='DURATION',
+                        help='Use close prices of stored candles of this duration (see candle_store.py)')
+    parser.add_argument('--coins', nargs='+', default=SmartStrategy.SUPPORTED_COINS)
+    parser.add_argument('--mode', choices=('grid', 'random', 'bayes'), default='random')
+    parser.add_argument('--trials', type=int, default=1000, help='Candidates per coin (random/bayes)')
+    parser.add_argument('--steps', type=int, default=6, help='Values per knob (grid)')
+    parser.add_argument('--objective', default='return_pct', help='Backtest report key to maximise')
+    parser.add_argument('--workers', type=int)
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--fee', type=float, default=DEFAULT_FEE)
+    parser.add_argument('--slippage', type=float, default=DEFAULT_SLIPPAGE)
+    parser.add_argument('--out', default='strategy_config.optimized.json',
+                        help='Config file to write (use strategy_config.json to apply directly)')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    if args.prices_dir:
+        series = load_series(args.prices_dir, args.coins)
+    else:
+        series = load_series_from_store(args.coins, args.candles)
+    if not series:
+        parser.error('no price history found')
+    start = time.perf_counter()
+    opt = Optimizer(series, workers=args.workers, objective=args.objective, fee=args.fee, slippage=args.slippage)
+    best = opt.sweep(args.mode, trials=args.trials, steps=args.steps, seed=args.seed)
+    base = SmartStrategy(config_file=SmartStrategy.CONFIG_FILE).config if os.path.exists(SmartStrategy.CONFIG_FILE) else None
+    write_best_config(best, args.out, base=base)
+    evaluated = sum(len(r) for r in opt.results.values())
+    LOGGER.info(f"Evaluated {evaluated} backtests in {time.perf_counter() - start:.1f}s")
+    for coin, result in best.items():
+        print(coin, json.dumps(result['params']), f"{args.objective}={result['score']}")
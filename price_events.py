@@ -0,0 +1,201 @@
+"""
+Event-driven price updates for the bot loops.
+
+A price source (REST polling through the shared ticker cache, or the websocket
+`MarketStream`) publishes updates into a `PriceEventEngine`. The engine keeps only
+the latest update per pair, waits a short debounce window so bursts coalesce into
+one evaluation, and calls the strategy handler only when the price actually changed.
+In a quiet market the handler - and any state write it does - never runs.
+"""
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from scheduler import Scheduler
+from ticker_cache import get_cached_ticker
+
+LOGGER = logging.getLogger(__name__)
+
+
+def ticker_price(ticker: dict) -> float:
+    """Best single price from a ticker: last trade, then ask, then bid."""
+    return float(ticker.get('last_trade') or ticker.get('ask') or ticker.get('bid') or 0)
+
+
+def _quote(ticker: dict) -> tuple:
+    return (ticker.get('last_trade'), ticker.get('bid'), ticker.get('ask'))
+
+
+class PriceEventEngine:
+    """Coalescing, debounced dispatcher of per-pair price updates to a handler."""
+
+    def __init__(self, handler: Callable[[dict], None], debounce: float = 0.25):
+        """
+        Args:
+            handler: called as handler(update) with update = {pair, price, ticker, received_at}
+            debounce: seconds to wait after the first pending update before dispatching,
+                so a burst of updates is evaluated once with the latest price
+        """
+        self.handler = handler
+        self.debounce = debounce
+        self._pending: Dict[str, dict] = {}
+        self._last_quote: Dict[str, tuple] = {}
+        self._cond = threading.Condition()
+        self._stopping = False
+        self._thread = None
+        self.stats = {'published': 0, 'coalesced': 0, 'unchanged': 0, 'dispatched': 0, 'errors': 0}
+
+    def publish(self, pair: str, ticker: dict):
+        """Offer a new ticker for `pair`. Cheap and non-blocking; safe from any thread."""
+        update = {'pair': pair, 'price': ticker_price(ticker), 'ticker': ticker, 'received_at': time.time()}
+        with self._cond:
+            self.stats['published'] += 1
+            if pair in self._pending:
+                self.stats['coalesced'] += 1
+            self._pending[pair] = update
+            self._cond.notify()
+
+    def _take_batch(self, timeout: Optional[float]) -> List[dict]:
+        with self._cond:
+            if not self._pending and not self._stopping:
+                self._cond.wait(timeout)
+            if not self._pending:
+                return []
+        if self.debounce > 0:
+            time.sleep(self.debounce)
+        with self._cond:
+            batch = list(self._pending.values())
+            self._pending.clear()
+        return batch
+
+    def dispatch(self, batch: List[dict], force: bool = False) -> int:
+        """Run the handler for each changed update in `batch`. Returns how many ran."""
+        ran = 0
+        for update in batch:
+            quote = _quote(update['ticker'])
+            if not force and self._last_quote.get(update['pair']) == quote:
+                self.stats['unchanged'] += 1
+                continue
+            self._last_quote[update['pair']] = quote
+            try:
+                self.handler(update)
+                self.stats['dispatched'] += 1
+                ran += 1
+            except Exception as e:
+                self.stats['errors'] += 1
+                LOGGER.exception("Price handler failed for %s: %s", update['pair'], e)
+        return ran
+
+    def flush(self, force: bool = False) -> int:
+        """Dispatch whatever is pending right now, without waiting or debouncing."""
+        with self._cond:
+            batch = list(self._pending.values())
+            self._pending.clear()
+        return self.dispatch(batch, force=force)
+
+    def run_forever(self):
+        """Dispatch updates until `stop()` is called (blocks the calling thread)."""
+        while not self._stopping:
+            self.dispatch(self._take_batch(timeout=1.0))
+
+    def start(self) -> threading.Thread:
+        self._thread = threading.Thread(target=self.run_forever, name='price-events', daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self):
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(5)
+
+
+class PollingPriceSource:
+    """Poll tickers for `pairs` every `interval` seconds (fixed rate) via the shared ticker cache."""
+
+    def __init__(self, engine: PriceEventEngine, pairs: List[str], interval: float = 30.0,
+                 client=None, fetch: Callable[..., dict] = None, before_poll: Callable[[], None] = None,
+                 jitter: float = 0.0):
+        """
+        Args:
+            engine: engine to publish into
+            pairs: pairs to poll
+            interval: seconds between polls
+            client: LunoClient used for the single-pair fallback
+            fetch: fetch(pair, client) -> ticker (defaults to the shared ticker cache)
+            before_poll: optional hook run before every poll (e.g. reload config, change pairs)
+            jitter: up to this many seconds added to each poll time (the period itself does not drift)
+        """
+        self.engine = engine
+        self.pairs = list(pairs)
+        self.interval = interval
+        self.client = client
+        self.fetch = fetch or get_cached_ticker
+        self.before_poll = before_poll
+        self.jitter = jitter
+        self.scheduler = Scheduler(name='price-poller')
+
+    def set_pairs(self, pairs: List[str]):
+        self.pairs = list(pairs)
+
+    def poll_once(self):
+        """Fetch every pair once and publish the results; errors are logged per pair."""
+        if self.before_poll:
+            try:
+                self.before_poll()
+            except Exception as e:
+                LOGGER.error(f"before_poll hook failed: {e}")
+        for pair in list(self.pairs):
+            try:
+                self.engine.publish(pair, self.fetch(pair, self.client))
+            except Exception as e:
+                LOGGER.warning(f"Price poll failed for {pair}: {e}")
+
+    def start(self) -> threading.Thread:
+        self.scheduler.add_job('ticker_poll', self.poll_once, self.interval, jitter=self.jitter)
+        return self.scheduler.start()
+
+    def stop(self):
+        self.scheduler.stop()
+
+
+class StreamPriceSource:
+    """Publish a ticker-shaped update from `MarketStream` order books on every stream message."""
+
+    def __init__(self, engine: PriceEventEngine, pairs: List[str], api_key: str = None, api_secret: str = None):
+        from market_stream import MarketStream
+        self.engine = engine
+        self.stream = MarketStream(pairs, api_key, api_secret, on_update=self._on_book)
+
+    @property
+    def pairs(self) -> List[str]:
+        return self.stream.pairs
+
+    def _on_book(self, pair, book):
+        self.engine.publish(pair, book.ticker())
+
+    def set_pairs(self, pairs: List[str]):
+        self.stream.set_pairs(pairs)
+
+    def poll_once(self):
+        for pair in self.stream.pairs:
+            ticker = self.stream.best_prices(pair)
+            if ticker:
+                self.engine.publish(pair, ticker)
+
+    def start(self):
+        return self.stream.start_in_thread()
+
+    def stop(self):
+        self.stream.stop()
+
+
+def make_price_source(kind: str, engine: PriceEventEngine, pairs: List[str], interval: float,
+                      client=None, api_key: str = None, api_secret: str = None, before_poll=None,
+                      jitter: float = 0.0):
+    """Build the 'poll' (default) or 'stream' price source (see PRICE_SOURCE in .env)."""
+    if kind == 'stream':
+        return StreamPriceSource(engine, pairs, api_key, api_secret)
+    return PollingPriceSource(engine, pairs, interval, client=client, before_poll=before_poll, jitter=jitter)
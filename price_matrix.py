@@ -0,0 +1,143 @@
+"""
+Preallocated coins x time ring buffer of prices.
+
+Each coin owns one row of a 2-D NumPy array; a new price overwrites the row's oldest
+slot, so appending never allocates and the latest price of every coin is one fancy-index
+away. Rows are added on first sight of a coin (capacity doubles when full), which lets
+the trend scanner cover every Luno market without per-coin Python containers.
+
+`EMAVector` keeps one incremental EMA per row so the scanner updates and reads the
+EMAs of all coins in single NumPy operations.
+"""
+import logging
+from typing import Dict, Iterable, List
+
+import numpy as np
+
+LOGGER = logging.getLogger(__name__)
+
+
+class PriceMatrix:
+    """Ring buffer of the last `capacity` prices for each coin."""
+
+    def __init__(self, capacity: int = 100, coins: Iterable[str] = (), initial_rows: int = 16):
+        self.capacity = capacity
+        self.index: Dict[str, int] = {}
+        coins = list(coins)
+        rows = max(initial_rows, len(coins), 1)
+        self.prices = np.full((rows, capacity), np.nan)
+        self.counts = np.zeros(rows, dtype=np.int64)  # total prices ever appended per row
+        for coin in coins:
+            self.row(coin)
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __contains__(self, coin: str) -> bool:
+        return coin in self.index
+
+    @property
+    def coins(self) -> List[str]:
+        return list(self.index)
+
+    def _grow(self, rows: int):
+        prices = np.full((rows, self.capacity), np.nan)
+        prices[:len(self.prices)] = self.prices
+        counts = np.zeros(rows, dtype=np.int64)
+        counts[:len(self.counts)] = self.counts
+        self.prices, self.counts = prices, counts
+
+    def row(self, coin: str) -> int:
+        """Row index for `coin`, allocating one if it is new."""
+        row = self.index.get(coin)
+        if row is None:
+            row = len(self.index)
+            if row >= len(self.prices):
+                self._grow(len(self.prices) * 2)
+            self.index[coin] = row
+        return row
+
+    def rows_for(self, coins: Iterable[str]) -> np.ndarray:
+        """Row index per coin, -1 for coins never seen (does not allocate)."""
+        return np.fromiter((self.index.get(c, -1) for c in coins), dtype=np.int64)
+
+    def append(self, prices: Dict[str, float]) -> np.ndarray:
+        """Append one price per coin in a single vectorized write. Returns the rows written."""
+        rows = np.fromiter((self.row(c) for c in prices), dtype=np.int64, count=len(prices))
+        values = np.fromiter((float(v) for v in prices.values()), dtype=np.float64, count=len(prices))
+        self.prices[rows, self.counts[rows] % self.capacity] = values
+        self.counts[rows] += 1
+        return rows
+
+    def sizes(self, rows: np.ndarray) -> np.ndarray:
+        """Number of stored prices (<= capacity) for each row; 0 for row -1."""
+        sizes = np.minimum(self.counts[np.maximum(rows, 0)], self.capacity)
+        return np.where(rows >= 0, sizes, 0)
+
+    def latest(self, rows: np.ndarray) -> np.ndarray:
+        """Most recent price for each row (NaN for empty rows or row -1)."""
+        safe = np.maximum(rows, 0)
+        last = self.prices[safe, (self.counts[safe] - 1) % self.capacity]
+        return np.where((rows >= 0) & (self.counts[safe] > 0), last, np.nan)
+
+    def history(self, coin: str) -> np.ndarray:
+        """Stored prices for `coin`, oldest first."""
+        row = self.index.get(coin)
+        if row is None:
+            return np.empty(0)
+        count = int(self.counts[row])
+        if count <= self.capacity:
+            return self.prices[row, :count].copy()
+        start = count % self.capacity
+        return np.concatenate((self.prices[row, start:], self.prices[row, :start]))
+
+
+class EMAVector:
+    """One EMA per row of a price matrix, updated for many rows in one NumPy operation.
+
+    Same seeding rules as `indicators.EMA`; `values` is NaN for rows that are not ready yet.
+    """
+
+    def __init__(self, period: int, seed: str = 'first', rows: int = 16):
+        if period < 1:
+            raise ValueError("period must be >= 1")
+        if seed not in ('first', 'sma'):
+            raise ValueError("seed must be 'first' or 'sma'")
+        self.period = period
+        self.seed = seed
+        self.alpha = 2.0 / (period + 1)
+        self.counts = np.zeros(rows, dtype=np.int64)
+        self.values = np.full(rows, np.nan)
+        self._seed_sums = np.zeros(rows)
+
+    def _ensure(self, rows: int):
+        if rows <= len(self.values):
+            return
+        size = max(rows, len(self.values) * 2)
+        self.counts = np.concatenate((self.counts, np.zeros(size - len(self.counts), dtype=np.int64)))
+        self.values = np.concatenate((self.values, np.full(size - len(self.values), np.nan)))
+        self._seed_sums = np.concatenate((self._seed_sums, np.zeros(size - len(self._seed_sums))))
+
+    def update(self, rows: np.ndarray, prices: np.ndarray) -> np.ndarray:
+        """Feed prices[i] to row rows[i] (rows must be unique). Returns the updated values."""
+        if len(rows) == 0:
+            return self.values[rows]
+        self._ensure(int(rows.max()) + 1)
+        self.counts[rows] += 1
+        current = self.values[rows]
+        ready = ~np.isnan(current)
+        updated = np.where(ready, current + self.alpha * (prices - current), np.nan)
+        if self.seed == 'first':
+            updated = np.where(ready, updated, prices)
+        else:
+            seeding = rows[~ready]
+            self._seed_sums[seeding] += prices[~ready]
+            seeded = self._seed_sums[rows] / self.period
+            updated = np.where(~ready & (self.counts[rows] == self.period), seeded, updated)
+        self.values[rows] = updated
+        return updated
+
+    def get(self, rows: np.ndarray) -> np.ndarray:
+        """Values for `rows`; NaN for row -1 or rows never updated."""
+        self._ensure(int(rows.max()) + 1 if len(rows) else 0)
+        return np.where(rows >= 0, self.values[np.maximum(rows, 0)], np.nan)
@@ -1,163 +1,227 @@
 """
 Profit tracking and analytics: compute daily P/L, balances, and statistics.
+
+Stats come from running per-pair and per-day aggregates. Each call folds in only the
+journal rows added since the last one (tracked by row id), so a stats request costs
+O(new trades) rather than O(history). The aggregates and the last row id are
+checkpointed to PROFIT_CHECKPOINT, so a restart resumes from there instead of
+replaying the journal.
+
+Configuration (.env):
+- PROFIT_CHECKPOINT (default profit_rollup.json)
+- PROFIT_CHECKPOINT_INTERVAL (seconds between checkpoint writes, default 30)
 """
-import csv
 import json
 import os
-from datetime import datetime, timedelta
-from typing import Dict, List, Tuple
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List
 import logging
 
+from trade_journal import TradeJournal, get_trade_journal
+
 LOGGER = logging.getLogger(__name__)
 
+CHECKPOINT_FILE = os.getenv('PROFIT_CHECKPOINT', 'profit_rollup.json')
+CHECKPOINT_INTERVAL = float(os.getenv('PROFIT_CHECKPOINT_INTERVAL', '30'))
+
+
+def _empty_rollup(journal_path: str) -> Dict:
+    return {'journal': journal_path, 'last_id': 0, 'pairs': {}, 'days': {}}
+
+
 class ProfitTracker:
-    """Track profits, losses, and trading statistics."""
-    
-    def __init__(self, trade_log_path: str = 'trade_log.csv', state_file: str = 'bot_state.json'):
-        self.trade_log_path = trade_log_path
+    """Track profits, losses, and trading statistics (incremental over the trade journal)."""
+
+    def __init__(self, journal: TradeJournal = None, state_file: str = 'bot_state.json',
+                 checkpoint_file: str = CHECKPOINT_FILE, checkpoint_interval: float = CHECKPOINT_INTERVAL):
+        self._journal = journal
         self.state_file = state_file
-    
+        self.checkpoint_file = checkpoint_file
+        self.checkpoint_interval = checkpoint_interval
+        self._rollup = None
+        self._lock = threading.Lock()
+        self._checkpointed_id = None
+        self._checkpointed_at = 0.0
+        self._saved_id = None
+        self._stats_cache = None
+
+    @property
+    def journal(self) -> TradeJournal:
+        if self._journal is None:
+            self._journal = get_trade_journal()
+        return self._journal
+
+    def _load_checkpoint(self) -> Dict:
+        try:
+            with open(self.checkpoint_file, 'r', encoding='utf-8') as f:
+                rollup = json.load(f)
+            if rollup.get('journal') == self.journal.path and rollup.get('last_id', 0) <= self.journal.max_id():
+                self._checkpointed_id = rollup['last_id']
+                return rollup
+            LOGGER.info("Profit checkpoint is for a different journal; rebuilding")
+        except (OSError, ValueError, KeyError):
+            pass
+        return _empty_rollup(self.journal.path)
+
+    def checkpoint(self):
+        """Persist the aggregates and the last consumed row id (atomic replace)."""
+        with self._lock:
+            if self._rollup is None or self._rollup['last_id'] == self._checkpointed_id:
+                return
+            tmp = f"{self.checkpoint_file}.{os.getpid()}.tmp"
+            try:
+                with open(tmp, 'w', encoding='utf-8') as f:
+                    json.dump(self._rollup, f)
+                os.replace(tmp, self.checkpoint_file)
+            except OSError as e:
+                LOGGER.error(f"Failed to write profit checkpoint: {e}")
+                return
+            self._checkpointed_id = self._rollup['last_id']
+            self._checkpointed_at = time.monotonic()
+
+    def refresh(self) -> int:
+        """Fold trades added to the journal since the last call. Returns how many were folded."""
+        with self._lock:
+            if self._rollup is None:
+                self._rollup = self._load_checkpoint()
+            rollup = self._rollup
+            folded = 0
+            for t in self.journal.iter_trades(after_id=rollup['last_id']):
+                notional = t['price'] * t['volume']
+                p = rollup['pairs'].setdefault(t['pair'], {'trades': 0, 'bought': 0.0, 'sold': 0.0,
+                                                           'buy_count': 0, 'sell_count': 0, 'fees': 0.0})
+                day = datetime.fromtimestamp(t['ts']).strftime('%Y-%m-%d')
+                d = rollup['days'].setdefault(day, {'trades': 0, 'bought': 0.0, 'sold': 0.0})
+                p['trades'] += 1
+                d['trades'] += 1
+                p['fees'] += t['fee'] or 0.0
+                if t['side'] == 'buy':
+                    p['bought'] += notional
+                    p['buy_count'] += 1
+                    d['bought'] += notional
+                else:
+                    p['sold'] += notional
+                    p['sell_count'] += 1
+                    d['sold'] += notional
+                rollup['last_id'] = t['id']
+                folded += 1
+        if folded and time.monotonic() - self._checkpointed_at >= self.checkpoint_interval:
+            self.checkpoint()
+        return folded
+
     def read_trades(self) -> List[Dict]:
-        """Read all trades from trade_log.csv."""
-        trades = []
-        if not os.path.exists(self.trade_log_path):
-            return trades
-        
+        """All trades, oldest first, in the legacy trade_log.csv row shape."""
         try:
-            with open(self.trade_log_path, 'r', newline='') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    trades.append(row)
+            return [{'timestamp': t['ts'], 'pair': t['pair'], 'action': t['action'] or t['side'],
+                     'price': t['price'], 'volume': t['volume'], 'details': t['details'] or ''}
+                    for t in self.journal.iter_trades()]
         except Exception as e:
             LOGGER.error(f"Failed to read trades: {e}")
-        
-        return trades
-    
+            return []
+
     def compute_pair_stats(self, pair: str) -> Dict:
         """Compute P/L stats for a trading pair."""
-        trades = self.read_trades()
-        pair_trades = [t for t in trades if t.get('pair') == pair]
-        
-        if not pair_trades:
+        self.refresh()
+        with self._lock:
+            t = dict(self._rollup['pairs'].get(pair) or {})
+        if not t:
             return {'pair': pair, 'trades': 0, 'total_bought': 0, 'total_sold': 0, 'pnl_ngn': 0, 'pnl_pct': 0}
-        
-        total_bought = 0.0
-        total_sold = 0.0
-        buys = []
-        sells = []
-        
-        for t in pair_trades:
-            action = t.get('action', '').lower()
-            price = float(t.get('price', 0) or 0)
-            volume = float(t.get('volume', 0) or 0)
-            
-            if 'buy' in action:
-                total_bought += price * volume
-                buys.append({'price': price, 'volume': volume})
-            elif 'sell' in action:
-                total_sold += price * volume
-                sells.append({'price': price, 'volume': volume})
-        
+        total_bought, total_sold = t['bought'], t['sold']
         pnl_ngn = total_sold - total_bought
         pnl_pct = (pnl_ngn / total_bought * 100) if total_bought > 0 else 0
-        
+
         return {
             'pair': pair,
-            'trades': len(pair_trades),
+            'trades': t['trades'],
             'total_bought_ngn': round(total_bought, 2),
             'total_sold_ngn': round(total_sold, 2),
             'pnl_ngn': round(pnl_ngn, 2),
             'pnl_pct': round(pnl_pct, 2),
-            'buy_count': len(buys),
-            'sell_count': len(sells),
+            'buy_count': t['buy_count'],
+            'sell_count': t['sell_count'],
         }
-    
+
     def compute_daily_pnl(self) -> Dict[str, Dict]:
-        """Compute P/L grouped by day."""
-        trades = self.read_trades()
+        """Compute P/L grouped by (local) day."""
+        self.refresh()
+        with self._lock:
+            return self._daily_pnl()
+
+    def _daily_pnl(self) -> Dict[str, Dict]:
+        # Caller holds self._lock: refresh() grows these dicts from other threads
         daily_stats = {}
-        
-        for t in trades:
-            timestamp_str = t.get('timestamp', '')
-            if not timestamp_str:
-                continue
-            
-            try:
-                dt = datetime.strptime(timestamp_str, '%Y-%m-%d %H:%M:%S')
-                date_key = dt.strftime('%Y-%m-%d')
-            except Exception:
-                continue
-            
-            if date_key not in daily_stats:
-                daily_stats[date_key] = {'bought': 0, 'sold': 0, 'trades': 0}
-            
-            action = t.get('action', '').lower()
-            price = float(t.get('price', 0) or 0)
-            volume = float(t.get('volume', 0) or 0)
-            
-            if 'buy' in action:
-                daily_stats[date_key]['bought'] += price * volume
-            elif 'sell' in action:
-                daily_stats[date_key]['sold'] += price * volume
-            
-            daily_stats[date_key]['trades'] += 1
-        
-        # Compute P/L for each day
-        for date_key in daily_stats:
-            daily_stats[date_key]['pnl_ngn'] = round(daily_stats[date_key]['sold'] - daily_stats[date_key]['bought'], 2)
-            daily_stats[date_key]['pnl_pct'] = (
-                round(daily_stats[date_key]['pnl_ngn'] / daily_stats[date_key]['bought'] * 100, 2)
-                if daily_stats[date_key]['bought'] > 0 else 0
-            )
-        
+        for day in sorted(self._rollup['days']):
+            d = self._rollup['days'][day]
+            pnl_ngn = round(d['sold'] - d['bought'], 2)
+            daily_stats[day] = {
+                'bought': d['bought'],
+                'sold': d['sold'],
+                'trades': d['trades'],
+                'pnl_ngn': pnl_ngn,
+                'pnl_pct': round(pnl_ngn / d['bought'] * 100, 2) if d['bought'] > 0 else 0,
+            }
         return daily_stats
-    
+
     def compute_total_stats(self) -> Dict:
         """Compute overall trading statistics."""
-        trades = self.read_trades()
-        
-        total_bought = 0.0
-        total_sold = 0.0
-        pairs = set()
-        
-        for t in trades:
-            action = t.get('action', '').lower()
-            price = float(t.get('price', 0) or 0)
-            volume = float(t.get('volume', 0) or 0)
-            pair = t.get('pair', '')
-            
-            if pair:
-                pairs.add(pair)
-            
-            if 'buy' in action:
-                total_bought += price * volume
-            elif 'sell' in action:
-                total_sold += price * volume
-        
+        self.refresh()
+        with self._lock:
+            return self._total_stats()
+
+    def _total_stats(self) -> Dict:
+        # Caller holds self._lock
+        totals = self._rollup['pairs']
+        total_bought = sum(t['bought'] for t in totals.values())
+        total_sold = sum(t['sold'] for t in totals.values())
+
         pnl_ngn = total_sold - total_bought
         pnl_pct = (pnl_ngn / total_bought * 100) if total_bought > 0 else 0
-        
+
         return {
-            'total_trades': len(trades),
-            'unique_pairs': len(pairs),
+            'total_trades': sum(t['trades'] for t in totals.values()),
+            'unique_pairs': len([p for p in totals if p]),
             'total_bought_ngn': round(total_bought, 2),
             'total_sold_ngn': round(total_sold, 2),
             'pnl_ngn': round(pnl_ngn, 2),
             'pnl_pct': round(pnl_pct, 2),
             'timestamp': datetime.now().isoformat(),
         }
-    
+
+    def get_stats(self) -> Dict:
+        """Total and daily stats (what save_stats writes), without touching the disk.
+
+        The result is cached until a new trade is folded in, so dashboards polling this
+        share one computation; treat it as read-only.
+        """
+        self.refresh()
+        with self._lock:
+            last_id = self._rollup['last_id']
+            if self._stats_cache is None or self._stats_cache[0] != last_id:
+                self._stats_cache = (last_id, {
+                    'total': self._total_stats(),
+                    'daily': self._daily_pnl(),
+                })
+            return self._stats_cache[1]
+
     def save_stats(self, stats_file: str = 'profit_stats.json'):
-        """Compute and save all stats to a JSON file for dashboard display."""
+        """Compute and save all stats to a JSON file for dashboard display.
+
+        The file is only rewritten when new trades arrived since the last save.
+        """
         try:
-            stats = {
-                'total': self.compute_total_stats(),
-                'daily': self.compute_daily_pnl(),
-            }
-            
+            stats = self.get_stats()
+            with self._lock:
+                last_id = self._stats_cache[0]
+            if self._saved_id == last_id and os.path.exists(stats_file):
+                return stats
+
             with open(stats_file, 'w') as f:
                 json.dump(stats, f, indent=2)
-            
+            self._saved_id = last_id
+            self.checkpoint()
+
             LOGGER.info(f"Saved profit stats to {stats_file}")
             return stats
         except Exception as e:
@@ -0,0 +1,324 @@
+"""
+Client-side token-bucket rate limiter for Luno API calls.
+
+Public market data (ticker/tickers) and authenticated calls (balances, orders) draw
+from separate buckets. Order placement and cancellation use the priority lane:
+they jump ahead of any waiting normal caller and may spend a small reserve of
+tokens that ticker/balance polling can never touch, so an order is not starved
+by the dashboard, the auto-sell monitor and the bot loop polling at once.
+
+The bot, the auto-sell monitor and every dashboard worker are separate processes
+calling Luno with the same key, so by default the buckets live in a small state file
+(LUNO_RATE_STATE_FILE) that every process updates under an inter-process lock: the
+budgets below are totals for the whole deployment, and a 429 penalty seen by one
+process pauses all of them. Set LUNO_RATE_STATE_FILE to an empty value to give each
+process its own in-memory buckets instead.
+
+Budgets (configurable via .env, shared by every process using the same state file):
+- LUNO_PUBLIC_RATE / LUNO_PUBLIC_BURST (default 5/s, burst 10)
+- LUNO_PRIVATE_RATE / LUNO_PRIVATE_BURST (default 5/s, burst 10)
+- LUNO_ORDER_RESERVE (default 2 tokens of the private burst held for orders)
+- LUNO_RATE_STATE_FILE (default rate_limit.json; empty = per-process buckets)
+"""
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+from typing import Callable, Dict, Optional
+
+from state_store import _file_lock
+
+LOGGER = logging.getLogger(__name__)
+
+PRIORITY_NORMAL = 0
+PRIORITY_ORDER = 1
+
+PUBLIC = 'public'
+PRIVATE = 'private'
+
+# endpoint -> (bucket, priority)
+ENDPOINT_LANES = {
+    'ticker': (PUBLIC, PRIORITY_NORMAL),
+    'tickers': (PUBLIC, PRIORITY_NORMAL),
+    'balances': (PRIVATE, PRIORITY_NORMAL),
+    'balance': (PRIVATE, PRIORITY_NORMAL),
+    'getorder': (PRIVATE, PRIORITY_NORMAL),
+    'candles': (PRIVATE, PRIORITY_NORMAL),
+    'postorder': (PRIVATE, PRIORITY_ORDER),
+    'stoporder': (PRIVATE, PRIORITY_ORDER),
+}
+
+
+class RateLimitTimeout(RuntimeError):
+    """Raised when a token could not be acquired within the allowed wait."""
+
+
+class TokenBucket:
+    """Thread-safe token bucket with a priority lane and a reserve for priority callers."""
+
+    def __init__(self, name: str, rate: float, capacity: float, reserve: float = 0.0,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            name: bucket name used in metrics and errors
+            rate: tokens added per second
+            capacity: maximum tokens (burst size)
+            reserve: tokens only PRIORITY_ORDER callers may spend
+            clock: monotonic time source (injectable for tests)
+        """
+        self.name = name
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.reserve = min(float(reserve), self.capacity)
+        self.clock = clock
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._cond = threading.Condition()
+        self._waiting = {PRIORITY_NORMAL: 0, PRIORITY_ORDER: 0}
+        self._granted = {PRIORITY_NORMAL: 0, PRIORITY_ORDER: 0}
+        self._wait_seconds = 0.0
+        self._penalties = 0
+
+    def _refill(self):
+        now = self.clock()
+        elapsed = now - self._updated
+        if elapsed > 0:
+            self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+            self._updated = now
+
+    @contextmanager
+    def _state(self):
+        """Hold the bucket's token state for one check-and-update (in memory here)."""
+        yield
+
+    def _orders_waiting(self) -> bool:
+        return self._waiting[PRIORITY_ORDER] > 0
+
+    def _order_blocked(self, delay: float):
+        """Called when an order has to wait `delay` seconds for a token."""
+
+    def _can_take(self, priority: int) -> bool:
+        if priority >= PRIORITY_ORDER:
+            return self._tokens >= 1
+        # Normal callers yield to waiting orders and never dip into the reserve
+        return not self._orders_waiting() and self._tokens >= 1 + self.reserve
+
+    def _time_until_available(self, priority: int) -> float:
+        floor = 1 if priority >= PRIORITY_ORDER else 1 + self.reserve
+        missing = floor - self._tokens
+        return max(missing / self.rate, 0.001) if self.rate > 0 else 1.0
+
+    def try_acquire(self, priority: int = PRIORITY_NORMAL) -> bool:
+        """Take a token without waiting. Returns False if none is available."""
+        with self._cond, self._state():
+            self._refill()
+            if self._can_take(priority):
+                self._tokens -= 1
+                self._granted[priority] += 1
+                return True
+            return False
+
+    def acquire(self, priority: int = PRIORITY_NORMAL, max_wait: float = None) -> float:
+        """Block until a token is available. Returns seconds waited.
+
+        Raises RateLimitTimeout if `max_wait` seconds pass first.
+        """
+        start = self.clock()
+        with self._cond:
+            self._waiting[priority] += 1
+            try:
+                while True:
+                    with self._state():
+                        self._refill()
+                        taken = self._can_take(priority)
+                        if taken:
+                            self._tokens -= 1
+                        else:
+                            delay = self._time_until_available(priority)
+                            if priority >= PRIORITY_ORDER:
+                                self._order_blocked(delay)
+                    if taken:
+                        self._granted[priority] += 1
+                        waited = self.clock() - start
+                        self._wait_seconds += waited
+                        return waited
+                    if max_wait is not None:
+                        remaining = max_wait - (self.clock() - start)
+                        if remaining <= 0:
+                            raise RateLimitTimeout(f"Rate limit: no '{self.name}' token within {max_wait}s")
+                        delay = min(delay, remaining)
+                    self._cond.wait(delay)
+            finally:
+                self._waiting[priority] -= 1
+                # Wake normal waiters that were yielding to this caller
+                self._cond.notify_all()
+
+    def penalize(self, seconds: float):
+        """Empty the bucket and push refills `seconds` into the future (e.g. after an HTTP 429)."""
+        with self._cond, self._state():
+            self._refill()
+            self._tokens = -seconds * self.rate
+            self._penalties += 1
+
+    def metrics(self) -> Dict:
+        """Current token level, waiters and counters for this bucket."""
+        with self._cond, self._state():
+            self._refill()
+            return {
+                'tokens': round(self._tokens, 3),
+                'capacity': self.capacity,
+                'rate_per_sec': self.rate,
+                'order_reserve': self.reserve,
+                'waiting_normal': self._waiting[PRIORITY_NORMAL],
+                'waiting_order': self._waiting[PRIORITY_ORDER],
+                'granted_normal': self._granted[PRIORITY_NORMAL],
+                'granted_order': self._granted[PRIORITY_ORDER],
+                'total_wait_sec': round(self._wait_seconds, 3),
+                'penalties': self._penalties,
+            }
+
+
+class SharedTokenBucket(TokenBucket):
+    """Token bucket whose level lives in `path`, shared by every process that uses it.
+
+    Each check-and-update re-reads the level under an inter-process lock on the file,
+    so tokens taken (or a 429 penalty applied) by one process are seen by the others.
+    Waiting orders mark the file so normal callers in other processes yield to them
+    too. The clock must be wall time, since the timestamps are compared across processes.
+    """
+
+    def __init__(self, name: str, rate: float, capacity: float, reserve: float = 0.0,
+                 path: str = 'rate_limit.json', clock: Callable[[], float] = time.time):
+        super().__init__(name, rate, capacity, reserve, clock=clock)
+        self.path = path
+        self._orders_until = 0.0
+        self._warned = False
+
+    def _read(self) -> Dict:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                doc = json.load(f)
+            return doc if isinstance(doc, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def _warn(self, e: Exception):
+        if not self._warned:
+            self._warned = True
+            LOGGER.warning(f"Rate limit state file {self.path} unusable ({e}); limiting this process only")
+
+    @contextmanager
+    def _state(self):
+        with ExitStack() as stack:
+            try:
+                stack.enter_context(_file_lock(self.path))
+            except OSError as e:
+                # Keep limiting with the last known level rather than failing every API call
+                self._warn(e)
+                yield
+                return
+            doc = self._read()
+            entry = doc.get(self.name)
+            if isinstance(entry, dict):
+                self._tokens = min(float(entry.get('tokens', self.capacity)), self.capacity)
+                self._updated = float(entry.get('updated', self.clock()))
+                self._orders_until = float(entry.get('orders_until', 0.0))
+            yield
+            doc[self.name] = {'tokens': self._tokens, 'updated': self._updated, 'orders_until': self._orders_until}
+            tmp = f"{self.path}.{os.getpid()}.tmp"
+            try:
+                with open(tmp, 'w', encoding='utf-8') as f:
+                    json.dump(doc, f)
+                os.replace(tmp, self.path)
+            except OSError as e:
+                self._warn(e)
+
+    def _orders_waiting(self) -> bool:
+        return super()._orders_waiting() or self.clock() < self._orders_until
+
+    def _time_until_available(self, priority: int) -> float:
+        delay = super()._time_until_available(priority)
+        if priority < PRIORITY_ORDER and self._orders_until > self.clock():
+            delay = max(delay, self._orders_until - self.clock())
+        return delay
+
+    def _order_blocked(self, delay: float):
+        # Long enough to cover this waiter's next check; it renews the mark until served
+        self._orders_until = max(self._orders_until, self.clock() + delay + 0.05)
+
+
+class RateLimiter:
+    """Public and private token buckets shared by every client (and, with a state file, every process)."""
+
+    def __init__(self, public_rate: float = 5.0, public_burst: float = 10.0,
+                 private_rate: float = 5.0, private_burst: float = 10.0,
+                 order_reserve: float = 2.0, max_wait: float = 30.0, state_file: Optional[str] = None):
+        """
+        Args:
+            state_file: share the buckets with other processes through this file
+                (see SharedTokenBucket); None keeps them in this process only
+        """
+        self.max_wait = max_wait
+        if state_file:
+            self.buckets = {
+                PUBLIC: SharedTokenBucket(PUBLIC, public_rate, public_burst, path=state_file),
+                PRIVATE: SharedTokenBucket(PRIVATE, private_rate, private_burst, reserve=order_reserve,
+                                           path=state_file),
+            }
+        else:
+            self.buckets = {
+                PUBLIC: TokenBucket(PUBLIC, public_rate, public_burst),
+                PRIVATE: TokenBucket(PRIVATE, private_rate, private_burst, reserve=order_reserve),
+            }
+
+    @classmethod
+    def from_env(cls) -> 'RateLimiter':
+        return cls(
+            public_rate=float(os.getenv('LUNO_PUBLIC_RATE', '5')),
+            public_burst=float(os.getenv('LUNO_PUBLIC_BURST', '10')),
+            private_rate=float(os.getenv('LUNO_PRIVATE_RATE', '5')),
+            private_burst=float(os.getenv('LUNO_PRIVATE_BURST', '10')),
+            order_reserve=float(os.getenv('LUNO_ORDER_RESERVE', '2')),
+            state_file=os.getenv('LUNO_RATE_STATE_FILE', 'rate_limit.json') or None,
+        )
+
+    def acquire_for(self, endpoint: str, max_wait: float = None) -> float:
+        """Acquire a token in the lane configured for `endpoint` (see ENDPOINT_LANES).
+
+        `max_wait` shortens the limiter's own `max_wait` for this call (e.g. to what is
+        left of a caller's retry budget); RateLimitTimeout is raised when it runs out.
+        """
+        bucket, priority = ENDPOINT_LANES.get(endpoint, (PRIVATE, PRIORITY_NORMAL))
+        if max_wait is None or (self.max_wait is not None and self.max_wait < max_wait):
+            max_wait = self.max_wait
+        waited = self.buckets[bucket].acquire(priority, max_wait=max_wait)
+        if waited > 1:
+            LOGGER.info(f"Rate limiter delayed {endpoint} by {waited:.2f}s")
+        return waited
+
+    def penalize(self, endpoint: str, seconds: float = 1.0):
+        """Back off the bucket serving `endpoint` after the exchange returned 429."""
+        bucket, _ = ENDPOINT_LANES.get(endpoint, (PRIVATE, PRIORITY_NORMAL))
+        LOGGER.warning(f"429 from Luno on {endpoint}; pausing '{bucket}' calls for {seconds:.1f}s")
+        self.buckets[bucket].penalize(seconds)
+
+    def metrics(self) -> Dict[str, Dict]:
+        """Token levels and counters for every bucket."""
+        return {name: bucket.metrics() for name, bucket in self.buckets.items()}
+
+
+# Global limiter instance
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Get the process-wide rate limiter (initialize from env if needed)."""
+    global _limiter
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                _limiter = RateLimiter.from_env()
+    return _limiter
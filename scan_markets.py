@@ -1,9 +1,11 @@
 """Scan candidate NGN markets and report assets affordable with a given NGN budget."""
 from dotenv import load_dotenv
 import os
-import requests
 import json
 
+from luno_client import LunoClient
+from ticker_cache import get_ticker_cache
+
 load_dotenv()
 PAIR_CANDIDATES = [
     'XBTNGN',
@@ -19,18 +21,23 @@ PAIR_CANDIDATES = [
 # Some symbols may not exist on Luno; we'll try common variants.
 PAIR_CANDIDATES = ['XBTNGN', 'ETHNGN', 'XRPNGN', 'LTCNGN', 'BCHNGN', 'USDTNGN']
 
-API = 'https://api.luno.com/api/1/ticker'
-
 budget_ngn = float(os.getenv('SCAN_BUDGET_NGN', '770'))
 
+# One bulk /tickers call covers every candidate; pairs Luno doesn't list are skipped
+try:
+    tickers = get_ticker_cache().get_all()
+except Exception as e:
+    # Fall back to one /ticker call per pair, so one failure doesn't abort the scan
+    print(f'Bulk /tickers failed ({e}); querying pairs one by one')
+    tickers = None
+    client = LunoClient('', '')
+
 results = []
 for pair in PAIR_CANDIDATES:
     try:
-        r = requests.get(API, params={'pair': pair}, timeout=10)
-        if r.status_code != 200:
-            # skip unavailable pair
+        t = tickers.get(pair) if tickers is not None else client.get_ticker(pair)
+        if t is None:
             continue
-        t = r.json()
         # parse ask price (string)
         ask = t.get('ask') or t.get('last_trade') or t.get('bid')
         if ask is None:
@@ -38,7 +45,8 @@ for pair in PAIR_CANDIDATES:
         ask_f = float(ask)
         results.append({'pair': pair, 'ask': ask_f, 'raw': t})
     except Exception as e:
-        # ignore errors for missing pairs
+        # skip unavailable pairs
+        print(f'Skipping {pair}: {e}')
         continue
 
 # Find which assets can be bought with budget (i.e., 1 unit cost <= budget)
@@ -0,0 +1,180 @@
+"""
+Fixed-rate scheduler for periodic bot jobs (ticker poll, balance refresh, stats, summaries).
+
+Each job's run times are computed from its start time - t0 + k * interval - rather than
+"now + interval" after the work finished, so the period does not drift by the work time
+or by retries. A per-run jitter (0..jitter seconds) is added on top of that grid without
+accumulating, which spreads several processes' polls apart. When a run takes longer than
+its budget it is counted as an overrun; when the scheduler falls behind by whole
+intervals the missed runs are skipped (and counted) instead of firing back to back.
+
+Every job reports lag (how late it started versus its scheduled time) and duration, so
+an overrunning cycle is visible in `stats()` and in the log.
+
+Usage:
+    scheduler = Scheduler()
+    scheduler.add_job('balance_refresh', refresh_balances, interval=60, jitter=2)
+    scheduler.start()
+"""
+import logging
+import random
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+LOGGER = logging.getLogger(__name__)
+
+
+class Job:
+    """One periodic job and its timing metrics."""
+
+    def __init__(self, name: str, func: Callable[[], None], interval: float, jitter: float = 0.0,
+                 budget: float = None, start_at: float = 0.0, rng: random.Random = None):
+        if interval <= 0:
+            raise ValueError(f"Job {name} needs a positive interval")
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.jitter = max(0.0, jitter)
+        self.budget = budget if budget is not None else interval
+        self.rng = rng or random.Random()
+        self.slot = start_at                  # unjittered scheduled time of the next run
+        self.next_run = start_at + self._jitter()
+        self.stats = {'runs': 0, 'errors': 0, 'overruns': 0, 'skipped': 0,
+                      'last_lag': 0.0, 'max_lag': 0.0, 'avg_lag': 0.0,
+                      'last_duration': 0.0, 'max_duration': 0.0, 'last_error': None}
+
+    def _jitter(self) -> float:
+        return self.rng.uniform(0, self.jitter) if self.jitter else 0.0
+
+    def run(self, now: float, clock: Callable[[], float]):
+        """Run the job (it is due at `now`) and schedule the next slot on the fixed grid."""
+        lag = max(0.0, now - self.next_run)
+        started = clock()
+        try:
+            self.func()
+        except Exception as e:
+            self.stats['errors'] += 1
+            self.stats['last_error'] = str(e)
+            LOGGER.error(f"Scheduled job {self.name} failed: {e}")
+        duration = clock() - started
+
+        s = self.stats
+        s['runs'] += 1
+        s['last_lag'] = lag
+        s['max_lag'] = max(s['max_lag'], lag)
+        s['avg_lag'] = lag if s['runs'] == 1 else s['avg_lag'] * 0.9 + lag * 0.1
+        s['last_duration'] = duration
+        s['max_duration'] = max(s['max_duration'], duration)
+        if duration > self.budget:
+            s['overruns'] += 1
+            LOGGER.warning(f"Job {self.name} overran its budget: {duration:.2f}s > {self.budget:.2f}s")
+
+        self.slot += self.interval
+        behind = started + duration - self.slot
+        if behind >= self.interval:
+            # Fell behind by whole intervals: skip the missed slots rather than bursting
+            missed = int(behind // self.interval)
+            s['skipped'] += missed
+            self.slot += missed * self.interval
+        self.next_run = self.slot + self._jitter()
+
+    def snapshot(self) -> Dict:
+        return {'interval': self.interval, 'jitter': self.jitter, 'budget': self.budget, **self.stats}
+
+
+class Scheduler:
+    """Run registered jobs on one thread at fixed rates."""
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic, name: str = 'scheduler'):
+        self.clock = clock
+        self.name = name
+        self.jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def add_job(self, name: str, func: Callable[[], None], interval: float, jitter: float = 0.0,
+                budget: float = None, run_immediately: bool = True, rng: random.Random = None) -> Job:
+        """Register `func` to run every `interval` seconds.
+
+        Args:
+            jitter: up to this many seconds are added to each run (not accumulated)
+            budget: seconds a run may take before it counts as an overrun (default: interval)
+            run_immediately: first run now instead of one interval from now
+        """
+        start_at = self.clock() + (0.0 if run_immediately else interval)
+        job = Job(name, func, interval, jitter, budget, start_at, rng)
+        with self._lock:
+            self.jobs[name] = job
+        self._wake.set()
+        return job
+
+    def remove_job(self, name: str):
+        with self._lock:
+            self.jobs.pop(name, None)
+
+    def set_interval(self, name: str, interval: float):
+        """Change a job's period; the new grid starts from its next scheduled run."""
+        with self._lock:
+            self.jobs[name].interval = interval
+        self._wake.set()
+
+    def run_pending(self) -> int:
+        """Run every job that is due now, earliest first. Returns how many ran."""
+        ran = 0
+        with self._lock:
+            jobs = sorted(self.jobs.values(), key=lambda j: j.next_run)
+        for job in jobs:
+            now = self.clock()
+            if job.next_run > now:
+                break
+            job.run(now, self.clock)
+            ran += 1
+        return ran
+
+    def next_wakeup(self) -> Optional[float]:
+        with self._lock:
+            return min((j.next_run for j in self.jobs.values()), default=None)
+
+    def run_forever(self):
+        while not self._stop.is_set():
+            self._wake.clear()
+            self.run_pending()
+            due = self.next_wakeup()
+            timeout = 1.0 if due is None else max(0.0, due - self.clock())
+            self._wake.wait(timeout)
+
+    def start(self) -> threading.Thread:
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run_forever, name=self.name, daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(5)
+
+    def stats(self) -> Dict[str, Dict]:
+        """Per-job metrics: runs, errors, overruns, skipped, lag and duration (seconds)."""
+        now = self.clock()
+        with self._lock:
+            jobs = list(self.jobs.values())
+        result = {}
+        for job in jobs:
+            snap = job.snapshot()
+            snap['next_run_in'] = round(max(0.0, job.next_run - now), 3)
+            result[job.name] = snap
+        return result
+
+    def summary(self) -> List[str]:
+        """One log line per job, worst average lag first."""
+        lines = []
+        for name, s in sorted(self.stats().items(), key=lambda kv: -kv[1]['avg_lag']):
+            lines.append(f"{name}: runs={s['runs']} errors={s['errors']} overruns={s['overruns']} "
+                         f"skipped={s['skipped']} lag avg={s['avg_lag']:.3f}s max={s['max_lag']:.3f}s "
+                         f"duration max={s['max_duration']:.3f}s")
+        return lines
@@ -26,10 +26,15 @@ class SmartStrategy:
     # Supported coins on Luno
     SUPPORTED_COINS = ['BTCNGN', 'XRPNGN', 'SOLNGN', 'ETHNGN', 'USDCNGN', 'USDTNGN']
     
-    def __init__(self, config_file: str = None):
-        """Initialize strategy with config file."""
+    def __init__(self, config_file: str = None, config: Dict = None):
+        """Initialize strategy with config file.
+
+        Pass `config` (same schema as strategy_config.json) to run from memory without
+        reading or writing the file, e.g. in backtests and parameter sweeps.
+        """
         self.config_file = config_file or self.CONFIG_FILE
-        self.config = self._load_config()
+        self._persist = config is None
+        self.config = self._load_config() if config is None else config
         
     def _load_config(self) -> Dict:
         """Load strategy config from JSON file or create defaults."""
@@ -55,6 +60,8 @@ class SmartStrategy:
     
     def _save_config(self, cfg: Dict):
         """Save config to JSON file."""
+        if not self._persist:
+            return
         try:
             with open(self.config_file, 'w') as f:
                 json.dump(cfg, f, indent=2)
@@ -0,0 +1,250 @@
+"""
+Shared bot_state.json with per-section ownership, atomic writes and write coalescing.
+
+Several processes write the state file: the bot loop (`bot`, `trends`), the auto-sell monitor
+(`autosell`) and the dashboard (`tradingview`, `settings`, `manual` trades). Each owns
+one section and only ever replaces that section, so writers no longer clobber each
+other's keys. A write re-reads the file under an inter-process lock, swaps in the
+section and atomically renames a temp file over the original, so readers never see
+half-written JSON.
+
+`StateStore.update` is cheap: changes are kept in memory and written at most once
+per `min_interval` seconds (STATE_WRITE_INTERVAL), the last update winning.
+
+The file carries a `_version` counter as its first key, bumped on every write.
+`StateReader` serves the parsed state from memory while the file's stat (mtime, size,
+inode) is unchanged - one os.stat per read, no open. When the stat changes it reads
+just the head of the file for the version and re-parses only if that changed too. `flatten` gives the legacy flat view the dashboard reads (flat sections
+merged oldest-write first, `tradingview`/`settings`/`trends` nested).
+
+Configuration (.env):
+- STATE_WRITE_INTERVAL (seconds, default 1)
+"""
+import atexit
+import json
+import logging
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+LOGGER = logging.getLogger(__name__)
+
+STATE_FILE = 'bot_state.json'
+WRITE_INTERVAL = float(os.getenv('STATE_WRITE_INTERVAL', '1'))
+
+# Sections merged into the top level of the flat view; the rest stay nested under their name
+FLAT_SECTIONS = ('legacy', 'bot', 'autosell', 'manual')
+NESTED_SECTIONS = ('tradingview', 'settings', 'trends')
+
+_VERSION_RE = re.compile(rb'"_version":\s*(\d+)')
+
+
+@contextmanager
+def _file_lock(path: str):
+    """Exclusive inter-process lock on `path` + '.lock'."""
+    with open(path + '.lock', 'a+b') as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def read_document(path: str = STATE_FILE) -> Dict:
+    """Parsed state file in sectioned form ({_version, _seq, section: {...}}).
+
+    A pre-sections flat file is returned as one `legacy` section plus the nested ones.
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            doc = json.load(f)
+    except (OSError, ValueError):
+        return {'_version': 0, '_seq': {}}
+    if not isinstance(doc, dict):
+        return {'_version': 0, '_seq': {}}
+    if '_version' not in doc:
+        legacy = {k: v for k, v in doc.items() if k not in NESTED_SECTIONS}
+        doc = {'_version': 0, '_seq': {'legacy': 0}, 'legacy': legacy,
+               **{k: doc[k] for k in NESTED_SECTIONS if isinstance(doc.get(k), dict)}}
+    doc.setdefault('_seq', {})
+    return doc
+
+
+def read_version(path: str = STATE_FILE) -> Optional[int]:
+    """The file's `_version` read from its first bytes only, or None if absent/unreadable."""
+    try:
+        with open(path, 'rb') as f:
+            match = _VERSION_RE.search(f.read(64))
+    except OSError:
+        return None
+    return int(match.group(1)) if match else None
+
+
+def flatten(doc: Dict) -> Dict:
+    """Legacy flat view: flat sections merged in write order, nested sections under their name."""
+    seq = doc.get('_seq', {})
+    flat = {}
+    for name in sorted((s for s in FLAT_SECTIONS if isinstance(doc.get(s), dict)), key=lambda s: seq.get(s, 0)):
+        flat.update(doc[name])
+    for name in NESTED_SECTIONS:
+        if isinstance(doc.get(name), dict):
+            flat[name] = doc[name]
+    flat['_version'] = doc.get('_version', 0)
+    return flat
+
+
+class StateStore:
+    """Coalescing writer for the sections this process owns."""
+
+    def __init__(self, path: str = STATE_FILE, min_interval: float = WRITE_INTERVAL,
+                 clock: Callable[[], float] = time.monotonic):
+        self.path = path
+        self.min_interval = min_interval
+        self.clock = clock
+        self._pending: Dict[str, tuple] = {}   # section -> (data, merge)
+        self._lock = threading.Lock()
+        self._last_write: Optional[float] = None
+        self._timer: Optional[threading.Timer] = None
+        self.stats = {'updates': 0, 'writes': 0, 'coalesced': 0, 'errors': 0}
+
+    def update(self, section: str, data: Dict, merge: bool = False):
+        """Set `section` to `data` (or merge keys into it) and schedule a write.
+
+        The write happens now if the last one was at least `min_interval` ago, otherwise
+        once the interval has passed; updates in between are coalesced.
+        """
+        with self._lock:
+            self.stats['updates'] += 1
+            previous = self._pending.get(section)
+            if previous is not None:
+                self.stats['coalesced'] += 1
+                if merge:
+                    data = {**previous[0], **data}
+                    merge = previous[1]
+            self._pending[section] = (dict(data), merge)
+            wait = 0.0 if self._last_write is None else self._last_write + self.min_interval - self.clock()
+            if wait > 0:
+                if self._timer is None:
+                    self._timer = threading.Timer(wait, self.flush)
+                    self._timer.daemon = True
+                    self._timer.start()
+                return
+        self.flush()
+
+    def flush(self) -> bool:
+        """Write all pending sections now. Returns True if anything was written."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            pending, self._pending = self._pending, {}
+            if not pending:
+                return False
+            try:
+                self._write(pending)
+            except Exception as e:
+                self.stats['errors'] += 1
+                LOGGER.error(f"Failed to write {self.path}: {e}")
+                # Keep the changes for the next attempt unless newer ones arrived
+                for section, value in pending.items():
+                    self._pending.setdefault(section, value)
+                return False
+            self._last_write = self.clock()
+            self.stats['writes'] += 1
+            return True
+
+    def _write(self, pending: Dict[str, tuple]):
+        with _file_lock(self.path):
+            doc = read_document(self.path)
+            version = doc.get('_version', 0) + 1
+            seq = doc['_seq']
+            for section, (data, merge) in pending.items():
+                current = doc.get(section) if merge and isinstance(doc.get(section), dict) else {}
+                doc[section] = {**current, **data}
+                seq[section] = version
+            # _version first so readers can check it without parsing the whole file
+            out = {'_version': version, '_seq': seq,
+                   **{k: v for k, v in doc.items() if k not in ('_version', '_seq')}}
+            tmp = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(out, f, default=str)
+            os.replace(tmp, self.path)
+
+    def close(self):
+        self.flush()
+
+
+def _stat_key(path: str) -> Optional[tuple]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    # os.replace gives the file a new inode, so same-size writes within one mtime tick still differ
+    return st.st_mtime_ns, st.st_size, st.st_ino
+
+
+class StateReader:
+    """Read the flat state view from an in-process cache keyed on the file's stat and `_version`."""
+
+    def __init__(self, path: str = STATE_FILE):
+        self.path = path
+        self._version: Optional[int] = None
+        self._state: Optional[Dict] = None
+        self._stat: Optional[tuple] = None
+        self._lock = threading.Lock()
+        self.stats = {'reads': 0, 'stat_hits': 0, 'version_hits': 0, 'parses': 0}
+
+    def read(self) -> Optional[Dict]:
+        """Flat state, or None if there is no state file."""
+        self.stats['reads'] += 1
+        key = _stat_key(self.path)
+        if key is None:
+            return None
+        if key == self._stat and self._state is not None:
+            self.stats['stat_hits'] += 1
+            return dict(self._state)
+        # One reload per change even when many request threads notice it at once
+        with self._lock:
+            if key != self._stat or self._state is None:
+                version = read_version(self.path)
+                if version is not None and version == self._version and self._state is not None:
+                    self.stats['version_hits'] += 1
+                else:
+                    doc = read_document(self.path)
+                    self._state = flatten(doc)
+                    self._version = doc.get('_version')
+                    self.stats['parses'] += 1
+                self._stat = key
+            return dict(self._state)
+
+
+# Process-wide stores, one per path
+_stores: Dict[str, StateStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_state_store(path: str = STATE_FILE) -> StateStore:
+    """Get the process-wide store for `path` (flushed at interpreter exit)."""
+    with _stores_lock:
+        store = _stores.get(path)
+        if store is None:
+            store = _stores[path] = StateStore(path)
+            atexit.register(store.close)
+        return store
@@ -1,15 +1,27 @@
 """Strategy helpers: EMA calculation and simple signal generation."""
 from typing import List, Optional
-import pandas as pd
+
+from indicators import EMA
 
 
 def compute_ema(prices: List[float], period: int = 10) -> Optional[float]:
-    """Compute EMA over a list of prices using pandas. Returns last EMA value or None if insufficient data."""
+    """Compute EMA over a list of prices (same result as pandas ewm(span=period, adjust=False)).
+
+    Returns last EMA value or None if insufficient data.
+    """
     if not prices or len(prices) < 2:
         return None
-    s = pd.Series(prices)
-    ema = s.ewm(span=period, adjust=False).mean()
-    return float(ema.iloc[-1])
+    return EMA(period).update_many(prices)
+
+
+def _signal(last_price: float, ema: Optional[float]) -> str:
+    if ema is None:
+        return "hold"
+    if last_price < ema:
+        return "buy"
+    if last_price > ema:
+        return "sell"
+    return "hold"
 
 
 def signal_from_prices(prices: List[float], period: int = 10) -> str:
@@ -21,14 +33,28 @@ def signal_from_prices(prices: List[float], period: int = 10) -> str:
     """
     if len(prices) < 2:
         return "hold"
+    return _signal(prices[-1], compute_ema(prices, period))
 
-    ema = compute_ema(prices, period)
-    if ema is None:
-        return "hold"
 
-    last_price = prices[-1]
-    if last_price < ema:
-        return "buy"
-    if last_price > ema:
-        return "sell"
-    return "hold"
+class EMASignal:
+    """Incremental form of `signal_from_prices` for a live price feed: O(1) per price."""
+
+    def __init__(self, period: int = 10):
+        self.period = period
+        self.ema = EMA(period)
+
+    def update(self, price: float) -> str:
+        """Add a price and return the signal for it ('hold' until two prices were seen)."""
+        ema = self.ema.update(price)
+        if self.ema.count < 2:
+            return "hold"
+        return _signal(float(price), ema)
+
+    def reset(self):
+        self.ema = EMA(self.period)
+
+    def snapshot(self) -> dict:
+        return self.ema.snapshot()
+
+    def restore(self, snap: dict):
+        self.ema = EMA.from_snapshot(snap)
@@ -0,0 +1,17 @@
+import os
+import tempfile
+
+import pytest
+
+from fake_exchange import FakeExchange
+
+# Keep the process-wide limiter's shared state out of the working tree
+os.environ.setdefault('LUNO_RATE_STATE_FILE', os.path.join(tempfile.mkdtemp(), 'rate_limit.json'))
+
+
+@pytest.fixture
+def fake_exchange():
+    """A running local fake Luno exchange; use `fake_exchange.base_url` as the client base_url."""
+    exchange = FakeExchange().start()
+    yield exchange
+    exchange.stop()
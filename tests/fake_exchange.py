@@ -0,0 +1,144 @@
+"""Local fake Luno exchange (aiohttp) for testing the API clients without the network.
+
+Runs in a background thread with its own event loop so both `LunoClient` and
+`AsyncLunoClient` can talk to it over real HTTP on 127.0.0.1.
+"""
+import asyncio
+import base64
+import itertools
+import threading
+
+from aiohttp import web
+
+
+class FakeExchange:
+    """In-memory exchange with tickers, balances and an order book of posted orders."""
+
+    def __init__(self, api_key='key', api_secret='secret'):
+        self.credentials = (api_key, api_secret)
+        self.tickers = {
+            'XBTNGN': {'pair': 'XBTNGN', 'bid': '150000000', 'ask': '150100000', 'last_trade': '150050000', 'status': 'ACTIVE'},
+            'BTCNGN': {'pair': 'BTCNGN', 'bid': '150000000', 'ask': '150100000', 'last_trade': '150050000', 'status': 'ACTIVE'},
+            'ETHNGN': {'pair': 'ETHNGN', 'bid': '5000000', 'ask': '5010000', 'last_trade': '5005000', 'status': 'ACTIVE'},
+            'XRPNGN': {'pair': 'XRPNGN', 'bid': '3500', 'ask': '3510', 'last_trade': '3505', 'status': 'ACTIVE'},
+            'SOLNGN': {'pair': 'SOLNGN', 'bid': '230000', 'ask': '231000', 'last_trade': '230500', 'status': 'ACTIVE'},
+            'USDCNGN': {'pair': 'USDCNGN', 'bid': '1450', 'ask': '1460', 'last_trade': '1455', 'status': 'ACTIVE'},
+            'USDTNGN': {'pair': 'USDTNGN', 'bid': '1455', 'ask': '1465', 'last_trade': '1460', 'status': 'ACTIVE'},
+        }
+        self.balances = {'NGN': 100000.0, 'XBT': 0.01}
+        self.orders = {}
+        self.candles = {}  # (pair, duration) -> list of Luno candle dicts, oldest first
+        self.candle_page = 1000
+        self.requests = []
+        self._ids = itertools.count(1)
+        self._loop = None
+        self._runner = None
+        self._thread = None
+        self.base_url = None
+
+    # -- handlers -------------------------------------------------------
+
+    def _authorized(self, request):
+        header = request.headers.get('Authorization', '')
+        if not header.startswith('Basic '):
+            return False
+        user, _, password = base64.b64decode(header[6:]).decode().partition(':')
+        return (user, password) == self.credentials
+
+    async def _ticker(self, request):
+        self.requests.append(('ticker', dict(request.query)))
+        ticker = self.tickers.get(request.query.get('pair', ''))
+        if ticker is None:
+            return web.json_response({'error': 'Invalid pair', 'error_code': 'ErrInvalidPair'}, status=400)
+        return web.json_response(ticker)
+
+    async def _tickers(self, request):
+        self.requests.append(('tickers', dict(request.query)))
+        return web.json_response({'tickers': list(self.tickers.values())})
+
+    async def _balances(self, request):
+        self.requests.append(('balances', {}))
+        if not self._authorized(request):
+            return web.json_response({'error': 'Unauthorized'}, status=403)
+        return web.json_response({'balance': [
+            {'account_id': str(i), 'asset': asset, 'balance': str(amount), 'reserved': '0', 'unconfirmed': '0'}
+            for i, (asset, amount) in enumerate(self.balances.items())
+        ]})
+
+    async def _postorder(self, request):
+        form = dict(await request.post())
+        self.requests.append(('postorder', form))
+        if not self._authorized(request):
+            return web.json_response({'error': 'Unauthorized'}, status=403)
+        cost = float(form['volume']) * float(form['price'])
+        if form['type'] == 'BID' and cost > self.balances.get('NGN', 0):
+            return web.json_response({'error': 'Account has insufficient funds', 'error_code': 'ErrInsufficientFunds'}, status=400)
+        order_id = f"FAKE{next(self._ids)}"
+        self.orders[order_id] = dict(form, order_id=order_id, state='PENDING')
+        return web.json_response({'order_id': order_id})
+
+    async def _stoporder(self, request):
+        form = dict(await request.post())
+        self.requests.append(('stoporder', form))
+        order = self.orders.get(form.get('order_id'))
+        if order is None:
+            return web.json_response({'error': 'Order not found'}, status=404)
+        order['state'] = 'COMPLETE'
+        return web.json_response({'success': True})
+
+    async def _getorder(self, request):
+        self.requests.append(('getorder', dict(request.query)))
+        order = self.orders.get(request.query.get('order_id'))
+        if order is None:
+            return web.json_response({'error': 'Order not found'}, status=404)
+        return web.json_response(order)
+
+    async def _candles(self, request):
+        self.requests.append(('candles', dict(request.query)))
+        if not self._authorized(request):
+            return web.json_response({'error': 'Unauthorized'}, status=403)
+        pair, duration = request.query.get('pair', ''), int(request.query.get('duration', 60))
+        since = int(request.query.get('since', 0))
+        candles = [c for c in self.candles.get((pair, duration), []) if c['timestamp'] >= since]
+        return web.json_response({'candles': candles[:self.candle_page], 'duration': duration, 'pair': pair})
+
+    # -- lifecycle ------------------------------------------------------
+
+    def _app(self):
+        app = web.Application()
+        app.router.add_get('/api/1/ticker', self._ticker)
+        app.router.add_get('/api/1/tickers', self._tickers)
+        app.router.add_get('/api/1/balances', self._balances)
+        app.router.add_get('/api/1/balance', self._balances)
+        app.router.add_post('/api/1/postorder', self._postorder)
+        app.router.add_post('/api/1/stoporder', self._stoporder)
+        app.router.add_get('/api/1/getorder', self._getorder)
+        app.router.add_get('/api/exchange/1/candles', self._candles)
+        return app
+
+    def start(self):
+        started = threading.Event()
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self._loop)
+            self._runner = web.AppRunner(self._app())
+            self._loop.run_until_complete(self._runner.setup())
+            site = web.TCPSite(self._runner, '127.0.0.1', 0)
+            self._loop.run_until_complete(site.start())
+            port = site._server.sockets[0].getsockname()[1]
+            self.base_url = f"http://127.0.0.1:{port}/api/1"
+            started.set()
+            self._loop.run_forever()
+
+        self._thread = threading.Thread(target=run, daemon=True)
+        self._thread.start()
+        started.wait(5)
+        return self
+
+    def stop(self):
+        if self._loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result(5)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(5)
@@ -0,0 +1,65 @@
+"""Local websocket server replaying recorded Luno stream messages (see `market_stream.py record`)."""
+import asyncio
+import threading
+
+import websockets
+
+
+class ReplayServer:
+    """Serve recordings on ws://127.0.0.1:<port>/api/1/stream/<PAIR>.
+
+    `recordings` maps pair -> list of files; each new connection for a pair replays the
+    next file (the last one repeats), then stays open like an idle live stream.
+    """
+
+    def __init__(self, recordings):
+        self.recordings = {pair: list(files) for pair, files in recordings.items()}
+        self.connections = {pair: 0 for pair in recordings}
+        self.credentials = []
+        self.url = None
+        self._loop = None
+        self._server = None
+        self._thread = None
+
+    async def _handler(self, ws):
+        pair = ws.request.path.rstrip('/').rsplit('/', 1)[-1]
+        self.credentials.append(await ws.recv())
+        files = self.recordings.get(pair)
+        if not files:
+            await ws.close()
+            return
+        path = files[min(self.connections[pair], len(files) - 1)]
+        self.connections[pair] += 1
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                await ws.send(line.strip())
+        await ws.wait_closed()
+
+    def start(self):
+        started = threading.Event()
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self._loop)
+            async def serve():
+                return await websockets.serve(self._handler, '127.0.0.1', 0)
+
+            self._server = self._loop.run_until_complete(serve())
+            port = next(iter(self._server.sockets)).getsockname()[1]
+            self.url = f"ws://127.0.0.1:{port}/api/1/stream"
+            started.set()
+            self._loop.run_forever()
+
+        self._thread = threading.Thread(target=run, daemon=True)
+        self._thread.start()
+        started.wait(5)
+        return self
+
+    def stop(self):
+        async def shutdown():
+            self._server.close()
+            await self._server.wait_closed()
+
+        asyncio.run_coroutine_threadsafe(shutdown(), self._loop).result(5)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(5)
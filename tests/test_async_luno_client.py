@@ -0,0 +1,65 @@
+import asyncio
+
+import pytest
+
+from async_luno_client import AsyncLunoClient
+from smart_strategy import SmartStrategy
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_snapshot_fetches_all_supported_coins_and_balances(fake_exchange):
+    async def go():
+        async with AsyncLunoClient('key', 'secret', base_url=fake_exchange.base_url) as client:
+            return await client.snapshot()
+
+    snap = run(go())
+    assert set(snap['tickers']) == set(SmartStrategy.SUPPORTED_COINS)
+    assert snap['balances']['balance'][0]['asset'] == 'NGN'
+    assert snap['errors'] == {}
+
+
+def test_snapshot_isolates_failing_pair(fake_exchange):
+    async def go():
+        async with AsyncLunoClient('key', 'secret', base_url=fake_exchange.base_url) as client:
+            return await client.snapshot(['XBTNGN', 'NOPENGN'], include_balances=False)
+
+    snap = run(go())
+    assert 'XBTNGN' in snap['tickers']
+    assert 'NOPENGN' in snap['errors']
+
+
+def test_dry_run_does_not_hit_exchange(fake_exchange):
+    async def go():
+        async with AsyncLunoClient('key', 'secret', dry_run=True, base_url=fake_exchange.base_url) as client:
+            return await client.place_order('XBTNGN', 'buy', 0.001, 150000000.7)
+
+    resp = run(go())
+    assert resp['status'] == 'dry_run'
+    assert resp['payload']['type'] == 'BID'
+    assert resp['payload']['price'] == '150000000'
+    assert not any(name == 'postorder' for name, _ in fake_exchange.requests)
+
+
+def test_place_get_and_cancel_order(fake_exchange):
+    async def go():
+        async with AsyncLunoClient('key', 'secret', dry_run=False, base_url=fake_exchange.base_url) as client:
+            placed = await client.place_order('XRPNGN', 'buy', 1, 3500)
+            order = await client.get_order(placed['order_id'])
+            await client.cancel_order(placed['order_id'])
+            return placed, order
+
+    placed, order = run(go())
+    assert order['order_id'] == placed['order_id']
+    assert fake_exchange.orders[placed['order_id']]['state'] == 'COMPLETE'
+
+
+def test_order_errors_use_friendly_messages(fake_exchange):
+    async def go():
+        async with AsyncLunoClient('key', 'secret', dry_run=False, base_url=fake_exchange.base_url) as client:
+            await client.place_order('XBTNGN', 'buy', 1, 150000000)
+
+    with pytest.raises(RuntimeError, match='Insufficient balance to place this order'):
+        run(go())
@@ -0,0 +1,31 @@
+import math
+
+from backtest import EMAPolicy, run_backtest, smart_policy
+
+
+def test_smart_policy_round_trip_without_costs(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    policy = smart_policy('XBTNGN', buy_drop_pct=3, sell_profit_pct=10, stop_loss_pct=5)
+    report = run_backtest([100, 96, 97, 106, 107], policy, capital=1000, fee=0, slippage=0)
+    assert report['buy_count'] == 1 and report['sell_count'] == 1
+    assert math.isclose(report['pnl_ngn'], round(1000 * (106 / 96 - 1), 2))
+    assert report['win_rate_pct'] == 100
+    assert not (tmp_path / 'strategy_config.json').exists()
+
+
+def test_stop_loss_fees_and_drawdown():
+    policy = smart_policy('XBTNGN', buy_drop_pct=3, sell_profit_pct=10, stop_loss_pct=5)
+    report = run_backtest([100, 96, 90, 95], policy, capital=1000, fee=0.01, slippage=0)
+    assert report['losses'] == 1 and report['wins'] == 0
+    assert report['fees_ngn'] > 10
+    assert report['max_drawdown_pct'] > 6
+    assert set(report) >= {'pair', 'trades', 'total_bought_ngn', 'total_sold_ngn', 'pnl_ngn', 'pnl_pct',
+                           'buy_count', 'sell_count'}
+
+
+def test_open_position_is_closed_at_end():
+    prices = [10, 9, 8, 7, 6, 5]
+    report = run_backtest(prices, EMAPolicy(3), capital=100, fee=0, slippage=0)
+    assert report['fills'][-1].get('note') == 'close_at_end'
+    kept = run_backtest(prices, EMAPolicy(3), capital=100, fee=0, slippage=0, close_at_end=False)
+    assert kept['open_position_ngn'] > 0 and kept['sell_count'] == 0
@@ -0,0 +1,53 @@
+import numpy as np
+
+from candle_store import CandleStore, duration_for_interval, get_candle_store, to_candles, to_records
+from luno_client import LunoClient
+
+T0 = 1_700_000_000_000
+
+
+def candle(i, duration=60):
+    price = 100 + i
+    return {'timestamp': T0 + i * duration * 1000, 'open': str(price), 'high': str(price + 1),
+            'low': str(price - 1), 'close': str(price + 0.5), 'volume': '2'}
+
+
+def test_append_is_ordered_and_idempotent(tmp_path):
+    store = CandleStore(str(tmp_path))
+    assert store.append('XBTNGN', 60, to_records([candle(i) for i in (2, 0, 1)])) == 3
+    assert store.append('XBTNGN', 60, to_records([candle(i) for i in (1, 2, 3)])) == 1
+    data = store.read('XBTNGN', 60)
+    assert isinstance(data.base, np.memmap) or isinstance(data, np.memmap)
+    assert data['ts'].tolist() == [T0 + i * 60000 for i in range(4)]
+    assert store.read('XBTNGN', 60, since=T0 + 60000, until=T0 + 180000)['close'].tolist() == [101.5, 102.5]
+
+
+def test_candle_dicts_round_trip_and_stores_are_per_root(tmp_path):
+    store = get_candle_store(str(tmp_path / 'live'))
+    assert store is get_candle_store(str(tmp_path / 'live'))
+    assert store is not get_candle_store(str(tmp_path / 'history'))
+    store.on_candle('XBTNGN', '1m', dict(candle(0), duration=60))
+    assert to_candles(store.read('XBTNGN', 60)) == [
+        {'timestamp': T0, 'open': 100.0, 'high': 101.0, 'low': 99.0, 'close': 100.5, 'volume': 2.0}]
+
+
+def test_sync_fetches_only_missing_closed_candles(tmp_path, fake_exchange):
+    fake_exchange.candles[('XBTNGN', 60)] = [candle(i) for i in range(25)]
+    fake_exchange.candle_page = 10
+    client = LunoClient('key', 'secret', base_url=fake_exchange.base_url)
+    store = CandleStore(str(tmp_path))
+    now = (T0 + 20 * 60000 + 30000) / 1000  # candle 20 is still open
+
+    assert store.sync(client, 'XBTNGN', 60, start=T0, now=now, page_size=10) == 20
+    first_calls = [q for name, q in fake_exchange.requests if name == 'candles']
+    assert [int(q['since']) for q in first_calls] == [T0, T0 + 600000]
+
+    fake_exchange.requests.clear()
+    assert store.sync(client, 'XBTNGN', 60, now=now + 120, page_size=10) == 2
+    assert [int(q['since']) for _, q in fake_exchange.requests] == [T0 + 20 * 60000]
+    assert store.warm_prices('XBTNGN', 3) == [119.5, 120.5, 121.5]
+
+
+def test_duration_for_interval():
+    assert duration_for_interval(30) == 60
+    assert duration_for_interval(240) == 300
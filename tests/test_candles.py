@@ -0,0 +1,93 @@
+import pytest
+
+from candle_store import CandleStore
+from candles import CandleAggregator, feed_tickers
+from trend_analyzer import TrendAnalyzer
+
+T0 = 1_700_000_100  # unix seconds, a 1m and 5m boundary
+
+
+def test_ticks_build_ohlcv_and_close_after_grace():
+    agg = CandleAggregator(['1m', '5m'], grace=2)
+    closed = []
+    agg.subscribe(lambda pair, tf, c: closed.append((tf, c)))
+    for offset, price in [(0, 100), (10, 105), (20, 98), (50, 101)]:
+        agg.add_tick('XBTNGN', price, volume=1, ts=T0 + offset)
+
+    agg.add_tick('XBTNGN', 102, ts=T0 + 61)  # inside the grace period: nothing closes yet
+    assert closed == []
+    agg.add_tick('XBTNGN', 103, ts=T0 + 62)
+    assert [tf for tf, _ in closed] == ['1m']
+    c = closed[0][1]
+    assert (c['timestamp'], c['open'], c['high'], c['low'], c['close'], c['volume']) == \
+        (T0 * 1000, 100, 105, 98, 101, 4)
+    assert c['pair'] == 'XBTNGN' and c['duration'] == 60
+
+    five = agg.candles('XBTNGN', '5m', include_open=True)
+    assert len(five) == 1 and five[0]['high'] == 105 and five[0]['close'] == 103
+
+
+def test_late_ticks_within_grace_count_but_after_close_are_dropped():
+    agg = CandleAggregator(['1m'], grace=5)
+    agg.add_tick('XBTNGN', 100, ts=T0 + 30)
+    agg.add_tick('XBTNGN', 110, ts=T0 + 62)
+    agg.add_tick('XBTNGN', 90, ts=T0 + 20)   # late but within grace: updates low, not the close
+    agg.add_tick('XBTNGN', 111, ts=T0 + 70)  # closes the first candle
+    agg.add_tick('XBTNGN', 50, ts=T0 + 40)   # too late
+
+    first = agg.candles('XBTNGN', '1m')[0]
+    assert (first['low'], first['close']) == (90, 100)
+    assert agg.stats['late_dropped'] == 1
+    assert agg.candles('XBTNGN', '1m', include_open=True)[-1]['low'] == 110
+
+
+def test_history_is_bounded_and_subscriber_errors_are_isolated():
+    agg = CandleAggregator(['1m'], grace=0, history=3)
+    seen = []
+
+    def broken(pair, tf, candle):
+        raise RuntimeError('boom')
+
+    agg.subscribe(broken)
+    agg.subscribe(lambda pair, tf, c: seen.append(c['close']), pair='XBTNGN', timeframe='1m')
+    agg.subscribe(lambda pair, tf, c: pytest.fail('filtered out'), pair='ETHNGN')
+    for i in range(6):
+        agg.add_tick('XBTNGN', 100 + i, ts=T0 + i * 60)
+
+    assert seen == [100, 101, 102, 103, 104]
+    assert [c['close'] for c in agg.candles('XBTNGN', '1m')] == [102, 103, 104]
+    assert agg.candles('XBTNGN', '1m', limit=2)[0]['close'] == 103
+
+
+def test_close_due_and_trend_analyzer_subscriber():
+    clock = [T0]
+    agg = CandleAggregator(['1m'], grace=1, clock=lambda: clock[0])
+    analyzer = TrendAnalyzer()
+    agg.subscribe(analyzer.on_candle)
+    agg.add_trade('XBTNGN', {'timestamp': T0 * 1000, 'price': '200', 'volume': '0.5'})
+    agg.add_trade('XBTNGN', {'base': '2', 'counter': '500'})
+
+    clock[0] = T0 + 61
+    closed = agg.close_due()
+    assert [(c['open'], c['close'], c['volume']) for c in closed] == [(200, 250, 2.5)]
+    assert analyzer.price_history == {'XBTNGN': [250]}
+
+
+def test_feed_tickers_records_closed_candles(tmp_path):
+    agg = CandleAggregator(['1m'], grace=1)
+    store = CandleStore(str(tmp_path))
+    agg.subscribe(store.on_candle)
+    tickers = {'XBTNGN': {'last_trade': '100'}, 'ETHNGN': {'last_trade': ''}}
+    assert feed_tickers(agg, tickers, ['XBTNGN', 'ETHNGN', 'SOLNGN'], ts=T0) == 1
+    feed_tickers(agg, {'XBTNGN': {'last_trade': '104'}}, ['XBTNGN'], ts=T0 + 30)
+    assert store.count('XBTNGN', 60) == 0
+
+    feed_tickers(agg, {}, ['XBTNGN'], ts=T0 + 61)  # no price, but the due candle still closes
+    data = store.read('XBTNGN', 60)
+    assert data['ts'].tolist() == [T0 * 1000]
+    assert (data['open'][0], data['high'][0], data['close'][0]) == (100, 104, 104)
+
+
+def test_unknown_timeframe_is_rejected():
+    with pytest.raises(ValueError):
+        CandleAggregator(['2m'])
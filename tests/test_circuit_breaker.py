@@ -0,0 +1,120 @@
+import time
+
+import pytest
+import requests
+
+import circuit_breaker
+from circuit_breaker import CircuitBreaker, CircuitOpenError, call_with_retry, is_retryable
+from luno_client import LunoAPIError
+
+
+@pytest.fixture(autouse=True)
+def fresh_breakers(monkeypatch):
+    monkeypatch.setattr(circuit_breaker, '_breakers', {})
+    monkeypatch.setattr(circuit_breaker.time, 'sleep', lambda s: None)
+
+
+def test_classifies_terminal_and_transient_errors():
+    assert not is_retryable(LunoAPIError('Insufficient balance to place this order', status_code=400))
+    assert is_retryable(LunoAPIError('busy', status_code=503))
+    assert is_retryable(LunoAPIError('slow down', status_code=429))
+    assert is_retryable(requests.exceptions.ConnectionError())
+    assert not is_retryable(requests.exceptions.ReadTimeout(), idempotent=False)
+    assert not is_retryable(ValueError('bad side'))
+
+
+def test_terminal_error_is_not_retried():
+    calls = []
+
+    def reject():
+        calls.append(1)
+        raise LunoAPIError('Insufficient balance to place this order', status_code=400)
+
+    with pytest.raises(LunoAPIError):
+        call_with_retry(reject, endpoint='postorder', retries=3)
+    assert len(calls) == 1
+
+
+def test_transient_error_retried_until_success():
+    calls = []
+
+    def flaky():
+        calls.append(1)
+        if len(calls) < 3:
+            raise requests.exceptions.ConnectionError('reset')
+        return 'ok'
+
+    assert call_with_retry(flaky, endpoint='ticker', retries=3) == 'ok'
+    assert circuit_breaker.get_breaker('ticker').state == circuit_breaker.CLOSED
+
+
+def test_breaker_opens_then_half_opens():
+    now = [0.0]
+    breaker = CircuitBreaker('postorder', failure_threshold=2, reset_timeout=10, clock=lambda: now[0])
+    breaker.record_failure()
+    breaker.record_failure()
+    with pytest.raises(CircuitOpenError):
+        breaker.allow()
+    now[0] = 10
+    breaker.allow()
+    with pytest.raises(CircuitOpenError):
+        breaker.allow()
+    breaker.record_success()
+    breaker.allow()
+
+
+def test_open_breaker_fails_fast_without_calling():
+    calls = []
+
+    def down():
+        calls.append(1)
+        raise LunoAPIError('bad gateway', status_code=502)
+
+    with pytest.raises(LunoAPIError):
+        call_with_retry(down, endpoint='balances', retries=3)
+    # The fifth consecutive failure opens the breaker mid-retry
+    with pytest.raises(CircuitOpenError):
+        call_with_retry(down, endpoint='balances', retries=3)
+    assert len(calls) == 5
+    with pytest.raises(CircuitOpenError):
+        call_with_retry(down, endpoint='balances')
+    assert len(calls) == 5
+
+
+def test_attempts_get_the_remaining_budget_as_timeout(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(circuit_breaker.time, 'monotonic', lambda: now[0])
+    timeouts = []
+
+    def slow(timeout):
+        timeouts.append(timeout)
+        now[0] += 0.5
+        raise requests.exceptions.ConnectionError('reset')
+
+    with pytest.raises(requests.exceptions.ConnectionError):
+        call_with_retry(slow, endpoint='postorder', retries=3, base_delay=0.1, max_delay=0.1,
+                        max_elapsed=2, pass_timeout=True)
+    assert timeouts[0] == 2
+    assert all(a > b for a, b in zip(timeouts, timeouts[1:]))
+
+
+def test_client_caps_endpoint_timeout():
+    from luno_client import LunoClient
+    client = LunoClient('', '')
+    assert client._timeout('postorder') == (3.05, 15)
+    assert client._timeout('postorder', 1.5) == (1.5, 1.5)
+
+
+def test_rate_limit_wait_counts_against_the_order_budget():
+    from luno_client import LunoClient
+    from rate_limiter import RateLimiter, RateLimitTimeout
+    limiter = RateLimiter(private_rate=0.001, private_burst=1, order_reserve=0)
+    assert limiter.buckets['private'].try_acquire()   # drained: the next token is ~1000s away
+    client = LunoClient('key', 'secret', dry_run=False, base_url='http://127.0.0.1:9', limiter=limiter)
+    start = time.monotonic()
+    with pytest.raises(RateLimitTimeout):
+        call_with_retry(client.place_order, endpoint='postorder', idempotent=False, retries=3,
+                        max_elapsed=0.2, pass_timeout=True, pair='XBTNGN', side='buy', volume=1, price=1)
+    assert time.monotonic() - start < 5   # bounded by the budget, not the limiter's 30s max_wait
+    assert limiter.buckets['private'].metrics()['granted_order'] == 0
+    assert circuit_breaker.get_breaker('postorder').state == circuit_breaker.CLOSED
@@ -0,0 +1,68 @@
+import json
+import os
+import time
+
+import pytest
+
+from compound_manager import CompoundManager
+
+
+def test_totals_survive_restart_from_snapshot_plus_journal(tmp_path, monkeypatch):
+    monkeypatch.setattr(CompoundManager, 'SNAPSHOT_EVERY', 3)
+    path = str(tmp_path / 'compound_state.json')
+    manager = CompoundManager(path)
+    for i in range(5):
+        manager.record_profit_split(100 + i, reinvest_pct=60, trade_id=f't{i}')
+    manager.reset_reinvestment_balance()
+    manager.record_profit_split(10, reinvest_pct=50)
+
+    snapshot = json.load(open(path))
+    assert snapshot['transaction_count'] == 5 and 'transactions' not in snapshot   # 6 events: one snapshot
+    reloaded = CompoundManager(path)
+    assert reloaded.get_stats() == manager.get_stats()
+    assert reloaded.get_total_reinvestable() == 5.0
+    assert reloaded.get_stats()['transaction_count'] == 6
+    assert [t['trade_id'] for t in reloaded.get_recent_transactions(3)] == ['t3', 't4', '']
+
+
+def test_torn_last_line_is_dropped(tmp_path):
+    path = str(tmp_path / 'compound_state.json')
+    CompoundManager(path).record_profit_split(50)
+    with open(tmp_path / 'compound_state.jsonl', 'a') as f:
+        f.write('{"type": "split", "profit_')
+    manager = CompoundManager(path)
+    manager.record_profit_split(20)
+    assert CompoundManager(path).get_stats()['total_profit_ngn'] == 70.0
+
+
+def test_legacy_state_is_migrated(tmp_path):
+    path = tmp_path / 'compound_state.json'
+    path.write_text(json.dumps({
+        'total_profit': 30.0, 'total_reinvested': 18.0, 'total_savings': 12.0, 'last_update': None,
+        'transactions': [{'timestamp': 'x', 'profit_ngn': 30.0, 'reinvest_ngn': 18.0, 'savings_ngn': 12.0,
+                          'reinvest_pct': 60, 'trade_id': 'old'}]}))
+    manager = CompoundManager(str(path))
+    assert manager.get_recent_transactions() == [{'timestamp': 'x', 'profit_ngn': 30.0, 'reinvest_ngn': 18.0,
+                                                  'savings_ngn': 12.0, 'reinvest_pct': 60, 'trade_id': 'old'}]
+    manager.record_profit_split(10)
+    assert CompoundManager(str(path)).get_stats()['total_profit_ngn'] == 40.0
+
+
+def test_recording_stays_constant_time_and_compacts(tmp_path, monkeypatch):
+    monkeypatch.setattr(CompoundManager, 'COMPACT_BYTES', 200_000)
+    path = str(tmp_path / 'compound_state.json')
+    manager = CompoundManager(path)
+    started = time.perf_counter()
+    for i in range(5_000):
+        manager.record_profit_split(1.0, trade_id=str(i))
+    assert time.perf_counter() - started < 5.0
+    assert os.path.getsize(tmp_path / 'compound_state.jsonl') < 200_000 + 500 * 200
+    archives = [name for name in os.listdir(tmp_path) if name.startswith('compound_state.jsonl.')]
+    assert len(archives) >= 2
+    archived = sum(1 for name in archives for _ in open(tmp_path / name))
+    assert archived >= 5_000 - CompoundManager.KEEP_RECENT   # history is moved aside, not dropped
+    assert manager.get_recent_transactions(2)[-1]['trade_id'] == '4999'
+
+    reloaded = CompoundManager(path)
+    assert reloaded.get_stats()['transaction_count'] == 5_000
+    assert reloaded.get_stats()['total_profit_ngn'] == pytest.approx(5_000.0)
@@ -0,0 +1,54 @@
+import json
+
+from event_stream import EventHub
+
+
+def frames(gen, n):
+    out = []
+    for frame in gen:
+        if frame.startswith('id:'):
+            lines = dict(line.split(': ', 1) for line in frame.strip().split('\n'))
+            out.append((lines['event'], json.loads(lines['data'])))
+            if len(out) == n:
+                break
+    return out
+
+
+def test_one_producer_fans_out_to_every_subscriber():
+    hub = EventHub(heartbeat=0.05)
+    calls = []
+
+    def source(publish):
+        calls.append(1)
+        publish('price', {'price': len(calls)})
+
+    hub.add_source(source)
+    subs = [hub.subscribe() for _ in range(3)]
+    hub.poll()
+    hub.poll()
+    assert len(calls) == 2   # sources run once per tick, not once per client
+    for sub in subs:
+        assert frames(hub.stream(sub), 2) == [('price', {'price': 1}), ('price', {'price': 2})]
+    assert hub.subscriber_count() == 0   # closing the stream unsubscribes
+
+
+def test_reconnect_replays_from_last_event_id_and_resyncs_when_too_old():
+    hub = EventHub(history=3, heartbeat=0.05)
+    for i in range(5):
+        hub.publish('log', {'lines': [str(i)]})
+    assert frames(hub.stream(hub.subscribe(last_event_id='3')), 2) == [('log', {'lines': ['3']}), ('log', {'lines': ['4']})]
+    assert frames(hub.stream(hub.subscribe(last_event_id='1')), 1) == [('resync', {'reason': 'history'})]
+
+
+def test_slow_client_gets_resync_instead_of_unbounded_queue():
+    hub = EventHub(queue_size=2, heartbeat=0.05)
+    sub = hub.subscribe()
+    for i in range(10):
+        hub.publish('trade', {'id': i})
+    assert sub.queue.qsize() == 2 and hub.stats['overflows'] == 1
+    gen = hub.stream(sub, transform=lambda e: None if e['type'] == 'trade' and e['data']['id'] == 11 else e)
+    assert frames(gen, 1) == [('resync', {'reason': 'overflow'})]
+    hub.publish('trade', {'id': 11})   # dropped by the per-client transform
+    hub.publish('trade', {'id': 12})
+    assert frames(gen, 1) == [('trade', {'id': 12})]
+    gen.close()
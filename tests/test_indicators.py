@@ -0,0 +1,54 @@
+import json
+import math
+
+from indicators import EMA, MACD, RSI, SMA, Bollinger, restore_indicator
+from trend_analyzer import TrendAnalyzer
+
+PRICES = [44.3, 44.1, 44.2, 43.6, 44.3, 44.8, 45.1, 45.4, 45.8, 46.1, 45.9, 46.3, 46.0, 46.2, 46.3,
+          46.8, 46.6, 46.2, 45.6, 46.2, 46.3, 46.3, 46.0, 46.0, 45.6, 45.2, 44.8, 45.1, 45.3, 45.9]
+
+
+def batch_ema_sma_seed(prices, period):
+    ema = sum(prices[:period]) / period
+    for price in prices[period:]:
+        ema = price * 2 / (period + 1) + ema * (1 - 2 / (period + 1))
+    return ema
+
+
+def test_sma_seeded_ema_matches_batch():
+    ema = EMA(10, seed='sma')
+    assert ema.update_many(PRICES[:9]) is None
+    assert math.isclose(ema.update_many(PRICES[9:]), batch_ema_sma_seed(PRICES, 10))
+
+
+def test_sma_and_bollinger_track_window():
+    sma, bands = SMA(5), Bollinger(5, k=2)
+    sma.update_many(PRICES)
+    bands.update_many(PRICES)
+    window = PRICES[-5:]
+    mean = sum(window) / 5
+    std = math.sqrt(sum((p - mean) ** 2 for p in window) / 5)
+    assert math.isclose(sma.value, mean)
+    assert math.isclose(bands.value['upper'], mean + 2 * std)
+
+
+def test_rsi_bounds_and_trend():
+    assert RSI(14).update_many(range(1, 30)) == 100.0
+    rsi = RSI(14).update_many(PRICES)
+    assert 0 < rsi < 100
+
+
+def test_snapshot_restore_continues_identically():
+    for indicator in (EMA(5), SMA(5), MACD(3, 6, 4), RSI(5), Bollinger(5)):
+        indicator.update_many(PRICES[:20])
+        restored = restore_indicator(json.loads(json.dumps(indicator.snapshot())))
+        assert restored.update_many(PRICES[20:]) == indicator.update_many(PRICES[20:])
+
+
+def test_trend_analyzer_uses_incremental_emas():
+    analyzer = TrendAnalyzer()
+    for price in PRICES:
+        analyzer.add_price('XBTNGN', price)
+    result = analyzer.analyze_trend('XBTNGN')
+    assert result['ema_long'] == round(batch_ema_sma_seed(PRICES, 26), 2)
+    assert result['ema_short'] == round(batch_ema_sma_seed(PRICES, 12), 2)
@@ -0,0 +1,63 @@
+import os
+
+from log_tail import LogTail, parse_cursor, read_last_lines
+
+
+def test_seeds_from_the_end_and_follows_appends(tmp_path):
+    path = tmp_path / 'bot.log'
+    path.write_text(''.join(f'line {i}\n' for i in range(5000)) + 'partial')
+    assert read_last_lines(str(path), 3)[0] == ['line 4997', 'line 4998', 'line 4999']
+
+    tail = LogTail(str(path), max_lines=100)
+    first = tail.tail(2)
+    assert first['logs'] == ['line 4998', 'line 4999']
+    assert parse_cursor(first['cursor']) == (os.stat(path).st_ino, path.stat().st_size - len('partial'))
+    with open(path, 'a') as f:
+        f.write(' done\nnext\n')
+    new = tail.since(first['cursor'])
+    assert new == {'logs': ['partial done', 'next'], 'cursor': f"{os.stat(path).st_ino}:{path.stat().st_size}",
+                   'reset': False}
+    assert tail.since(new['cursor'])['logs'] == []
+    assert tail.stats['bytes_read'] == len('partial done\nnext\n')   # only what came after the seeded tail
+    one = tail.since(first['cursor'], limit=1)
+    assert one['logs'] == ['partial done'] and tail.since(one['cursor'])['logs'] == ['next']
+
+
+def test_cursors_are_shared_between_tails_of_the_same_file(tmp_path):
+    path = tmp_path / 'bot.log'
+    path.write_text(''.join(f'line {i}\n' for i in range(50)))
+    worker_a = LogTail(str(path), max_lines=100)
+    cursor = worker_a.since(worker_a.tail(5)['cursor'])['cursor']
+    with open(path, 'a') as f:
+        f.write('x\ny\n')
+    worker_b = LogTail(str(path), max_lines=10)   # started later, holds a different window
+    assert worker_b.since(cursor) == worker_a.since(cursor)
+    assert worker_b.since(cursor)['logs'] == ['x', 'y']
+    assert worker_b.since(worker_b.cursor) == {'logs': [], 'cursor': worker_b.cursor, 'reset': False}
+
+
+def test_rotation_and_stale_cursors(tmp_path):
+    path = tmp_path / 'bot.log'
+    path.write_text('a\nb\n')
+    tail = LogTail(str(path), max_lines=3)
+    cursor = tail.tail()['cursor']
+
+    os.rename(path, tmp_path / 'bot.log.1')
+    path.write_text('c\nd\ne\nf\n')
+    result = tail.since(cursor)
+    assert result['logs'] == ['d', 'e', 'f'] and result['reset'] is True   # 'c' fell out of the ring
+    assert tail.stats['rotations'] == 1
+
+    assert tail.since('12345:6')['reset'] is True   # a file this tail never saw
+    assert tail.since('17')['reset'] is True        # not a cursor
+    assert tail.since(result['cursor'], limit=0)['logs'] == []
+    assert tail.since('bogus', limit=0) == {'logs': [], 'cursor': result['cursor'], 'reset': True}
+    before_f = f"{os.stat(path).st_ino}:{len('c d e ')}"
+    assert tail.since(before_f) == {'logs': ['f'], 'cursor': result['cursor'], 'reset': False}
+
+
+def test_missing_file_is_picked_up_when_created(tmp_path):
+    tail = LogTail(str(tmp_path / 'bot.log'))
+    assert tail.tail() == {'logs': [], 'cursor': '0:0', 'reset': False}
+    (tmp_path / 'bot.log').write_text('hello\n')
+    assert tail.since('0:0')['logs'] == ['hello']
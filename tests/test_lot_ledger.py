@@ -0,0 +1,106 @@
+import time
+
+import pytest
+
+from compound_manager import CompoundManager
+from lot_ledger import LotLedger, PairBook, mark_price
+from trade_journal import TradeJournal
+
+
+def test_fifo_lifo_and_average_cost_basis():
+    fills = [('buy', 1, 100), ('buy', 1, 200), ('sell', 1.5, 300)]
+    realized = {}
+    for method in ('fifo', 'lifo', 'average'):
+        book = PairBook('XBTNGN', method)
+        for side, volume, price in fills:
+            result = getattr(book, side)(volume, price)
+        realized[method] = (round(result['pnl'], 6), round(book.open_cost, 6))
+    assert realized['fifo'] == (250.0, 100.0)      # 1@100 + 0.5@200 consumed
+    assert realized['lifo'] == (200.0, 50.0)       # 1@200 + 0.5@100 consumed
+    assert realized['average'] == (225.0, 75.0)    # 1.5 @ 150
+    assert book.unrealized(200) == pytest.approx(25.0)
+
+
+def test_fees_and_sells_without_cost_basis():
+    book = PairBook('ETHNGN')
+    book.buy(2, 100, fee=2)                 # unit cost 101
+    result = book.sell(3, 110, fee=3)       # only 2 of the 3 have a basis
+    assert result['matched_volume'] == 2 and result['unmatched_volume'] == 1
+    assert result['pnl'] == pytest.approx(2 * 110 - 2 - 202)
+    assert book.open_volume == 0 and book.open_lots() == []
+
+
+def test_many_fills_are_matched_incrementally():
+    book = PairBook('XBTNGN')
+    for i in range(20_000):
+        book.buy(0.5, 100 + i % 7)
+    started = time.perf_counter()
+    for i in range(19_999):
+        book.sell(0.5, 110)
+    assert time.perf_counter() - started < 1.0
+    assert len(book.lots) == 1 and book.open_volume == pytest.approx(0.5)
+
+
+def test_ledger_follows_journal_and_feeds_compound(tmp_path, monkeypatch):
+    monkeypatch.setattr(CompoundManager, 'STATE_FILE', str(tmp_path / 'compound.json'))
+    journal = TradeJournal(str(tmp_path / 'trades.db'))
+    journal.record('XBTNGN', 'buy', 100, 1)
+    journal.record('XBTNGN', 'sell', 90, 0.5)   # loss: nothing to split
+
+    ledger = LotLedger('fifo', journal)
+    compound = CompoundManager()
+    ledger.subscribe(lambda r: compound.record_realized(r, reinvest_pct=50))
+    ledger.sync(notify=False)
+    assert compound.get_stats()['transaction_count'] == 0
+
+    journal.record('XBTNGN', 'sell', 140, 0.5)
+    assert [round(r['pnl'], 2) for r in ledger.sync()] == [20.0]
+    assert compound.get_total_savings() == pytest.approx(10.0)
+    assert compound.get_recent_transactions()[-1]['trade_id'] == 'journal:3'
+
+    journal.record('ETHNGN', 'buy', 50, 2)
+    ledger.sync()
+    summary = ledger.summary(prices={'ETHNGN': 60})
+    assert summary['realized_pnl_ngn'] == 15.0 and summary['unrealized_pnl_ngn'] == 20.0
+    assert mark_price({'bid': '0', 'last_trade': '61'}) == 61.0
+
+
+def test_dry_run_fills_are_not_booked(tmp_path):
+    journal = TradeJournal(str(tmp_path / 'trades.db'))
+    journal.record('XBTNGN', 'buy', 100, 1, details={'status': 'dry_run', 'order_id': 'dry-1'})
+    journal.record('XBTNGN', 'sell', 150, 1, details={'response': {'status': 'dry_run'}})
+    journal.record('XBTNGN', 'buy', 100, 1, details={'order_id': 'BXLIVE'})
+    ledger = LotLedger('fifo', journal)
+    assert ledger.sync() == []
+    assert ledger.skipped_dry_run == 2 and ledger.last_id == 3
+    assert ledger.books['XBTNGN'].open_volume == 1
+
+
+def test_sells_recorded_while_down_are_split_once_after_restart(tmp_path, monkeypatch):
+    monkeypatch.setattr(CompoundManager, 'STATE_FILE', str(tmp_path / 'compound.json'))
+    journal = TradeJournal(str(tmp_path / 'trades.db'))
+    journal.record('XBTNGN', 'buy', 100, 2)
+    journal.record('XBTNGN', 'sell', 150, 0.5)    # before compounding started: not split
+
+    def start():
+        compound = CompoundManager()
+        if compound.realized_through is None:
+            compound.mark_realized_through(journal.max_id())
+        ledger = LotLedger('fifo', journal)
+        ledger.subscribe(lambda r: compound.record_realized(r, reinvest_pct=50))
+        ledger.sync()
+        return compound, ledger
+
+    compound, ledger = start()
+    assert compound.get_stats()['transaction_count'] == 0
+    journal.record('XBTNGN', 'sell', 120, 0.5)
+    ledger.sync()
+    assert compound.get_stats()['total_profit_ngn'] == 10.0
+
+    journal.record('XBTNGN', 'sell', 140, 0.5)    # recorded by another process while the bot is down
+    compound, _ = start()
+    assert compound.get_stats()['transaction_count'] == 2
+    assert compound.get_stats()['total_profit_ngn'] == 30.0
+    assert compound.realized_through == 4
+    compound, _ = start()                         # a second restart splits nothing again
+    assert compound.get_stats()['transaction_count'] == 2
@@ -0,0 +1,85 @@
+import json
+import os
+import threading
+
+import pytest
+
+from market_stream import MarketStream, OrderBook, SequenceGap
+from stream_replay import ReplayServer
+
+DATA = os.path.join(os.path.dirname(__file__), 'data')
+
+
+def load(name):
+    with open(os.path.join(DATA, name)) as f:
+        return [json.loads(line) for line in f]
+
+
+def test_order_book_applies_deltas():
+    msgs = load('stream_XBTNGN.jsonl')
+    book = OrderBook('XBTNGN')
+    book.apply_snapshot(msgs[0])
+    assert (book.best_bid(), book.best_ask()) == (150000000.0, 150100000.0)
+
+    book.apply_update(msgs[1])
+    assert book.best_bid() == 150050000.0
+    book.apply_update(msgs[2])
+    assert book.depth(1)['asks'] == [[150100000.0, 0.3]]
+    assert float(book.last_trade) == 150100000.0
+    book.apply_update(msgs[3])
+    assert book.best_bid() == 150000000.0
+    book.apply_update(msgs[4])
+    # A1 fully filled: its level disappears
+    assert book.best_ask() == 150200000.0
+    assert book.sequence == 104
+
+
+def test_order_book_detects_sequence_gap():
+    msgs = load('stream_XBTNGN.jsonl')
+    book = OrderBook('XBTNGN')
+    book.apply_snapshot(msgs[0])
+    with pytest.raises(SequenceGap):
+        book.apply_update(msgs[2])
+
+
+def test_stream_resyncs_after_gap_against_replay_server():
+    server = ReplayServer({'XBTNGN': [os.path.join(DATA, 'stream_XBTNGN_gap.jsonl'),
+                                      os.path.join(DATA, 'stream_XBTNGN.jsonl')]}).start()
+    # Sequence 104 only exists in the second recording, so reaching it means the resync is done
+    synced = threading.Event()
+    stream = MarketStream(['XBTNGN'], 'key', 'secret', url=server.url,
+                          on_update=lambda pair, book: book.sequence == 104 and synced.set())
+    try:
+        stream.start_in_thread()
+        assert synced.wait(5)
+        assert stream.stats['XBTNGN']['resyncs'] == 1
+        assert server.connections['XBTNGN'] == 2
+        assert json.loads(server.credentials[0]) == {'api_key_id': 'key', 'api_key_secret': 'secret'}
+        assert stream.best_prices('XBTNGN')['ask'] == 150200000.0
+    finally:
+        stream.stop()
+        server.stop()
+
+
+def test_set_pairs_switches_streams_against_replay_server():
+    recording = os.path.join(DATA, 'stream_XBTNGN.jsonl')
+    server = ReplayServer({'XBTNGN': [recording], 'ETHNGN': [recording]}).start()
+    synced = {'XBTNGN': threading.Event(), 'ETHNGN': threading.Event()}
+
+    def on_update(pair, book):
+        if book.sequence == 104:
+            synced[pair].set()
+
+    stream = MarketStream(['XBTNGN'], 'key', 'secret', url=server.url, on_update=on_update)
+    try:
+        stream.start_in_thread()
+        assert synced['XBTNGN'].wait(5)
+        stream.set_pairs(['ETHNGN'])
+        assert synced['ETHNGN'].wait(5)
+        assert stream.pairs == ['ETHNGN'] and list(stream.books) == ['ETHNGN']
+        assert stream.best_prices('XBTNGN') is None
+        assert stream.best_prices('ETHNGN')['ask'] == 150200000.0
+        assert server.connections == {'XBTNGN': 1, 'ETHNGN': 1}
+    finally:
+        stream.stop()
+        server.stop()
@@ -0,0 +1,167 @@
+import json
+import threading
+
+from multi_pair_engine import MultiPairEngine, parse_pairs
+from smart_strategy import SmartStrategy
+from trade_journal import TradeJournal
+
+
+class FakeClient:
+    auth = ('', '')
+
+    def __init__(self, fail_pairs=()):
+        self.fail_pairs = set(fail_pairs)
+        self.orders = []
+
+    def place_order(self, pair, side, volume, price, timeout=None):
+        if pair in self.fail_pairs:
+            raise ValueError(f'{pair} rejected')
+        self.orders.append((pair, side, round(volume, 6), price))
+        return {'order_id': f'{pair}-{len(self.orders)}'}
+
+
+def strategy_for(pairs):
+    coins = {p: dict(SmartStrategy.DEFAULTS, buy_drop_pct=3, sell_profit_pct=5, stop_loss_pct=5) for p in pairs}
+    return SmartStrategy(config={'active_coin': pairs[0], 'coins': coins})
+
+
+def make_engine(tmp_path, pairs, prices, client=None, **kwargs):
+    client = client or FakeClient()
+    engine = MultiPairEngine(pairs, client, strategy=strategy_for(pairs), budget=1000, debounce=0,
+                             state_dir=str(tmp_path / 'state'), journal=TradeJournal(str(tmp_path / 'trades.db')), **kwargs)
+    engine.source.fetch = lambda pair, _client: {'last_trade': str(prices[pair])}
+    return engine, client
+
+
+def test_each_pair_trades_independently_and_writes_its_own_state(tmp_path):
+    prices = {'XBTNGN': 100.0, 'ETHNGN': 50.0}
+    engine, client = make_engine(tmp_path, list(prices), prices)
+    engine.run_once()
+    prices['XBTNGN'] = 96.0   # -4%: buy
+    prices['ETHNGN'] = 49.0   # -2%: hold
+    engine.run_once()
+    prices['XBTNGN'] = 101.0  # +5.2% from entry: sell
+    engine.run_once()
+    engine.stop()
+
+    assert client.orders == [('XBTNGN', 'buy', round(1000 / 96, 6), 96.0), ('XBTNGN', 'sell', round(1000 / 96, 6), 101.0)]
+    xbt = json.loads((tmp_path / 'state' / 'XBTNGN.json').read_text())
+    eth = json.loads((tmp_path / 'state' / 'ETHNGN.json').read_text())
+    assert xbt['entry_price'] is None and xbt['last_action']['action'] == 'sell'
+    assert eth['baseline'] == 50.0 and eth['last_action'] is None
+    assert [(t['pair'], t['side'], t['source']) for t in engine.journal.recent()] == \
+        [('XBTNGN', 'sell', 'multi_pair'), ('XBTNGN', 'buy', 'multi_pair')]
+
+
+def test_failing_pair_is_isolated_and_paused(tmp_path):
+    prices = {'XBTNGN': 100.0, 'ETHNGN': 100.0}
+    clock = [0.0]
+    engine, client = make_engine(tmp_path, list(prices), prices, client=FakeClient(fail_pairs={'ETHNGN'}),
+                                 max_errors=2, cooldown=60, clock=lambda: clock[0])
+    engine.run_once()
+    for price in (96.0, 95.0, 94.0):
+        prices['ETHNGN'] = price
+        engine.run_once()
+    prices['XBTNGN'] = 96.0
+    engine.run_once()
+
+    assert engine.health['ETHNGN']['errors'] == 2
+    assert engine.health['ETHNGN']['evaluations'] == 3  # the third drop arrived while paused
+    assert json.loads((tmp_path / 'state' / 'ETHNGN.json').read_text())['paused'] is True
+    assert [o[:2] for o in client.orders] == [('XBTNGN', 'buy')]
+
+    clock[0] = 61.0
+    client.fail_pairs.clear()
+    prices['ETHNGN'] = 93.0
+    engine.run_once()
+    engine.stop()
+    assert engine.health['ETHNGN']['consecutive_errors'] == 0
+    assert ('ETHNGN', 'buy') in [o[:2] for o in client.orders]
+
+
+def test_updates_for_a_busy_pair_are_coalesced(tmp_path):
+    prices = {'XBTNGN': 100.0}
+    engine, _ = make_engine(tmp_path, ['XBTNGN'], prices)
+    release = threading.Event()
+    seen = []
+    trader = engine.traders['XBTNGN']
+
+    def slow(price):
+        seen.append(price)
+        release.wait(2)
+
+    trader.on_price = slow
+    for price in (1.0, 2.0, 3.0, 4.0):
+        engine.submit({'pair': 'XBTNGN', 'price': price})
+    release.set()
+    assert engine.wait_idle(2)
+    engine.stop()
+    assert seen == [1.0, 4.0]
+
+
+def test_parse_pairs():
+    assert parse_pairs('all') == SmartStrategy.SUPPORTED_COINS
+    assert parse_pairs(' xbtngn, ETHNGN ,') == ['XBTNGN', 'ETHNGN']
+
+
+def test_restart_resumes_an_open_position(tmp_path):
+    prices = {'XBTNGN': 100.0}
+    engine, _ = make_engine(tmp_path, ['XBTNGN'], prices)
+    engine.run_once()
+    prices['XBTNGN'] = 96.0   # buy
+    engine.run_once()
+    engine.stop()
+
+    engine, client = make_engine(tmp_path, ['XBTNGN'], prices)
+    assert engine.traders['XBTNGN'].entry_price == 96.0
+    prices['XBTNGN'] = 93.0   # another drop, but the position is still open: no second buy
+    engine.run_once()
+    prices['XBTNGN'] = 101.0  # sell what was bought before the restart
+    engine.run_once()
+    engine.stop()
+    assert client.orders == [('XBTNGN', 'sell', round(1000 / 96, 6), 101.0)]
+
+
+def test_restore_prefers_newer_journal_fills(tmp_path):
+    journal = TradeJournal(str(tmp_path / 'trades.db'))
+    journal.record('XBTNGN', 'buy', 96.0, 2.0, source='multi_pair')
+    engine, _ = make_engine(tmp_path, ['XBTNGN', 'ETHNGN'], {'XBTNGN': 96.0, 'ETHNGN': 50.0})
+    engine.stop()
+    assert (engine.traders['XBTNGN'].entry_price, engine.traders['XBTNGN'].volume) == (96.0, 2.0)
+    assert engine.traders['ETHNGN'].entry_price is None
+
+    journal.record('XBTNGN', 'sell', 101.0, 2.0, source='multi_pair')
+    engine, _ = make_engine(tmp_path, ['XBTNGN'], {'XBTNGN': 101.0})
+    engine.stop()
+    assert engine.traders['XBTNGN'].entry_price is None and engine.traders['XBTNGN'].baseline == 101.0
+
+
+def test_journal_failure_still_records_the_position(tmp_path):
+    prices = {'XBTNGN': 100.0}
+    engine, client = make_engine(tmp_path, ['XBTNGN'], prices)
+
+    def locked(*args, **kwargs):
+        raise RuntimeError('database is locked')
+
+    engine.journal.record = locked
+    engine.run_once()
+    prices['XBTNGN'] = 96.0
+    engine.run_once()
+    prices['XBTNGN'] = 95.0
+    engine.run_once()
+    engine.stop()
+    assert [o[:2] for o in client.orders] == [('XBTNGN', 'buy')]
+    assert engine.traders['XBTNGN'].entry_price == 96.0
+    assert engine.health['XBTNGN']['errors'] == 0
+
+
+def test_restore_ignores_trades_from_other_sources(tmp_path):
+    journal = TradeJournal(str(tmp_path / 'trades.db'))
+    journal.record('XBTNGN', 'buy', 96.0, 2.0, source='multi_pair')
+    journal.record('XBTNGN', 'sell', 101.0, 2.0, source='multi_pair')
+    journal.record('XBTNGN', 'buy', 99.0, 5.0, source='dashboard')
+    journal.record('ETHNGN', 'buy', 50.0, 1.0, source='bot')
+    engine, _ = make_engine(tmp_path, ['XBTNGN', 'ETHNGN'], {'XBTNGN': 99.0, 'ETHNGN': 50.0})
+    engine.stop()
+    assert engine.traders['XBTNGN'].entry_price is None and engine.traders['XBTNGN'].baseline == 101.0
+    assert engine.traders['ETHNGN'].entry_price is None
@@ -0,0 +1,49 @@
+import json
+import math
+import random
+
+import numpy as np
+from multiprocessing import shared_memory
+
+from optimizer import Optimizer, SharedPrices, grid_candidates, tpe_candidates, write_best_config
+
+
+def make_series(seed, n=3000):
+    rng, price, prices = random.Random(seed), 1000.0, []
+    for i in range(n):
+        price *= 1 + rng.gauss(0, 0.01) + 0.02 * math.sin(i / 50) / 50
+        prices.append(price)
+    return prices
+
+
+def test_shared_prices_layout():
+    series = {'XBTNGN': [1.0, 2.0, 3.0], 'ETHNGN': [4.0, 5.0]}
+    with SharedPrices(series) as shared:
+        other = shared_memory.SharedMemory(name=shared.name)
+        offset, length = shared.layout['ETHNGN']
+        view = np.ndarray((length,), dtype=np.float64, buffer=other.buf, offset=offset * 8)
+        assert view.tolist() == [4.0, 5.0]
+        del view
+        other.close()
+
+
+def test_grid_and_tpe_stay_in_bounds():
+    assert len(grid_candidates(3)) == 3 ** 4
+    results = [{'params': p, 'score': p['sell_profit_pct']} for p in grid_candidates(3)]
+    for p in tpe_candidates(results, 20, rng=np.random.default_rng(1)):
+        assert 0.5 <= p['buy_drop_pct'] <= 10 and 0 <= p['compound_reinvest_pct'] <= 100
+
+
+def test_bayes_sweep_writes_best_config(tmp_path):
+    opt = Optimizer({'XBTNGN': make_series(1), 'ETHNGN': make_series(2)}, workers=2)
+    best = opt.sweep('bayes', trials=40, seed=3, rounds=3)
+    assert set(best) == {'XBTNGN', 'ETHNGN'}
+    assert len(opt.results['XBTNGN']) == 40
+    assert best['XBTNGN']['score'] == max(r['score'] for r in opt.results['XBTNGN'])
+
+    path = tmp_path / 'strategy_config.json'
+    write_best_config(best, str(path), base={'active_coin': 'XBTNGN', 'coins': {'SOLNGN': {'enabled': False}}})
+    config = json.loads(path.read_text())
+    assert config['coins']['SOLNGN'] == {'enabled': False}
+    assert config['coins']['ETHNGN']['stop_loss_pct'] == round(best['ETHNGN']['params']['stop_loss_pct'], 2)
+    assert config['coins']['ETHNGN']['enabled'] is True
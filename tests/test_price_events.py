@@ -0,0 +1,57 @@
+import time
+
+from price_events import PollingPriceSource, PriceEventEngine
+
+
+def test_burst_is_coalesced_to_latest_price():
+    seen = []
+    engine = PriceEventEngine(seen.append, debounce=0.05)
+    engine.start()
+    for price in range(1, 51):
+        engine.publish('XBTNGN', {'last_trade': str(price)})
+    deadline = time.time() + 2
+    while not seen and time.time() < deadline:
+        time.sleep(0.01)
+    engine.stop()
+    assert [u['price'] for u in seen] == [50.0]
+    assert engine.stats['coalesced'] == 49
+
+
+def test_unchanged_price_skips_handler():
+    seen = []
+    engine = PriceEventEngine(seen.append, debounce=0)
+    ticker = {'last_trade': '100', 'bid': '99', 'ask': '101'}
+    engine.publish('XBTNGN', ticker)
+    engine.flush()
+    engine.publish('XBTNGN', dict(ticker))
+    engine.flush()
+    engine.publish('XBTNGN', dict(ticker, bid='99.5'))
+    engine.flush()
+    assert len(seen) == 2
+    assert engine.stats['unchanged'] == 1
+
+
+def test_handler_errors_are_isolated_per_pair():
+    seen = []
+
+    def handler(update):
+        if update['pair'] == 'ETHNGN':
+            raise ValueError('boom')
+        seen.append(update['pair'])
+
+    engine = PriceEventEngine(handler, debounce=0)
+    engine.publish('ETHNGN', {'last_trade': '1'})
+    engine.publish('XBTNGN', {'last_trade': '1'})
+    assert engine.flush() == 1
+    assert seen == ['XBTNGN'] and engine.stats['errors'] == 1
+
+
+def test_polling_source_follows_pair_changes():
+    fetched = []
+    engine = PriceEventEngine(lambda update: None, debounce=0)
+    source = PollingPriceSource(engine, ['XBTNGN'], interval=60,
+                                fetch=lambda pair, client: fetched.append(pair) or {'last_trade': '1'})
+    source.before_poll = lambda: source.set_pairs(['ETHNGN'])
+    source.poll_once()
+    assert fetched == ['ETHNGN']
+    assert engine.flush() == 1
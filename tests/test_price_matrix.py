@@ -0,0 +1,51 @@
+import math
+import random
+
+import numpy as np
+
+from indicators import EMA
+from price_matrix import EMAVector, PriceMatrix
+from trend_analyzer import TrendAnalyzer
+
+
+def test_ring_buffer_keeps_last_capacity_prices():
+    matrix = PriceMatrix(capacity=5, initial_rows=1)
+    for i in range(12):
+        matrix.append({'XBTNGN': i, 'ETHNGN': -i})
+    assert matrix.history('XBTNGN').tolist() == [7, 8, 9, 10, 11]
+    rows = matrix.rows_for(['ETHNGN', 'NOPE'])
+    assert matrix.latest(rows)[0] == -11 and math.isnan(matrix.latest(rows)[1])
+    assert matrix.sizes(rows).tolist() == [5, 0]
+
+
+def test_ema_vector_matches_scalar_ema():
+    rng = random.Random(7)
+    vector = EMAVector(4, seed='sma', rows=1)
+    scalars = [EMA(4, seed='sma') for _ in range(3)]
+    for _ in range(30):
+        prices = np.array([rng.uniform(90, 110) for _ in scalars])
+        vector.update(np.arange(3), prices)
+        for ema, price in zip(scalars, prices):
+            ema.update(price)
+    assert np.allclose(vector.values[:3], [ema.value for ema in scalars])
+
+
+def test_summary_for_many_coins_in_one_pass():
+    analyzer = TrendAnalyzer()
+    coins = [f'C{i}NGN' for i in range(200)]
+    for step in range(40):
+        analyzer.add_prices({coin: 100 + (step if i % 2 else -step) for i, coin in enumerate(coins)})
+    summary = analyzer.get_prediction_summary(coins + ['NEWNGN'])
+    assert summary['summary'] == {'total_coins': 201, 'uptrending': 100, 'downtrending': 100, 'neutral': 1}
+    assert summary['best_buy']['recommendation'] == 'BUY'
+    assert analyzer.analyze_trend('C1NGN')['data_points'] == 40
+
+
+def test_observe_folds_each_ticker_snapshot_once():
+    analyzer = TrendAnalyzer(short_ema_period=2, long_ema_period=3)
+    for price in (100, 101, 102, 110):
+        snapshot = {'XBTNGN': {'last_trade': str(price)}, 'ETHNGN': {'last_trade': '0'}}
+        analyzer.observe(snapshot, ['XBTNGN', 'ETHNGN'])
+    analyses = analyzer.observe(snapshot, ['XBTNGN', 'ETHNGN'])   # same snapshot again: not re-added
+    assert analyses[0]['data_points'] == 4 and analyses[0]['trend'] == 'UPTREND'
+    assert analyses[1]['data_points'] == 0
@@ -0,0 +1,80 @@
+from profit_tracker import ProfitTracker
+from trade_journal import TradeJournal
+
+
+def make_tracker(tmp_path, journal=None):
+    journal = journal or TradeJournal(str(tmp_path / 'trades.db'))
+    return ProfitTracker(journal, checkpoint_file=str(tmp_path / 'rollup.json'), checkpoint_interval=0), journal
+
+
+def test_only_new_trades_are_folded(tmp_path):
+    tracker, journal = make_tracker(tmp_path)
+    journal.record('XBTNGN', 'buy', 100, 2, ts=1_700_000_000)
+    journal.record('XBTNGN', 'sell', 110, 2, ts=1_700_000_100)
+    assert tracker.refresh() == 2
+    assert tracker.refresh() == 0
+
+    journal.record('ETHNGN', 'buy', 50, 1, ts=1_700_000_200)
+    assert tracker.refresh() == 1
+    assert tracker.compute_pair_stats('XBTNGN')['pnl_ngn'] == 20.0
+    total = tracker.compute_total_stats()
+    assert total['total_trades'] == 3 and total['total_bought_ngn'] == 250.0 and total['unique_pairs'] == 2
+
+
+def test_checkpoint_resumes_without_replaying(tmp_path):
+    tracker, journal = make_tracker(tmp_path)
+    for i in range(5):
+        journal.record('XBTNGN', 'buy' if i % 2 == 0 else 'sell', 100 + i, 1, ts=1_700_000_000 + i)
+    stats = tracker.save_stats(str(tmp_path / 'stats.json'))
+
+    scanned_from = []
+    iter_trades = journal.iter_trades
+    journal.iter_trades = lambda after_id=0, pair=None: scanned_from.append(after_id) or iter_trades(after_id, pair)
+    restarted, _ = make_tracker(tmp_path, journal)
+    assert restarted.get_stats()['daily'] == stats['daily']
+    assert set(scanned_from) == {5}
+
+
+def test_checkpoint_for_another_journal_is_rebuilt(tmp_path):
+    tracker, journal = make_tracker(tmp_path)
+    journal.record('XBTNGN', 'buy', 100, 1)
+    tracker.refresh()
+    tracker.checkpoint()
+
+    other = TradeJournal(str(tmp_path / 'other.db'))
+    fresh, _ = make_tracker(tmp_path, other)
+    assert fresh.compute_total_stats()['total_trades'] == 0
+
+
+def test_stats_are_cached_until_a_trade_arrives(tmp_path):
+    tracker, journal = make_tracker(tmp_path)
+    journal.record('XBTNGN', 'buy', 100, 1)
+    first = tracker.get_stats()
+    assert tracker.get_stats() is first
+    journal.record('XBTNGN', 'sell', 120, 1)
+    assert tracker.get_stats()['total']['pnl_ngn'] == 20.0
+
+
+
+def test_rollups_are_only_read_under_the_lock(tmp_path):
+    # refresh() grows these dicts from other dashboard threads; iterating them
+    # without the lock can raise "dictionary changed size during iteration"
+    tracker, journal = make_tracker(tmp_path)
+    journal.record('XBTNGN', 'buy', 100, 1, ts=1_700_000_000)
+    tracker.refresh()
+
+    class Guarded(dict):
+        def __iter__(self):
+            assert tracker._lock.locked()
+            return super().__iter__()
+
+        def values(self):
+            assert tracker._lock.locked()
+            return super().values()
+
+    tracker._rollup['pairs'] = Guarded(tracker._rollup['pairs'])
+    tracker._rollup['days'] = Guarded(tracker._rollup['days'])
+    journal.record('ETHNGN', 'sell', 50, 1, ts=1_700_100_000)
+    assert tracker.compute_total_stats()['total_trades'] == 2
+    assert len(tracker.compute_daily_pnl()) == 2
+    assert tracker.get_stats()['total']['unique_pairs'] == 2
@@ -0,0 +1,129 @@
+import threading
+
+import pytest
+
+from rate_limiter import (PRIORITY_NORMAL, PRIORITY_ORDER, RateLimiter, RateLimitTimeout, SharedTokenBucket,
+                          TokenBucket)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_normal_callers_cannot_spend_order_reserve():
+    clock = FakeClock()
+    bucket = TokenBucket('private', rate=1, capacity=3, reserve=2, clock=clock)
+    assert bucket.try_acquire(PRIORITY_NORMAL)
+    assert not bucket.try_acquire(PRIORITY_NORMAL)
+    assert bucket.try_acquire(PRIORITY_ORDER)
+    assert bucket.try_acquire(PRIORITY_ORDER)
+    assert not bucket.try_acquire(PRIORITY_ORDER)
+    clock.now = 1.0
+    assert bucket.try_acquire(PRIORITY_ORDER)
+
+
+def test_penalize_drains_bucket_and_reports_metrics():
+    clock = FakeClock()
+    bucket = TokenBucket('public', rate=2, capacity=4, clock=clock)
+    bucket.penalize(1.0)
+    assert not bucket.try_acquire()
+    clock.now = 1.5
+    assert bucket.try_acquire()
+    metrics = bucket.metrics()
+    assert metrics['penalties'] == 1
+    assert metrics['granted_normal'] == 1
+
+
+def test_acquire_times_out():
+    bucket = TokenBucket('public', rate=0.001, capacity=1)
+    bucket.acquire()
+    with pytest.raises(RateLimitTimeout):
+        bucket.acquire(max_wait=0.05)
+
+
+class BlockingBucket(TokenBucket):
+    """Signals each time a caller of a priority is about to wait for a token."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.blocked = {PRIORITY_NORMAL: threading.Event(), PRIORITY_ORDER: threading.Event()}
+
+    def _time_until_available(self, priority):
+        # Called with the bucket's lock held, right before the caller waits on it
+        self.blocked[priority].set()
+        return super()._time_until_available(priority)
+
+
+def test_waiting_order_preempts_normal_callers():
+    clock = FakeClock()
+    bucket = BlockingBucket('private', rate=1, capacity=1, clock=clock)
+    bucket.acquire()
+    order = []
+
+    def take(priority, label):
+        bucket.acquire(priority)
+        order.append(label)
+
+    def refill(now):
+        # Taking the lock means both callers are parked in wait(); wake them to re-check
+        with bucket._cond:
+            clock.now = now
+            bucket._cond.notify_all()
+
+    normal = threading.Thread(target=take, args=(PRIORITY_NORMAL, 'ticker'))
+    urgent = threading.Thread(target=take, args=(PRIORITY_ORDER, 'order'))
+    normal.start()
+    assert bucket.blocked[PRIORITY_NORMAL].wait(2)
+    urgent.start()
+    assert bucket.blocked[PRIORITY_ORDER].wait(2)
+
+    refill(1.0)  # one token: the order gets it although the normal caller came first
+    urgent.join(2)
+    assert order == ['order'] and normal.is_alive()
+    refill(2.0)
+    normal.join(2)
+    assert order == ['order', 'ticker']
+
+
+def test_shared_buckets_split_one_budget_between_processes(tmp_path):
+    # Two buckets on one file stand in for the bot and a dashboard worker
+    clock = FakeClock()
+    path = str(tmp_path / 'rate_limit.json')
+    bot = SharedTokenBucket('private', rate=1, capacity=4, reserve=1, path=path, clock=clock)
+    web = SharedTokenBucket('private', rate=1, capacity=4, reserve=1, path=path, clock=clock)
+    assert bot.try_acquire() and web.try_acquire() and bot.try_acquire()
+    assert not web.try_acquire()
+    assert web.try_acquire(PRIORITY_ORDER)
+    assert not bot.try_acquire(PRIORITY_ORDER)
+
+    clock.now = 10.0
+    web.penalize(5.0)   # a 429 seen by one process pauses the other
+    assert not bot.try_acquire(PRIORITY_ORDER)
+    clock.now = 16.0
+    assert bot.try_acquire(PRIORITY_ORDER)
+
+
+def test_order_waiting_in_one_process_holds_back_normal_callers_in_another(tmp_path):
+    clock = FakeClock()
+    path = str(tmp_path / 'rate_limit.json')
+    bot = SharedTokenBucket('private', rate=1, capacity=1, path=path, clock=clock)
+    web = SharedTokenBucket('private', rate=1, capacity=1, path=path, clock=clock)
+    assert web.try_acquire()
+    with pytest.raises(RateLimitTimeout):
+        bot.acquire(PRIORITY_ORDER, max_wait=0)
+    clock.now = 1.0
+    assert not web.try_acquire()
+    assert bot.try_acquire(PRIORITY_ORDER)
+
+
+def test_limiter_uses_shared_buckets_with_a_state_file(tmp_path):
+    path = str(tmp_path / 'rate_limit.json')
+    first, second = RateLimiter(public_burst=2, state_file=path), RateLimiter(public_burst=2, state_file=path)
+    first.acquire_for('ticker')
+    second.acquire_for('ticker')
+    assert not first.buckets['public'].try_acquire()
+    assert type(RateLimiter().buckets['public']) is TokenBucket
@@ -0,0 +1,83 @@
+import random
+import time
+
+from scheduler import Scheduler
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_fixed_rate_does_not_drift_with_work_time():
+    clock = FakeClock()
+    starts = []
+
+    def work():
+        starts.append(clock.now)
+        clock.now += 0.4  # each run takes 0.4s of a 1s period
+
+    sched = Scheduler(clock=clock)
+    sched.add_job('poll', work, interval=1.0)
+    for _ in range(50):
+        sched.run_pending()
+        clock.now = sched.next_wakeup()
+    assert starts[:4] == [1000.0, 1001.0, 1002.0, 1003.0]
+    assert starts[49] == 1049.0
+    assert sched.stats()['poll']['max_lag'] == 0.0
+
+
+def test_jitter_is_bounded_and_not_accumulated():
+    clock = FakeClock()
+    starts = []
+    sched = Scheduler(clock=clock)
+    sched.add_job('poll', lambda: starts.append(clock.now), interval=10, jitter=2, rng=random.Random(1))
+    for _ in range(100):
+        clock.now = sched.next_wakeup()
+        sched.run_pending()
+    offsets = [s - (1000 + 10 * k) for k, s in enumerate(starts)]
+    assert all(0 <= o <= 2 for o in offsets)
+    assert len(set(round(o, 3) for o in offsets)) > 10
+
+
+def test_overruns_and_skipped_slots_are_reported():
+    clock = FakeClock()
+    durations = iter([0.5, 3.5, 0.5, 0.5])
+    starts = []
+
+    def work():
+        starts.append(clock.now)
+        clock.now += next(durations)
+
+    sched = Scheduler(clock=clock)
+    sched.add_job('stats', work, interval=1.0, budget=0.8)
+    for _ in range(4):
+        clock.now = max(clock.now, sched.next_wakeup())
+        sched.run_pending()
+
+    stats = sched.stats()['stats']
+    assert stats['overruns'] == 1
+    assert stats['skipped'] == 2            # the 3.5s run swallowed the slots at 1002 and 1003
+    assert starts == [1000.0, 1001.0, 1004.5, 1005.0]
+    assert stats['max_lag'] == 0.5          # it started at 1004.5 for the 1004 slot
+
+
+def test_failing_job_does_not_stop_others():
+    ran = []
+
+    def broken():
+        raise RuntimeError('boom')
+
+    sched = Scheduler()
+    sched.add_job('broken', broken, interval=0.05)
+    sched.add_job('ok', lambda: ran.append(1), interval=0.05)
+    sched.start()
+    time.sleep(0.3)
+    sched.stop()
+    stats = sched.stats()
+    assert stats['broken']['errors'] >= 2 and stats['broken']['last_error'] == 'boom'
+    assert len(ran) >= 2
+    assert any(line.startswith('broken:') for line in sched.summary())
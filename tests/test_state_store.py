@@ -0,0 +1,71 @@
+import json
+import os
+
+from state_store import StateReader, StateStore, read_document, read_version
+
+
+def test_sections_do_not_clobber_each_other(tmp_path):
+    path = str(tmp_path / 'bot_state.json')
+    bot = StateStore(path, min_interval=0)
+    autosell = StateStore(path, min_interval=0)   # e.g. another process
+    bot.update('bot', {'pair': 'XBTNGN', 'last_price': 100, 'prices': [99, 100]})
+    autosell.update('autosell', {'pair': 'SOLNGN', 'bid': 5, 'profit_pct': 1.5})
+    bot.update('bot', {'pair': 'XBTNGN', 'last_price': 101, 'prices': [99, 100, 101]})
+
+    flat = StateReader(path).read()
+    assert flat['last_price'] == 101 and flat['bid'] == 5 and flat['profit_pct'] == 1.5
+    assert flat['pair'] == 'XBTNGN'   # overlapping keys: the most recent writer wins
+    assert flat['_version'] == 3
+    assert [f for f in os.listdir(tmp_path) if f.endswith('.tmp')] == []
+
+
+def test_updates_are_coalesced_until_the_interval_passes(tmp_path):
+    path = str(tmp_path / 'bot_state.json')
+    clock = [0.0]
+    store = StateStore(path, min_interval=60, clock=lambda: clock[0])
+    store.update('bot', {'last_price': 1})
+    for price in range(2, 11):
+        store.update('bot', {'last_price': price})
+    store.update('settings', {'quote_priority': ['NGN']}, merge=True)
+    assert read_document(path)['bot'] == {'last_price': 1}
+    assert store.stats['writes'] == 1 and store.stats['coalesced'] == 8
+
+    clock[0] = 61
+    assert store.flush() is True
+    doc = read_document(path)
+    assert doc['bot'] == {'last_price': 10} and doc['settings'] == {'quote_priority': ['NGN']}
+    assert read_version(path) == 2
+    assert store.flush() is False
+
+
+def test_legacy_flat_file_is_kept_and_reader_skips_unchanged_versions(tmp_path):
+    path = str(tmp_path / 'bot_state.json')
+    with open(path, 'w') as f:
+        json.dump({'pair': 'SOLNGN', 'buy_price': 10, 'tradingview': {'signal': 'buy'}}, f)
+    reader = StateReader(path)
+    assert reader.read()['buy_price'] == 10
+
+    StateStore(path, min_interval=0).update('tradingview', {'last_seen': 'now'}, merge=True)
+    first = reader.read()
+    assert first['tradingview'] == {'signal': 'buy', 'last_seen': 'now'} and first['pair'] == 'SOLNGN'
+
+    parsed = reader._state
+    assert reader.read() == first and reader._state is parsed   # same version: no re-parse
+    assert StateReader(str(tmp_path / 'missing.json')).read() is None
+
+
+def test_reader_serves_unchanged_file_from_memory(tmp_path):
+    path = str(tmp_path / 'bot_state.json')
+    store = StateStore(path, min_interval=0)
+    store.update('bot', {'last_price': 1})
+    reader = StateReader(path)
+    for _ in range(100):
+        assert reader.read()['last_price'] == 1
+    assert reader.stats['parses'] == 1 and reader.stats['stat_hits'] == 99
+
+    store.update('bot', {'last_price': 2})
+    assert reader.read()['last_price'] == 2 and reader.stats['parses'] == 2
+
+    os.utime(path)   # touched but not rewritten: the version check avoids a re-parse
+    assert reader.read()['last_price'] == 2
+    assert reader.stats['parses'] == 2 and reader.stats['version_hits'] == 1
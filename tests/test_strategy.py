@@ -14,3 +14,17 @@ def test_signal_from_prices():
     prices = [1, 2, 3, 4, 5, 6, 7, 8, 9, 10]
     sig = strategy.signal_from_prices(prices, period=3)
     assert sig in ("buy", "sell", "hold")
+
+
+def test_compute_ema_matches_pandas_adjust_false():
+    pd = __import__('pytest').importorskip('pandas')
+    prices = [100, 101.5, 99.2, 98.7, 102.3, 104.1, 103.3, 101.0, 100.2, 99.9, 105.5]
+    expected = float(pd.Series(prices).ewm(span=4, adjust=False).mean().iloc[-1])
+    assert abs(strategy.compute_ema(prices, period=4) - expected) < 1e-9
+
+
+def test_ema_signal_matches_batch_signal():
+    prices = [10, 11, 12, 11, 9, 8, 9, 10, 12, 13]
+    live = strategy.EMASignal(period=3)
+    for i, price in enumerate(prices):
+        assert live.update(price) == strategy.signal_from_prices(prices[:i + 1], period=3)
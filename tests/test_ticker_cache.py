@@ -0,0 +1,57 @@
+import threading
+
+from luno_client import LunoClient
+from ticker_cache import TickerCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_cache(clock, calls):
+    def fetch():
+        calls.append(clock.now)
+        return [{'pair': 'XBTNGN', 'last_trade': str(len(calls))}, {'pair': 'ETHNGN', 'last_trade': '1'}]
+    return TickerCache(fetch=fetch, ttl=5, stale=30, clock=clock)
+
+
+def test_one_fetch_serves_every_pair_within_ttl():
+    clock, calls = FakeClock(), []
+    cache = make_cache(clock, calls)
+    assert cache.get('XBTNGN')['last_trade'] == '1'
+    clock.now = 4
+    assert cache.get('ETHNGN') is not None
+    assert cache.get('NOPE') is None
+    assert len(calls) == 1
+
+
+def test_stale_snapshot_served_while_revalidating():
+    clock, calls = FakeClock(), []
+    cache = make_cache(clock, calls)
+    cache.get('XBTNGN')
+    clock.now = 10
+    assert cache.get('XBTNGN')['last_trade'] == '1'
+    for t in threading.enumerate():
+        if t.name == 'ticker-cache-refresh':
+            t.join(1)
+    assert len(calls) == 2
+    assert cache.get('XBTNGN')['last_trade'] == '2'
+
+
+def test_no_stale_reads_for_order_pricing():
+    clock, calls = FakeClock(), []
+    cache = make_cache(clock, calls)
+    cache.get('XBTNGN')
+    clock.now = 10
+    assert cache.get('XBTNGN', allow_stale=False)['last_trade'] == '2'
+
+
+def test_get_tickers_uses_bulk_endpoint(fake_exchange):
+    client = LunoClient('', '', base_url=fake_exchange.base_url)
+    tickers = client.get_tickers()['tickers']
+    assert {t['pair'] for t in tickers} >= {'XBTNGN', 'USDTNGN'}
+    assert [name for name, _ in fake_exchange.requests] == ['tickers']
@@ -0,0 +1,90 @@
+import threading
+
+from profit_tracker import ProfitTracker
+from trade_journal import TradeJournal, normalize_csv_row
+
+LEGACY_CSV = '''timestamp,pair,action,price,volume,details
+1762870360.5,XBTUSDC,sell,104777.77,0.001,"{'status': 'dry_run', 'order_id': 'dry-1'}"
+1762875753.4,USDTNGN,buy_usdt,1476.88,0.52,{'order_id': 'BXJX8CD9YWXN4CU'}
+1762944021.6,USDTNGN,BUY,1458,0.1,{"order_resp": {"status": "dry_run", "order_id": "dry-2"}}
+2025-11-13 10:00:00,SELL,BXAUTO,1480,0.52,auto_sell_target_2.0pct
+'''
+
+
+def test_import_normalizes_both_legacy_schemas_once(tmp_path):
+    csv_path = tmp_path / 'trade_log.csv'
+    csv_path.write_text(LEGACY_CSV)
+    journal = TradeJournal(str(tmp_path / 'trades.db'))
+    assert journal.import_csv(str(csv_path)) == 4
+    assert journal.import_csv(str(csv_path)) == 0
+
+    trades = journal.recent(10)
+    assert [(t['side'], t['order_id']) for t in trades] == [
+        ('sell', 'BXAUTO'), ('buy', 'dry-2'), ('buy', 'BXJX8CD9YWXN4CU'), ('sell', 'dry-1')]
+    assert trades[1]['details'] == '{"order_resp": {"status": "dry_run", "order_id": "dry-2"}}'
+    assert journal.last_buy('USDTNGN')['price'] == 1458
+    assert journal.by_order_id('BXAUTO')[0]['volume'] == 0.52
+
+
+def test_recent_paginates_and_filters(tmp_path):
+    journal = TradeJournal(str(tmp_path / 'trades.db'))
+    for i in range(10):
+        journal.record('XBTNGN' if i % 2 else 'ETHNGN', 'buy_ema' if i < 5 else 'SELL', 100 + i, 1, ts=1000 + i)
+    page = journal.recent(3)
+    assert [t['price'] for t in page] == [109, 108, 107]
+    assert [t['price'] for t in journal.recent(3, before_id=page[-1]['id'])] == [106, 105, 104]
+    assert [t['price'] for t in journal.recent(2, pair='XBTNGN')] == [109, 107]
+    assert journal.last_buy()['price'] == 104
+    assert [t['id'] for t in journal.iter_trades(after_id=8)] == [9, 10]
+
+
+def test_concurrent_writers_and_profit_stats(tmp_path):
+    path = str(tmp_path / 'trades.db')
+
+    def writer(pair):
+        journal = TradeJournal(path)   # separate connections, as separate processes would have
+        for i in range(50):
+            journal.record(pair, 'buy' if i % 2 == 0 else 'sell', 100, 1, ts=1_700_000_000 + i)
+
+    threads = [threading.Thread(target=writer, args=(p,)) for p in ('XBTNGN', 'ETHNGN', 'SOLNGN')]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    tracker = ProfitTracker(TradeJournal(path), checkpoint_file=str(tmp_path / 'rollup.json'))
+    assert tracker.compute_pair_stats('XBTNGN') == {
+        'pair': 'XBTNGN', 'trades': 50, 'total_bought_ngn': 2500.0, 'total_sold_ngn': 2500.0,
+        'pnl_ngn': 0.0, 'pnl_pct': 0.0, 'buy_count': 25, 'sell_count': 25}
+    total = tracker.compute_total_stats()
+    assert total['total_trades'] == 150 and total['unique_pairs'] == 3
+    daily = tracker.compute_daily_pnl()
+    assert sum(d['trades'] for d in daily.values()) == 150   # epoch timestamps are counted
+
+
+def test_unsided_rows_are_skipped():
+    assert normalize_csv_row({'timestamp': '1', 'pair': 'X', 'action': 'deposit', 'price': '1', 'volume': '1'}) is None
+
+
+def test_keyset_pages_filters_and_aggregates(tmp_path):
+    journal = TradeJournal(str(tmp_path / 'trades.db'))
+    for i in range(30):
+        journal.record('XBTNGN' if i % 3 else 'ETHNGN', 'buy_ema' if i % 2 else 'sell', 100, 1, ts=1000 + i // 2)
+
+    seen, before = [], None
+    while True:
+        page = journal.page(7, before=before, pair='XBTNGN')
+        if not page:
+            break
+        seen += [t['id'] for t in page]
+        before = journal.cursor_position(journal.cursor_for(page[-1]))
+    assert seen == sorted((t['id'] for t in journal.iter_trades(pair='XBTNGN')), reverse=True)   # ties on ts included
+
+    newest = journal.page(3)
+    assert journal.page(3, after=journal.cursor_position(newest[-1]['id'])) == newest[:2]
+    assert [t['ts'] for t in journal.page(50, side='buy', since=1010, until=1012)] == [1011, 1010]
+    assert {t['action'] for t in journal.page(50, action='buy_ema')} == {'buy_ema'}
+
+    by_side = {g['side']: g for g in journal.aggregate('side', pair='ETHNGN')}
+    assert by_side['buy']['trades'] == 5 and by_side['sell']['notional'] == 500
+    assert journal.cursor_position(999) is None
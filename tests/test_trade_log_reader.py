@@ -0,0 +1,55 @@
+import tracemalloc
+
+from trade_log_reader import _UNPARSED, TradeLogReader
+
+MIXED = '''timestamp,pair,action,price,volume,details
+1762870360.5,XBTUSDC,sell,104777.77,0.001,"{'status': 'dry_run', 'order_id': 'dry-1'}"
+
+1762875753.4,USDTNGN,buy_usdt,1476.88,0.52,{'order_id': 'BXJX8CD9YWXN4CU'}
+1762944021.6,USDTNGN,BUY,1458,0.1,{"order_resp": {"status": "dry_run", "order_id": "dry-2"}}
+2025-11-13 10:00:00,SELL,BXAUTO,1480,0.52,"{'pair': 'USDTNGN'}"
+1762944099.0,USDTNGN,deposit,1,1,
+timestamp,side,order_id,price,volume,note
+2025-11-14 09:30:00,buy,BXNEXT,1490,0.2,manual
+'''
+
+
+def test_mixed_schemas_normalize_to_one_record(tmp_path):
+    path = tmp_path / 'trade_log.csv'
+    path.write_text(MIXED)
+    reader = TradeLogReader(str(path))
+    trades = list(reader)
+    assert [(t.pair, t.side, t.order_id) for t in trades] == [
+        ('XBTUSDC', 'sell', 'dry-1'), ('USDTNGN', 'buy', 'BXJX8CD9YWXN4CU'), ('USDTNGN', 'buy', 'dry-2'),
+        ('USDTNGN', 'sell', 'BXAUTO'), ('', 'buy', 'BXNEXT')]
+    assert all(isinstance(t.ts, float) for t in trades)   # epoch and formatted timestamps alike
+    assert [t.line_no for t in trades] == [2, 3, 4, 5, 8]
+    assert reader.stats == {'rows': 7, 'records': 5, 'skipped': 1, 'headers': 2}
+
+
+def test_details_are_parsed_lazily_and_cached(tmp_path):
+    path = tmp_path / 'trade_log.csv'
+    path.write_text(MIXED)
+    first = next(iter(TradeLogReader(str(path))))
+    assert first._details is _UNPARSED and first.price == 104777.77
+    details = first.details
+    assert details['status'] == 'dry_run' and first.details is details
+
+
+def test_large_log_streams_in_constant_memory(tmp_path):
+    path = tmp_path / 'trade_log.csv'
+    with open(path, 'w') as f:
+        f.write('timestamp,pair,action,price,volume,details\n')
+        row = "{ts},XBTNGN,{side},100,0.5,\"{{'order_id': 'BX{i}', 'payload': {{'pad': '" + 'x' * 200 + "'}}}}\"\n"
+        for i in range(50_000):
+            f.write(row.format(ts=1_700_000_000 + i, side='buy' if i % 2 else 'sell', i=i))
+
+    tracemalloc.start()
+    count = volume = 0
+    for trade in TradeLogReader(str(path)):
+        count += 1
+        volume += trade.volume
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert count == 50_000 and volume == 25_000
+    assert peak < 1_000_000   # the file is ~13 MB
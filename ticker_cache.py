@@ -0,0 +1,168 @@
+"""
+Process-wide ticker cache backed by Luno's all-markets /tickers endpoint.
+
+One upstream call refreshes every pair, so the bot loop, the auto-sell monitor
+and every dashboard request inside the same TTL window share a single fetch.
+
+Freshness (configurable via .env):
+- TICKER_CACHE_TTL (seconds, default 5): snapshot is served as-is
+- TICKER_CACHE_STALE (seconds, default 30): past the TTL the old snapshot is still
+  served while one background thread revalidates it (stale-while-revalidate)
+- older than TTL + STALE: the caller refreshes synchronously
+
+Pairs missing from the bulk snapshot fall back to the single-pair /ticker call so
+invalid pairs still raise the exchange's error.
+"""
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+LOGGER = logging.getLogger(__name__)
+
+DEFAULT_TTL = float(os.getenv('TICKER_CACHE_TTL', '5'))
+DEFAULT_STALE = float(os.getenv('TICKER_CACHE_STALE', '30'))
+
+
+def _default_fetch() -> List[dict]:
+    from luno_client import LunoClient
+    return LunoClient('', '').get_tickers().get('tickers', [])
+
+
+class TickerCache:
+    """Thread-safe TTL cache of the all-markets ticker snapshot."""
+
+    def __init__(self, fetch: Callable[[], List[dict]] = None, ttl: float = DEFAULT_TTL,
+                 stale: float = DEFAULT_STALE, clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            fetch: callable returning a list of ticker dicts (each with a 'pair' key)
+            ttl: seconds a snapshot is considered fresh
+            stale: extra seconds a snapshot may be served while it is revalidated
+            clock: monotonic time source (injectable for tests)
+        """
+        self.fetch = fetch or _default_fetch
+        self.ttl = ttl
+        self.stale = stale
+        self.clock = clock
+        self._tickers: Dict[str, dict] = {}
+        self._fetched_at: Optional[float] = None
+        self._refresh_lock = threading.Lock()
+        self._revalidating = False
+        self.stats = {'hits': 0, 'stale_hits': 0, 'refreshes': 0, 'errors': 0}
+        self._stats_lock = threading.Lock()
+
+    def _count(self, key: str):
+        # Readers on many threads bump these; += on a dict item is not atomic
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    def age(self) -> Optional[float]:
+        """Seconds since the last successful refresh, or None if never fetched."""
+        if self._fetched_at is None:
+            return None
+        return self.clock() - self._fetched_at
+
+    def refresh(self) -> Dict[str, dict]:
+        """Fetch a new snapshot now and return it."""
+        try:
+            tickers = {t['pair']: t for t in self.fetch() if t.get('pair')}
+        except Exception:
+            self._count('errors')
+            raise
+        # Publish atomically: readers either see the old or the new snapshot
+        self._tickers = tickers
+        self._fetched_at = self.clock()
+        self._count('refreshes')
+        return tickers
+
+    def _revalidate_in_background(self):
+        with self._refresh_lock:
+            if self._revalidating:
+                return
+            self._revalidating = True
+
+        def run():
+            try:
+                self.refresh()
+            except Exception as e:
+                LOGGER.warning(f"Background ticker refresh failed: {e}")
+            finally:
+                self._revalidating = False
+
+        threading.Thread(target=run, name='ticker-cache-refresh', daemon=True).start()
+
+    def get_all(self, allow_stale: bool = True) -> Dict[str, dict]:
+        """Return {pair: ticker} for every market, refreshing according to the TTL rules.
+
+        With allow_stale=False a snapshot older than `ttl` is always refreshed synchronously
+        (use this when pricing an order).
+        """
+        age = self.age()
+        if age is not None and age < self.ttl:
+            self._count('hits')
+            return self._tickers
+        if allow_stale and age is not None and age < self.ttl + self.stale:
+            self._count('stale_hits')
+            tickers = self._tickers
+            self._revalidate_in_background()
+            return tickers
+
+        # Single flight: concurrent callers wait for one refresh instead of each fetching
+        with self._refresh_lock:
+            age = self.age()
+            if age is not None and age < self.ttl:
+                self._count('hits')
+                return self._tickers
+            return self.refresh()
+
+    def get(self, pair: str, allow_stale: bool = True) -> Optional[dict]:
+        """Return the cached ticker for `pair`, or None if the exchange did not list it."""
+        return self.get_all(allow_stale=allow_stale).get(pair)
+
+    def invalidate(self):
+        """Drop the snapshot so the next read refreshes."""
+        self._fetched_at = None
+
+
+# Global cache instance
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_ticker_cache() -> TickerCache:
+    """Get the process-wide ticker cache (initialize if needed)."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = TickerCache()
+    return _cache
+
+
+def configure_ticker_cache(**kwargs) -> TickerCache:
+    """Replace the process-wide cache (e.g. with a custom fetch or TTL)."""
+    global _cache
+    with _cache_lock:
+        _cache = TickerCache(**kwargs)
+    return _cache
+
+
+def get_cached_ticker(pair: str, client=None, allow_stale: bool = True) -> dict:
+    """Ticker for `pair` from the shared cache, falling back to `client.get_ticker(pair)`.
+
+    The fallback covers pairs the bulk endpoint doesn't return (and surfaces the
+    exchange's error for invalid pairs) and keeps callers working if /tickers fails.
+    """
+    try:
+        ticker = get_ticker_cache().get(pair, allow_stale=allow_stale)
+    except Exception as e:
+        LOGGER.warning(f"Ticker cache unavailable ({e}); fetching {pair} directly")
+        ticker = None
+    if ticker is not None:
+        return ticker
+    if client is None:
+        from luno_client import LunoClient
+        client = LunoClient('', '')
+    return client.get_ticker(pair)
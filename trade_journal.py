@@ -0,0 +1,414 @@
+"""
+Trade journal: every fill in one SQLite table with a normalized schema.
+
+Replaces appending to trade_log.csv. The bot, the auto-sell monitor, the dashboard and
+the multi-pair engine all write here (WAL mode, so writers from several processes do
+not block readers), and the dashboard, profit stats and last-buy lookup are indexed
+queries instead of re-parsing the whole CSV on every call.
+
+Schema (table `trades`):
+    id        rowid, increasing in insertion order
+    ts        unix seconds (float)
+    pair      e.g. XBTNGN
+    side      'buy' | 'sell'
+    action    original action label (buy_ema, SELL, auto_sell_target_2pct, ...)
+    price, volume, fee
+    order_id, source ('bot', 'autosell', 'dashboard', 'multi_pair', 'csv'), note
+    details   JSON (or the raw text when it was not JSON)
+    import_key  set for imported CSV rows so re-importing is a no-op
+
+The existing CSV is imported once, the first time the journal is opened
+(`python trade_journal.py import trade_log.csv` re-runs it; duplicate rows are skipped).
+
+Configuration (.env):
+- TRADE_JOURNAL (default trades.db)
+- LOG_CSV (legacy CSV imported on first use, default trade_log.csv)
+"""
+import ast
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+LOGGER = logging.getLogger(__name__)
+
+JOURNAL_PATH = os.getenv('TRADE_JOURNAL', 'trades.db')
+LEGACY_CSV = os.getenv('LOG_CSV', 'trade_log.csv')
+
+COLUMNS = ('id', 'ts', 'pair', 'side', 'action', 'price', 'volume', 'fee', 'order_id', 'source', 'note', 'details')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS trades (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts REAL NOT NULL,
+    pair TEXT NOT NULL,
+    side TEXT NOT NULL,
+    action TEXT,
+    price REAL NOT NULL,
+    volume REAL NOT NULL,
+    fee REAL NOT NULL DEFAULT 0,
+    order_id TEXT,
+    source TEXT,
+    note TEXT,
+    details TEXT,
+    import_key TEXT UNIQUE
+);
+CREATE INDEX IF NOT EXISTS trades_pair_ts ON trades (pair, ts);
+CREATE INDEX IF NOT EXISTS trades_order_id ON trades (order_id);
+CREATE INDEX IF NOT EXISTS trades_ts ON trades (ts);
+CREATE INDEX IF NOT EXISTS trades_side_ts ON trades (side, ts);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+
+def side_of(action: str) -> Optional[str]:
+    """'buy' / 'sell' from any action label (buy_ema, BUY, bid, ask, sell_usdt...)."""
+    a = (action or '').strip().lower()
+    if 'buy' in a or a in ('bid', 'b'):
+        return 'buy'
+    if 'sell' in a or a in ('ask', 's'):
+        return 'sell'
+    return None
+
+
+def parse_timestamp(value: Any) -> Optional[float]:
+    """Unix seconds from an epoch number/string or a '%Y-%m-%d %H:%M:%S' / ISO string."""
+    if value is None or value == '':
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        pass
+    text = str(value).strip()
+    for fmt in ('%Y-%m-%d %H:%M:%S', '%Y-%m-%dT%H:%M:%S'):
+        try:
+            return datetime.strptime(text, fmt).timestamp()
+        except ValueError:
+            continue
+    try:
+        return datetime.fromisoformat(text).timestamp()
+    except ValueError:
+        return None
+
+
+def parse_details(text: Optional[str]) -> Any:
+    """Decode a details field written as JSON or as a Python dict repr; raw text otherwise."""
+    if not text:
+        return None
+    try:
+        return json.loads(text)
+    except ValueError:
+        pass
+    try:
+        return ast.literal_eval(text)
+    except (ValueError, SyntaxError):
+        return text
+
+
+def _order_id(details: Any) -> Optional[str]:
+    if isinstance(details, dict):
+        for key in ('order_id', 'id'):
+            if details.get(key):
+                return str(details[key])
+        for nested in details.values():
+            if isinstance(nested, dict):
+                found = _order_id(nested)
+                if found:
+                    return found
+    return None
+
+
+def is_dry_run(trade: Dict) -> bool:
+    """True for a journal row recorded from a simulated order (LunoClient dry_run)."""
+    if str(trade.get('order_id') or '').startswith('dry-'):
+        return True
+    text = trade.get('details')
+    if not text or 'dry_run' not in text:
+        return False
+    return _has_dry_run_status(parse_details(text))
+
+
+def _has_dry_run_status(details: Any) -> bool:
+    if isinstance(details, dict):
+        if details.get('status') == 'dry_run':
+            return True
+        return any(_has_dry_run_status(v) for v in details.values() if isinstance(v, dict))
+    return False
+
+
+def normalize_csv_row(row: Dict[str, str], extra: List[str] = None) -> Optional[Dict]:
+    """Map one legacy trade_log.csv row (either writer's schema) to journal columns.
+
+    `extra` holds fields beyond the header (the dashboard wrote unquoted JSON details,
+    which the CSV parser splits on its commas). Returns None for rows without a side.
+    """
+    from trade_log_reader import TradeRecord
+    record = TradeRecord.from_row(row, extra)
+    return record.as_journal_row() if record else None
+
+
+class TradeJournal:
+    """SQLite-backed trade journal; one connection per thread, safe across processes."""
+
+    def __init__(self, path: str = JOURNAL_PATH):
+        self.path = path
+        self._local = threading.local()
+        with self._conn() as conn:
+            conn.executescript(SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def close(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def record(self, pair: str, side: str, price: float, volume: float, ts: float = None, action: str = None,
+               fee: float = 0.0, order_id: str = None, source: str = None, note: str = None,
+               details: Any = None) -> int:
+        """Append one fill. `side` may be any action label; returns the row id."""
+        normalized = side_of(side)
+        if normalized is None:
+            raise ValueError(f"Cannot tell buy from sell in {side!r}")
+        if details is not None and not isinstance(details, str):
+            if order_id is None:
+                order_id = _order_id(details)
+            details = json.dumps(details, default=str)
+        with self._conn() as conn:
+            cur = conn.execute(
+                'INSERT INTO trades (ts, pair, side, action, price, volume, fee, order_id, source, note, details) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (time.time() if ts is None else float(ts), pair, normalized, action or side, float(price),
+                 float(volume), float(fee or 0), order_id, source, note, details))
+            return cur.lastrowid
+
+    def import_csv(self, csv_path: str = LEGACY_CSV) -> int:
+        """Import a legacy trade_log.csv. Rows already imported are skipped; returns rows added."""
+        if not os.path.exists(csv_path):
+            return 0
+        from trade_log_reader import TradeLogReader
+        added = 0
+        with self._conn() as conn:
+            # Streamed row by row, so a multi-GB log imports in constant memory
+            for trade in TradeLogReader(csv_path):
+                record = trade.as_journal_row()
+                key = hashlib.sha1(f"{trade.line_no}|{sorted(trade.raw.items())}".encode()).hexdigest()
+                cur = conn.execute(
+                    'INSERT OR IGNORE INTO trades (ts, pair, side, action, price, volume, fee, order_id, source, '
+                    'note, details, import_key) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                    tuple(record[c] for c in COLUMNS[1:]) + (key,))
+                added += cur.rowcount
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('csv_imported', ?)", (csv_path,))
+        if added:
+            LOGGER.info(f"Imported {added} trades from {csv_path} into {self.path}")
+        return added
+
+    def imported(self) -> bool:
+        row = self._conn().execute("SELECT value FROM meta WHERE key = 'csv_imported'").fetchone()
+        return row is not None
+
+    @staticmethod
+    def _row(row: sqlite3.Row) -> Dict:
+        return {c: row[c] for c in COLUMNS}
+
+    def recent(self, limit: int = 50, pair: str = None, before_id: int = None) -> List[Dict]:
+        """Newest trades first (optionally for one pair, or older than `before_id`)."""
+        sql, args = 'SELECT * FROM trades', []
+        where = []
+        if pair:
+            where.append('pair = ?')
+            args.append(pair)
+        if before_id is not None:
+            where.append('id < ?')
+            args.append(before_id)
+        if where:
+            sql += ' WHERE ' + ' AND '.join(where)
+        # With a pair filter the (pair, ts) index serves the ordering
+        sql += (' ORDER BY ts DESC, id DESC' if pair else ' ORDER BY id DESC') + ' LIMIT ?'
+        args.append(limit)
+        return [self._row(r) for r in self._conn().execute(sql, args)]
+
+    @staticmethod
+    def cursor_for(trade: Dict) -> str:
+        """Opaque pagination cursor for a trade: its (ts, id) position."""
+        return f"{trade['ts']!r}:{trade['id']}"
+
+    def cursor_position(self, cursor: Any) -> Optional[Tuple[float, int]]:
+        """(ts, id) for a cursor from `cursor_for`, or for a bare row id. None if unknown."""
+        text = str(cursor).strip()
+        if ':' in text:
+            ts, _, trade_id = text.rpartition(':')
+            return float(ts), int(trade_id)
+        row = self._conn().execute('SELECT ts, id FROM trades WHERE id = ?', (int(text),)).fetchone()
+        return (row['ts'], row['id']) if row else None
+
+    @staticmethod
+    def _filters(pair: str = None, side: str = None, action: str = None,
+                 since: float = None, until: float = None) -> Tuple[List[str], List[Any]]:
+        where, args = [], []
+        for column, value in (('pair', pair), ('side', side), ('action', action)):
+            if value:
+                where.append(f'{column} = ?')
+                args.append(value)
+        if since is not None:
+            where.append('ts >= ?')
+            args.append(since)
+        if until is not None:
+            where.append('ts < ?')
+            args.append(until)
+        return where, args
+
+    def page(self, limit: int = 50, before: Tuple[float, int] = None, after: Tuple[float, int] = None,
+             pair: str = None, side: str = None, action: str = None,
+             since: float = None, until: float = None) -> List[Dict]:
+        """One page of trades, newest first, ordered by (ts, id).
+
+        Keyset pagination: `before` / `after` are (ts, id) positions (see cursor_position),
+        so a page is an index range scan over the (ts) / (pair, ts) / (side, ts) indexes
+        - whose entries end in the row id - and costs O(limit) however long the journal is.
+        With only `after`, the page is the `limit` trades just newer than it.
+        """
+        where, args = self._filters(pair, side, action, since, until)
+        if before is not None:
+            where.append('(ts, id) < (?, ?)')
+            args.extend(before)
+        if after is not None:
+            where.append('(ts, id) > (?, ?)')
+            args.extend(after)
+        order = 'ASC' if after is not None and before is None else 'DESC'
+        sql = 'SELECT * FROM trades'
+        if where:
+            sql += ' WHERE ' + ' AND '.join(where)
+        sql += f' ORDER BY ts {order}, id {order} LIMIT ?'
+        rows = [self._row(r) for r in self._conn().execute(sql, args + [limit])]
+        return rows[::-1] if order == 'ASC' else rows
+
+    def aggregate(self, group_by: str = 'pair', pair: str = None, side: str = None, action: str = None,
+                  since: float = None, until: float = None) -> List[Dict]:
+        """Trade counts, volume, quote notional and fees grouped by pair, side, action or (local) day."""
+        groups = {'pair': 'pair', 'side': 'side', 'action': 'action',
+                  'day': "date(ts, 'unixepoch', 'localtime')"}
+        if group_by not in groups:
+            raise ValueError(f"group_by must be one of {list(groups)}")
+        where, args = self._filters(pair, side, action, since, until)
+        sql = (f"SELECT {groups[group_by]} AS {group_by}, COUNT(*) AS trades, SUM(volume) AS volume, "
+               "SUM(price * volume) AS notional, SUM(fee) AS fees, "
+               "SUM(side = 'buy') AS buy_count, SUM(side = 'sell') AS sell_count, "
+               "MIN(ts) AS first_ts, MAX(ts) AS last_ts FROM trades")
+        if where:
+            sql += ' WHERE ' + ' AND '.join(where)
+        sql += f' GROUP BY {group_by} ORDER BY {group_by}'
+        return [dict(r) for r in self._conn().execute(sql, args)]
+
+    def last_buy(self, pair: str = None) -> Optional[Dict]:
+        """Most recent buy (for `pair`, or any pair)."""
+        if pair:
+            row = self._conn().execute("SELECT * FROM trades WHERE pair = ? AND side = 'buy' "
+                                       "ORDER BY ts DESC, id DESC LIMIT 1", (pair,)).fetchone()
+        else:
+            row = self._conn().execute("SELECT * FROM trades WHERE side = 'buy' ORDER BY id DESC LIMIT 1").fetchone()
+        return self._row(row) if row else None
+
+    def last_trade(self, pair: str, source: str = None) -> Optional[Dict]:
+        """Most recent trade for `pair`, optionally only those recorded by `source`."""
+        sql, args = 'SELECT * FROM trades WHERE pair = ?', [pair]
+        if source:
+            sql += ' AND source = ?'
+            args.append(source)
+        row = self._conn().execute(sql + ' ORDER BY ts DESC, id DESC LIMIT 1', args).fetchone()
+        return self._row(row) if row else None
+
+    def by_order_id(self, order_id: str) -> List[Dict]:
+        return [self._row(r) for r in self._conn().execute('SELECT * FROM trades WHERE order_id = ?', (order_id,))]
+
+    def iter_trades(self, after_id: int = 0, pair: str = None) -> Iterator[Dict]:
+        """Trades in insertion order with id > after_id (streams; does not load the table)."""
+        sql, args = 'SELECT * FROM trades WHERE id > ?', [after_id]
+        if pair:
+            sql += ' AND pair = ?'
+            args.append(pair)
+        for row in self._conn().execute(sql + ' ORDER BY id', args):
+            yield self._row(row)
+
+    def pair_totals(self, pair: str = None) -> List[Dict]:
+        """Per-pair buy/sell counts and quote totals, aggregated in SQLite."""
+        sql = ("SELECT pair, COUNT(*) AS trades, "
+               "SUM(CASE WHEN side = 'buy' THEN price * volume ELSE 0 END) AS bought, "
+               "SUM(CASE WHEN side = 'sell' THEN price * volume ELSE 0 END) AS sold, "
+               "SUM(side = 'buy') AS buy_count, SUM(side = 'sell') AS sell_count, "
+               "SUM(fee) AS fees FROM trades")
+        args = ()
+        if pair:
+            sql += ' WHERE pair = ?'
+            args = (pair,)
+        return [dict(r) for r in self._conn().execute(sql + ' GROUP BY pair', args)]
+
+    def daily_totals(self) -> List[Dict]:
+        """Per local calendar day buy/sell quote totals and trade counts."""
+        sql = ("SELECT date(ts, 'unixepoch', 'localtime') AS day, COUNT(*) AS trades, "
+               "SUM(CASE WHEN side = 'buy' THEN price * volume ELSE 0 END) AS bought, "
+               "SUM(CASE WHEN side = 'sell' THEN price * volume ELSE 0 END) AS sold "
+               "FROM trades GROUP BY day ORDER BY day")
+        return [dict(r) for r in self._conn().execute(sql)]
+
+    def count(self) -> int:
+        return self._conn().execute('SELECT COUNT(*) FROM trades').fetchone()[0]
+
+    def max_id(self) -> int:
+        return self._conn().execute('SELECT COALESCE(MAX(id), 0) FROM trades').fetchone()[0]
+
+
+# Process-wide journals, one per path
+_journals: Dict[str, TradeJournal] = {}
+_journals_lock = threading.Lock()
+
+
+def get_trade_journal(path: str = None, legacy_csv: str = None) -> TradeJournal:
+    """Get the process-wide journal for `path`, importing the legacy CSV on first use."""
+    path = path or JOURNAL_PATH
+    with _journals_lock:
+        journal = _journals.get(path)
+        if journal is None:
+            journal = _journals[path] = TradeJournal(path)
+            if not journal.imported():
+                try:
+                    journal.import_csv(legacy_csv or LEGACY_CSV)
+                except Exception as e:
+                    LOGGER.error(f"Importing {legacy_csv or LEGACY_CSV} into the trade journal failed: {e}")
+        return journal
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Trade journal maintenance')
+    sub = parser.add_subparsers(dest='cmd', required=True)
+    imp = sub.add_parser('import', help='Import a legacy trade_log.csv (idempotent)')
+    imp.add_argument('csv', nargs='?', default=LEGACY_CSV)
+    recent = sub.add_parser('recent', help='Print the newest trades')
+    recent.add_argument('--pair')
+    recent.add_argument('--limit', type=int, default=20)
+    parser.add_argument('--db', default=JOURNAL_PATH)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    journal = TradeJournal(args.db)
+    if args.cmd == 'import':
+        print(journal.import_csv(args.csv), 'trades imported;', journal.count(), 'in journal')
+    else:
+        for trade in journal.recent(args.limit, pair=args.pair):
+            print(json.dumps(trade, default=str))
@@ -0,0 +1,160 @@
+"""
+Streaming reader for the legacy trade_log.csv.
+
+The CSV was written by several tools with different ideas of a row:
+
+- luno_bot:          timestamp (epoch float), pair, action (buy_ema, buy_usdt, BUY...), price, volume, details
+- auto_sell_monitor: timestamp ('%Y-%m-%d %H:%M:%S'), side, order_id, price, volume, note
+                     (written under the bot's header, so side/order_id land in pair/action)
+- dashboard:         unquoted JSON details, which the CSV parser splits on its commas
+
+`details` is a JSON object in some rows and a Python dict repr in others.
+
+`TradeLogReader` walks the file one row at a time and yields one `TradeRecord` per
+trade, so memory stays constant however large the log is. A record's `details` (and the
+order id found in them) is only decoded the first time it is read, then cached on the
+record; a pass that only sums prices and volumes never parses them. A repeated header
+line (e.g. two logs concatenated) switches the column mapping for the rows after it.
+
+Usage:
+    for trade in TradeLogReader('trade_log.csv'):
+        print(trade.ts, trade.pair, trade.side, trade.price, trade.volume)
+
+    python trade_log_reader.py trade_log.csv   # per-pair summary, streamed
+"""
+import csv
+import logging
+import sys
+from typing import Any, Dict, Iterator, List, Optional
+
+from trade_journal import parse_details, parse_timestamp, side_of, _order_id
+
+LOGGER = logging.getLogger(__name__)
+
+_UNPARSED = object()
+
+
+class TradeRecord:
+    """One normalized trade from the log. `details` and `order_id` are decoded on first access."""
+
+    __slots__ = ('line_no', 'ts', 'pair', 'side', 'action', 'price', 'volume', 'details_text', 'raw',
+                 '_order_id', '_details')
+
+    def __init__(self, line_no: int, ts: float, pair: str, side: str, action: str, price: float, volume: float,
+                 order_id: Optional[str] = None, details_text: Optional[str] = None, raw: Dict[str, str] = None):
+        self.line_no = line_no
+        self.ts = ts
+        self.pair = pair
+        self.side = side
+        self.action = action
+        self.price = price
+        self.volume = volume
+        self.details_text = details_text
+        self.raw = raw
+        self._order_id = order_id
+        self._details = _UNPARSED
+
+    @classmethod
+    def from_row(cls, row: Dict[str, str], extra: List[str] = None, line_no: int = 0) -> Optional['TradeRecord']:
+        """Normalize one CSV row (any writer's schema). Returns None for rows without a side."""
+        details_text = row.get('details') or row.get('note') or ''
+        if extra:
+            details_text = ','.join([details_text] + [e for e in extra if e is not None])
+        pair, action, order_id = row.get('pair') or '', row.get('action') or row.get('side') or '', row.get('order_id')
+        if side_of(pair) and not side_of(action):
+            # auto_sell_monitor rows (timestamp, side, order_id, price, volume, note) under the bot's header
+            pair, action, order_id = '', pair, action
+        side = side_of(action)
+        if side is None:
+            return None
+        ts = parse_timestamp(row.get('timestamp'))
+        if ts is None:
+            return None
+        try:
+            price = float(row.get('price') or row.get('execution_price') or 0)
+            volume = float(row.get('volume') or row.get('amount') or row.get('quantity') or 0)
+        except ValueError:
+            return None
+        record = cls(line_no, ts, pair, side, action, price, volume, order_id or None, details_text or None, row)
+        if not pair:
+            details = record.details
+            if isinstance(details, dict):
+                record.pair = str(details.get('pair') or (details.get('payload') or {}).get('pair') or '')
+        return record
+
+    @property
+    def details(self) -> Any:
+        if self._details is _UNPARSED:
+            self._details = parse_details(self.details_text)
+        return self._details
+
+    @property
+    def order_id(self) -> Optional[str]:
+        if self._order_id is None and self.details_text:
+            self._order_id = _order_id(self.details)
+        return self._order_id
+
+    def as_journal_row(self) -> Dict:
+        """The record as trade journal columns (see trade_journal.COLUMNS)."""
+        return {'ts': self.ts, 'pair': self.pair, 'side': self.side, 'action': self.action, 'price': self.price,
+                'volume': self.volume, 'fee': 0.0, 'order_id': self.order_id, 'source': 'csv', 'note': None,
+                'details': self.details_text}
+
+    def __repr__(self):
+        return (f"TradeRecord(line={self.line_no}, ts={self.ts}, pair={self.pair!r}, side={self.side!r}, "
+                f"price={self.price}, volume={self.volume})")
+
+
+class TradeLogReader:
+    """Iterate a trade_log.csv as TradeRecords in constant memory.
+
+    Rows are numbered like csv.DictReader numbers them (blank lines are not counted,
+    the first data row is 2), which keeps journal import keys stable.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.stats = {'rows': 0, 'records': 0, 'skipped': 0, 'headers': 0}
+
+    def __iter__(self) -> Iterator[TradeRecord]:
+        with open(self.path, newline='', encoding='utf-8', errors='replace') as f:
+            reader = csv.reader(f)
+            header = next(reader, None)
+            if not header:
+                return
+            self.stats['headers'] += 1
+            line_no = 1
+            for fields in reader:
+                if not fields:
+                    continue
+                line_no += 1
+                self.stats['rows'] += 1
+                if fields[0].strip().lower() == 'timestamp':
+                    header = fields
+                    self.stats['headers'] += 1
+                    continue
+                row = dict(zip(header, fields))
+                extra = None
+                if len(fields) > len(header):
+                    extra = fields[len(header):]
+                elif len(fields) < len(header):
+                    row.update((key, None) for key in header[len(fields):])
+                record = TradeRecord.from_row(row, extra, line_no)
+                if record is None:
+                    self.stats['skipped'] += 1
+                    continue
+                self.stats['records'] += 1
+                yield record
+
+
+if __name__ == '__main__':
+    path = sys.argv[1] if len(sys.argv) > 1 else 'trade_log.csv'
+    totals: Dict[str, Dict[str, float]] = {}
+    reader = TradeLogReader(path)
+    for trade in reader:
+        t = totals.setdefault(trade.pair or '?', {'trades': 0, 'bought': 0.0, 'sold': 0.0})
+        t['trades'] += 1
+        t['bought' if trade.side == 'buy' else 'sold'] += trade.price * trade.volume
+    for pair, t in sorted(totals.items()):
+        print(f"{pair:10} trades={t['trades']:<6} bought={t['bought']:.2f} sold={t['sold']:.2f}")
+    print(reader.stats)
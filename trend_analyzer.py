@@ -1,109 +1,146 @@
 """
 AI Prediction & Signal Mode: simple EMA-based trend detection and coin recommendations.
 Predicts Uptrend/Downtrend/Neutral and suggests best coin to buy.
+
+In the bot the process-wide analyzer (`get_trend_analyzer`) is subscribed to closed
+candles (`on_candle`) and its analyses are published to the `trends` section of
+bot_state.json, which the dashboard's /api/strategy `trend_signals` serve. Without a
+running bot the dashboard falls back to feeding its own analyzer one price per coin
+from each new shared ticker-cache snapshot (`observe`).
 """
 import json
 import os
 import logging
+import threading
 from typing import Dict, List, Tuple, Optional
-from collections import deque
+
+import numpy as np
+
+from price_matrix import EMAVector, PriceMatrix
 
 LOGGER = logging.getLogger(__name__)
 
 class TrendAnalyzer:
     """Analyze price trends using EMA and generate trading signals."""
     
-    def __init__(self, short_ema_period: int = 12, long_ema_period: int = 26, signal_period: int = 9):
-        """Initialize trend analyzer with EMA periods (MACD-like)."""
+    def __init__(self, short_ema_period: int = 12, long_ema_period: int = 26):
+        """Initialize trend analyzer with short/long EMA periods."""
         self.short_period = short_ema_period
         self.long_period = long_ema_period
-        self.signal_period = signal_period
-        self.price_history = {}  # coin -> deque of prices
         self.max_history = 100
+        # coins x time price ring buffer plus one short/long EMA per coin row
+        self.matrix = PriceMatrix(capacity=self.max_history)
+        self.ema_short = EMAVector(short_ema_period, seed='sma')
+        self.ema_long = EMAVector(long_ema_period, seed='sma')
+        self._lock = threading.Lock()
+        self._last_snapshot = None
+
+    @property
+    def price_history(self) -> Dict[str, List[float]]:
+        """coin -> stored prices, oldest first."""
+        return {coin: self.matrix.history(coin).tolist() for coin in self.matrix.coins}
     
     def add_price(self, coin: str, price: float):
         """Add a price point for a coin."""
-        if coin not in self.price_history:
-            self.price_history[coin] = deque(maxlen=self.max_history)
-        self.price_history[coin].append(price)
-    
-    def _calculate_ema(self, prices: List[float], period: int) -> Optional[float]:
-        """Calculate Exponential Moving Average."""
-        if len(prices) < period:
-            return None
-        
-        prices = list(prices)
-        multiplier = 2.0 / (period + 1)
-        ema = sum(prices[:period]) / period
-        
-        for price in prices[period:]:
-            ema = price * multiplier + ema * (1 - multiplier)
-        
-        return ema
-    
+        self.add_prices({coin: price})
+
+    def on_candle(self, coin: str, timeframe: str, candle: Dict):
+        """`CandleAggregator` subscriber: feed one closed candle's close as a price point."""
+        with self._lock:
+            self.add_price(coin, candle['close'])
+
+    def add_prices(self, prices: Dict[str, float]):
+        """Add one price for each of several coins in a single vectorized update."""
+        if not prices:
+            return
+        rows = self.matrix.append(prices)
+        values = self.matrix.latest(rows)
+        self.ema_short.update(rows, values)
+        self.ema_long.update(rows, values)
+
+    def observe(self, tickers: Dict[str, dict], coins: List[str]) -> List[Dict]:
+        """Feed a {pair: ticker} snapshot (once per snapshot) and analyze `coins`.
+
+        Safe to call from several threads: a snapshot already folded in is not added
+        again, so polling faster than the ticker cache refreshes doesn't skew the EMAs.
+        """
+        with self._lock:
+            if tickers is not self._last_snapshot:
+                self._last_snapshot = tickers
+                prices = {}
+                for coin in coins:
+                    try:
+                        price = float((tickers.get(coin) or {}).get('last_trade') or 0)
+                    except (TypeError, ValueError):
+                        continue
+                    if price > 0:
+                        prices[coin] = price
+                self.add_prices(prices)
+            return self.analyze_all(coins)
+
+    def analyze_all(self, coins: List[str]) -> List[Dict]:
+        """
+        Analyze trend for every coin in one vectorized pass.
+        Returns one analyze_trend() dict per coin, in the same order.
+        """
+        rows = self.matrix.rows_for(coins)
+        sizes = self.matrix.sizes(rows)
+        current = self.matrix.latest(rows)
+        ema_short = self.ema_short.get(rows)
+        ema_long = self.ema_long.get(rows)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            # Current momentum: compare recent prices to EMAs
+            momentum = (current - ema_long) / ema_long * 100
+            # Trend determination: short EMA above/below long EMA (0.2% threshold to avoid noise)
+            up = ema_short > ema_long * 1.002
+            down = ema_short < ema_long * 0.998
+        strength = np.where(up | down, np.minimum(100, np.abs(momentum)), 0)
+        trends = np.where(up, 'UPTREND', np.where(down, 'DOWNTREND', 'NEUTRAL'))
+        ready = (sizes >= self.long_period) & ~np.isnan(ema_long)
+
+        analyses = []
+        for i, coin in enumerate(coins):
+            if not ready[i]:
+                analyses.append({
+                    'coin': coin,
+                    'trend': 'NEUTRAL',
+                    'signal_strength': 0,
+                    'momentum': 0,
+                    'data_points': int(sizes[i]),
+                    'message': f'Insufficient data ({int(sizes[i])} prices, need {self.long_period})'
+                })
+                continue
+            analyses.append({
+                'coin': coin,
+                'trend': str(trends[i]),
+                'ema_short': round(float(ema_short[i]), 2),
+                'ema_long': round(float(ema_long[i]), 2),
+                'current_price': float(current[i]),
+                'momentum_pct': round(float(momentum[i]), 2),
+                'signal_strength': round(float(strength[i]), 2),
+                'data_points': int(sizes[i]),
+            })
+        return analyses
+
     def analyze_trend(self, coin: str) -> Dict:
         """
         Analyze trend for a coin.
         Returns: {trend, ema_short, ema_long, signal_strength, momentum}
         """
-        prices = list(self.price_history.get(coin, []))
-        
-        if len(prices) < self.long_period:
-            return {
-                'coin': coin,
-                'trend': 'NEUTRAL',
-                'signal_strength': 0,
-                'momentum': 0,
-                'data_points': len(prices),
-                'message': f'Insufficient data ({len(prices)} prices, need {self.long_period})'
-            }
-        
-        ema_short = self._calculate_ema(prices, self.short_period)
-        ema_long = self._calculate_ema(prices, self.long_period)
-        
-        if ema_short is None or ema_long is None:
-            return {
-                'coin': coin,
-                'trend': 'NEUTRAL',
-                'signal_strength': 0,
-                'momentum': 0,
-            }
-        
-        # Current momentum: compare recent prices to EMAs
-        current_price = prices[-1]
-        momentum = ((current_price - ema_long) / ema_long) * 100
-        
-        # Trend determination: short EMA above/below long EMA
-        if ema_short > ema_long * 1.002:  # 0.2% threshold to avoid noise
-            trend = 'UPTREND'
-            signal_strength = min(100, abs(momentum))
-        elif ema_short < ema_long * 0.998:
-            trend = 'DOWNTREND'
-            signal_strength = min(100, abs(momentum))
-        else:
-            trend = 'NEUTRAL'
-            signal_strength = 0
-        
-        return {
-            'coin': coin,
-            'trend': trend,
-            'ema_short': round(ema_short, 2),
-            'ema_long': round(ema_long, 2),
-            'current_price': current_price,
-            'momentum_pct': round(momentum, 2),
-            'signal_strength': round(signal_strength, 2),
-            'data_points': len(prices),
-        }
+        return self.analyze_all([coin])[0]
     
-    def get_best_buy_coin(self, coins: List[str]) -> Optional[Dict]:
+    def get_best_buy_coin(self, coins: List[str], analyses: List[Dict] = None) -> Optional[Dict]:
         """
         Suggest best coin to buy based on strongest downtrend signal.
         Returns coin with highest buy signal strength.
+        Pass `analyses` from analyze_all() to avoid recomputing them.
         """
         if not coins:
             return None
         
-        analyses = [self.analyze_trend(coin) for coin in coins]
+        if analyses is None:
+            analyses = self.analyze_all(coins)
         downtrends = [a for a in analyses if a.get('trend') == 'DOWNTREND']
         
         if not downtrends:
@@ -126,7 +163,7 @@ class TrendAnalyzer:
     
     def get_prediction_summary(self, coins: List[str]) -> Dict:
         """Get summary of all coin signals and predictions."""
-        analyses = [self.analyze_trend(coin) for coin in coins]
+        analyses = self.analyze_all(coins)
         
         uptrends = [a for a in analyses if a.get('trend') == 'UPTREND']
         downtrends = [a for a in analyses if a.get('trend') == 'DOWNTREND']
@@ -137,7 +174,7 @@ class TrendAnalyzer:
             'uptrends': uptrends,
             'downtrends': downtrends,
             'neutrals': neutrals,
-            'best_buy': self.get_best_buy_coin(coins),
+            'best_buy': self.get_best_buy_coin(coins, analyses),
             'summary': {
                 'total_coins': len(coins),
                 'uptrending': len(uptrends),
@@ -145,3 +182,18 @@ class TrendAnalyzer:
                 'neutral': len(neutrals),
             }
         }
+
+
+# Global analyzer instance
+_analyzer = None
+_analyzer_lock = threading.Lock()
+
+
+def get_trend_analyzer() -> TrendAnalyzer:
+    """Get the process-wide trend analyzer (initialize if needed)."""
+    global _analyzer
+    if _analyzer is None:
+        with _analyzer_lock:
+            if _analyzer is None:
+                _analyzer = TrendAnalyzer()
+    return _analyzer